@@ -5,6 +5,30 @@ from ddtrace.internal import core
 
 CUSTOM_EVENT_NAME = "CoreAPIScenario.event"
 
+# The events that the tracing product listens to while a Flask request is handled
+FLASK_TRACING_EVENTS = (
+    "wsgi.request.prepare",
+    "wsgi.app.success",
+    "wsgi.request.complete",
+    "flask.start_response.pre",
+    "flask.request_call_modifier",
+    "flask.request_call_modifier.post",
+    "context.started.wsgi.response",
+    "context.started.flask._patched_request",
+    "context.started.start_span.wsgi.__call__",
+    "context.started.start_span.flask.call",
+)
+# The Flask methods traced with a flask._patched_request context for each request
+FLASK_PATCHED_REQUEST_METHODS = (
+    "preprocess_request",
+    "dispatch_request",
+    "full_dispatch_request",
+    "process_response",
+    "finalize_request",
+    "do_teardown_request",
+    "do_teardown_appcontext",
+)
+
 if not hasattr(core, "dispatch_with_results"):
     core.dispatch_with_results = core.dispatch
 
@@ -47,6 +71,14 @@ class CoreAPIScenario(bm.Scenario):
         if self.get_item_exists:
             core.set_item("key", "value")
 
+        if "flask_request" in self.scenario_name:
+            for event_id in FLASK_TRACING_EVENTS:
+
+                def tracing_listener(*_):
+                    pass
+
+                core.on(event_id, tracing_listener)
+
         def core_dispatch(loops):
             """Measure the cost to dispatch an event on the hub"""
             for _ in range(loops):
@@ -76,7 +108,39 @@ class CoreAPIScenario(bm.Scenario):
             for _ in range(loops):
                 core.get_item("key")
 
-        if "core_dispatch_with_results" in self.scenario_name:
+        def get_item_nested(loops):
+            """Measure the cost to fetch an item from an ancestor of a deeply nested context"""
+            with core.context_with_data("with_data", pin="pin"):
+                with core.context_with_data("with_data"):
+                    with core.context_with_data("with_data"):
+                        with core.context_with_data("with_data"):
+                            with core.context_with_data("with_data"):
+                                for _ in range(loops):
+                                    core.get_item("pin")
+
+        def flask_request(loops):
+            """Measure the events dispatched by the wsgi and flask integrations for a request, with AppSec disabled"""
+            for _ in range(loops):
+                with core.context_with_data("wsgi.__call__") as ctx:
+                    core.dispatch("wsgi.request.prepare", (ctx, None))
+                    core.dispatch_with_results("flask.request_call_modifier", (ctx, None, None, None))
+                    core.dispatch("flask.request_call_modifier.post", (ctx, None, None, None))
+                    for _ in FLASK_PATCHED_REQUEST_METHODS:
+                        with core.context_with_data("flask._patched_request") as request_ctx:
+                            core.dispatch("flask._patched_request", (request_ctx,))
+                    with core.context_with_data("flask.call"):
+                        core.dispatch_with_results("flask.wrapped_view", ({},))
+                    core.dispatch("flask.start_response.pre", (None, ctx, None, "200", []))
+                    core.dispatch("flask.start_response", ("Flask",))
+                    core.dispatch("flask.finalize_request.post", (None, []))
+                    core.dispatch("wsgi.app.success", (ctx, []))
+                    core.dispatch_with_results("wsgi.request.complete", (ctx, [], False))
+                    with core.context_with_data("wsgi.response"):
+                        pass
+
+        if "flask_request" in self.scenario_name:
+            yield flask_request
+        elif "core_dispatch_with_results" in self.scenario_name:
             yield core_dispatch_with_results
         elif "core_dispatch" in self.scenario_name:
             yield core_dispatch
@@ -84,6 +148,8 @@ class CoreAPIScenario(bm.Scenario):
             yield context_with_data
         elif "set_item" in self.scenario_name:
             yield set_item
+        elif "get_item_nested" in self.scenario_name:
+            yield get_item_nested
         elif "get_item" in self.scenario_name:
             yield get_item
         else:
@@ -1,6 +1,12 @@
+import sys
+import threading
+import tracemalloc
+
 import bm
 import utils
 
+from ddtrace.internal._encoding import BufferFull
+
 
 class Encoder(bm.Scenario):
     ntraces: int
@@ -10,15 +16,70 @@ class Encoder(bm.Scenario):
     nmetrics: int
     encoding: str
     dd_origin: bool
+    nbuffers: int
+    flush_contention: bool
+    nresources: int
+    warm_strings: int
+    zero_copy: bool
+    measure_memory: bool
 
     def run(self):
-        encoder = utils.init_encoder(self.encoding)
+        encoder = utils.init_encoder(self.encoding, nbuffers=self.nbuffers, warm_strings=self.warm_strings)
         traces = utils.gen_traces(self)
 
+        def _encode():
+            if self.zero_copy:
+                payload, _ = encoder.encode_buffer()
+                if payload is not None:
+                    payload.release()
+            else:
+                encoder.encode()
+
+        if self.measure_memory:
+            # Report the memory allocated to flush all the traces in a single
+            # payload alongside the time measured below
+            for trace in traces:
+                encoder.put(trace)
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            _encode()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print("%s: %d bytes peak flush memory" % (self.scenario_name, peak - before), file=sys.stderr)
+
+        if not self.flush_contention:
+
+            def _(loops):
+                for _ in range(loops):
+                    for trace in traces:
+                        encoder.put(trace)
+                        _encode()
+
+            yield _
+            return
+
+        # Measure the cost of put while another thread keeps flushing the
+        # encoder, as the trace writer periodic thread does.
+        stop = threading.Event()
+
+        def _flush():
+            while not stop.is_set():
+                _encode()
+
+        flusher = threading.Thread(target=_flush)
+        flusher.start()
+
         def _(loops):
             for _ in range(loops):
                 for trace in traces:
-                    encoder.put(trace)
-                    encoder.encode()
+                    try:
+                        encoder.put(trace)
+                    except BufferFull:
+                        # The flusher thread could not keep up, keep measuring
+                        pass
 
-        yield _
+        try:
+            yield _
+        finally:
+            stop.set()
+            flusher.join()
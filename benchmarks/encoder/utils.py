@@ -7,6 +7,12 @@ from ddtrace._trace.span import Span
 from ddtrace.internal.encoding import MSGPACK_ENCODERS
 
 
+try:
+    from ddtrace.internal.encoding import RingBufferedEncoder
+except ImportError:
+    RingBufferedEncoder = None
+
+
 _Span = Span
 
 # DEV: 1.x dropped tracer positional argument
@@ -18,12 +24,18 @@ try:
     # see https://github.com/DataDog/dd-trace-py/pull/2422
     from ddtrace.internal._encoding import BufferedEncoder  # noqa: F401
 
-    def init_encoder(encoding, max_size=8 << 20, max_item_size=8 << 20):
-        return MSGPACK_ENCODERS[encoding](max_size, max_item_size)
+    def init_encoder(encoding, max_size=8 << 20, max_item_size=8 << 20, nbuffers=1, warm_strings=0):
+        if nbuffers > 1 and RingBufferedEncoder is not None:
+            encoder = RingBufferedEncoder(MSGPACK_ENCODERS[encoding], max_size, max_item_size, nbuffers)
+        else:
+            encoder = MSGPACK_ENCODERS[encoding](max_size, max_item_size)
+        if warm_strings:
+            encoder.warm_strings = warm_strings
+        return encoder
 
 except ImportError:
 
-    def init_encoder(encoding):
+    def init_encoder(encoding, nbuffers=1, warm_strings=0):
         return MSGPACK_ENCODERS[encoding]()
 
 
@@ -42,7 +54,7 @@ def gen_traces(config):
 
     # choose from a set of randomly generated span attributes
     span_names = _random_values(256, 16)
-    resources = _random_values(256, 16)
+    resources = _random_values(config.nresources, 16)
     services = _random_values(16, 16)
     tag_keys = _random_values(config.ntags, 16)
     metric_keys = _random_values(config.nmetrics, 16)
@@ -10,6 +10,7 @@ class HTTPPropagationInject(bm.Scenario):
     sampling_priority: str
     dd_origin: str
     meta: str
+    fanout: int
 
     def run(self):
         sampling_priority = None
@@ -31,7 +32,9 @@ class HTTPPropagationInject(bm.Scenario):
 
         def _(loops):
             for _ in range(loops):
-                # Just pass in a new/empty dict, we don't care about the result
-                http.HTTPPropagator.inject(ctx, {})
+                # The same context is injected in the headers of every downstream call
+                for _ in range(self.fanout):
+                    # Just pass in a new/empty dict, we don't care about the result
+                    http.HTTPPropagator.inject(ctx, {})
 
         yield _
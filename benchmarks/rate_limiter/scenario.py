@@ -1,4 +1,5 @@
 import math
+import threading
 
 import bm
 
@@ -7,12 +8,37 @@ class RateLimiter(bm.Scenario):
     rate_limit: int
     time_window: int
     num_windows: int
+    num_threads: int
+    per_thread: bool
 
     def run(self):
         from ddtrace.internal.compat import time_ns
         from ddtrace.internal.rate_limiter import RateLimiter
 
-        rate_limiter = RateLimiter(rate_limit=self.rate_limit, time_window=self.time_window)
+        if self.per_thread:
+            from ddtrace.internal.rate_limiter import ThreadLocalRateLimiter
+
+            rate_limiter = ThreadLocalRateLimiter(rate_limit=self.rate_limit, time_window=self.time_window)
+        else:
+            rate_limiter = RateLimiter(rate_limit=self.rate_limit, time_window=self.time_window)
+
+        if self.num_threads > 1:
+            # Share the operations between threads that use the current time,
+            # as the sampler does when traces finish concurrently
+            def _is_allowed(n):
+                for _ in range(n):
+                    rate_limiter.is_allowed()
+
+            def _(loops):
+                per_thread = math.ceil(loops / self.num_threads)
+                threads = [threading.Thread(target=_is_allowed, args=(per_thread,)) for _ in range(self.num_threads)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            yield _
+            return
 
         def _(loops):
             # Divide the operations into self.num_windows time windows
@@ -5,6 +5,7 @@ import string
 import bm
 
 from ddtrace._trace.span import Span
+from ddtrace.internal.sampling import SamplingRuleMatcher
 from ddtrace.sampling_rule import SamplingRule
 
 
@@ -29,6 +30,8 @@ class SamplingRules(bm.Scenario):
     num_operations: int
     num_resources: int
     num_tags: int
+    num_rules: int
+    compiled: bool
 
     def run(self):
         # Generate random service and operation names for the counts we requested
@@ -55,9 +58,34 @@ class SamplingRules(bm.Scenario):
             sample_rate=1.0,
         )
 
-        def _(loops):
-            for _ in range(loops):
-                for span in iter_n(spans, n=self.num_iterations):
-                    rule.matches(span)
+        # Rules that come before the one above, as in a long DD_TRACE_SAMPLING_RULES list.
+        # Half of them use exact values and half of them use glob patterns.
+        rules = [
+            SamplingRule(
+                service=random.choice(services) if i % 2 else rands(4) + "*",
+                name=rands() if i % 2 else "*" + rands(3),
+                resource=random.choice(resource_names) if i % 2 else "?" + rands(5),
+                sample_rate=0.5,
+            )
+            for i in range(self.num_rules - 1)
+        ]
+        rules.append(rule)
+
+        if self.compiled:
+            matcher = SamplingRuleMatcher(rules)
+
+            def _(loops):
+                for _ in range(loops):
+                    for span in iter_n(spans, n=self.num_iterations):
+                        matcher.match(span)
+
+        else:
+
+            def _(loops):
+                for _ in range(loops):
+                    for span in iter_n(spans, n=self.num_iterations):
+                        for rule in rules:
+                            if rule.matches(span):
+                                break
 
         yield _
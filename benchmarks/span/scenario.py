@@ -1,3 +1,6 @@
+import sys
+import tracemalloc
+
 from bm import Scenario
 import bm.utils as utils
 
@@ -13,6 +16,7 @@ class Span(Scenario):
     finishspan: bool
     traceid128: bool
     telemetry: bool
+    measure_memory: bool
 
     def run(self):
         # run scenario to also set tags on spans
@@ -33,6 +37,26 @@ class Span(Scenario):
         utils.drop_traces(tracer)
         utils.drop_telemetry_events()
 
+        if self.measure_memory:
+            # Report the memory held by unfinished spans alongside the time measured below
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            spans = []
+            for i in range(self.nspans):
+                s = tracer.start_span("test." + str(i))
+                if settags:
+                    s.set_tags(tags)
+                if setmetrics:
+                    s.set_metrics(metrics)
+                spans.append(s)
+            after, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                "%s: %d bytes per span" % (self.scenario_name, (after - before) // self.nspans),
+                file=sys.stderr,
+            )
+            del spans
+
         def _(loops):
             for _ in range(loops):
                 for i in range(self.nspans):
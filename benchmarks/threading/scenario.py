@@ -30,6 +30,7 @@ class Threading(bm.Scenario):
     nthreads: int
     ntraces: int
     nspans: int
+    nshards: int
 
     def create_trace(self, tracer: Tracer) -> None:
         with tracer.trace("root"):
@@ -39,8 +40,11 @@ class Threading(bm.Scenario):
                     random.random()
 
     def run(self) -> Generator[Callable[[int], None], None, None]:
+        from ddtrace import config
         from ddtrace import tracer
 
+        # The span aggregator is recreated by tracer.configure with the new number of shards
+        config._span_aggregator_shards = self.nshards
         # configure global tracer to drop traces rather
         tracer.configure(writer=NoopWriter())
 
@@ -0,0 +1,98 @@
+import sys
+
+import bm
+
+from ddtrace._trace.span import Span
+from ddtrace.internal.encoding import MSGPACK_ENCODERS
+from ddtrace.internal.writer import compression
+
+
+def gen_django_trace(nqueries):
+    """Generate a trace shaped like a typical Django request."""
+    trace = []
+    with Span("django.request", service="web", resource="GET /users/<int:pk>/", span_type="web") as root:
+        root.set_tags(
+            {
+                "component": "django",
+                "span.kind": "server",
+                "http.method": "GET",
+                "http.url": "http://localhost:8000/users/42/",
+                "http.route": "users/<int:pk>/",
+                "http.status_code": "200",
+                "http.useragent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)",
+                "django.view": "app.views.UserDetailView",
+                "django.user.is_authenticated": "True",
+            }
+        )
+        trace.append(root)
+    for name in ("SessionMiddleware", "AuthenticationMiddleware", "CsrfViewMiddleware"):
+        with Span(
+            "django.middleware",
+            service="web",
+            resource="django.contrib.middleware.%s.__call__" % name,
+            parent_id=root.span_id,
+            trace_id=root.trace_id,
+        ) as span:
+            span.set_tag_str("component", "django")
+            trace.append(span)
+    for i in range(nqueries):
+        with Span(
+            "postgres.query",
+            service="web-postgres",
+            resource="SELECT auth_user.id, auth_user.username FROM auth_user WHERE auth_user.id = %s",
+            span_type="sql",
+            parent_id=root.span_id,
+            trace_id=root.trace_id,
+        ) as span:
+            span.set_tags(
+                {
+                    "component": "psycopg",
+                    "span.kind": "client",
+                    "db.system": "postgresql",
+                    "db.name": "app",
+                    "db.user": "app",
+                    "out.host": "postgres.internal",
+                }
+            )
+            span.set_metric("db.row_count", i)
+            trace.append(span)
+    with Span(
+        "django.template.render",
+        service="web",
+        resource="users/detail.html",
+        parent_id=root.span_id,
+        trace_id=root.trace_id,
+    ) as span:
+        span.set_tag_str("component", "django")
+        trace.append(span)
+    return trace
+
+
+class TraceCompression(bm.Scenario):
+    ntraces: int
+    nqueries: int
+    encoding: str
+    content_encoding: str
+
+    def run(self):
+        encoder = MSGPACK_ENCODERS[self.encoding](8 << 20, 8 << 20)
+        for _ in range(self.ntraces):
+            encoder.put(gen_django_trace(self.nqueries))
+        payload, _ = encoder.encode()
+        content_encoding = self.content_encoding
+
+        if content_encoding != "none":
+            # Report the bytes saved alongside the CPU cost measured below
+            compressed = compression.compress(payload, content_encoding)
+            print(
+                "%s: %d bytes compressed to %d bytes (%.1f%%)"
+                % (self.scenario_name, len(payload), len(compressed), 100.0 * len(compressed) / len(payload)),
+                file=sys.stderr,
+            )
+
+        def _(loops):
+            for _ in range(loops):
+                if content_encoding != "none":
+                    compression.compress(payload, content_encoding)
+
+        yield _
@@ -0,0 +1,44 @@
+import sys
+import time
+
+import bm
+
+from ddtrace.internal.utils.cache import cached
+
+
+class UtilsCache(bm.Scenario):
+    cache_size: int
+    num_keys: int
+    num_calls: int
+    report_pauses: bool
+
+    def run(self):
+        @cached(self.cache_size)
+        def f(key):
+            return key
+
+        # Keys cycle through a working set that fits in the cache, or that
+        # overflows it so that every call is likely to evict an entry.
+        keys = ["key-%d" % (i % self.num_keys) for i in range(self.num_calls)]
+
+        if self.report_pauses:
+            # Report the slowest calls alongside the time measured below, as
+            # evictions used to happen in bursts that stalled a single call
+            latencies = []
+            for key in keys:
+                start = time.perf_counter_ns()
+                f(key)
+                latencies.append(time.perf_counter_ns() - start)
+            latencies.sort()
+            print(
+                "%s: %d ns p99.9 call, %d ns slowest call"
+                % (self.scenario_name, latencies[int(len(latencies) * 0.999)], latencies[-1]),
+                file=sys.stderr,
+            )
+
+        def _(loops):
+            for _ in range(loops):
+                for key in keys:
+                    f(key)
+
+        yield _
@@ -48,7 +48,17 @@ class Context(object):
     boundaries.
     """
 
-    __slots__ = ["trace_id", "span_id", "_lock", "_meta", "_metrics", "_span_links", "_baggage", "_is_remote"]
+    __slots__ = [
+        "trace_id",
+        "span_id",
+        "_lock",
+        "_meta",
+        "_metrics",
+        "_span_links",
+        "_baggage",
+        "_is_remote",
+        "_injected_headers",
+    ]
 
     def __init__(
         self,
@@ -70,6 +80,8 @@ class Context(object):
         self.trace_id: Optional[int] = trace_id
         self.span_id: Optional[int] = span_id
         self._is_remote: bool = is_remote
+        # The propagation headers last rendered for this context, and the state they were rendered from
+        self._injected_headers: Optional[Tuple[Tuple[Any, ...], Dict[str, str]]] = None
 
         if dd_origin is not None and _DD_ORIGIN_INVALID_CHARS_REGEX.search(dd_origin) is None:
             self._meta[ORIGIN_KEY] = dd_origin
@@ -104,6 +116,7 @@ class Context(object):
         self.trace_id, self.span_id, self._meta, self._metrics, self._span_links, self._baggage, self._is_remote = state
         # We cannot serialize and lock, so we must recreate it unless we already have one
         self._lock = threading.RLock()
+        self._injected_headers = None
 
     def _with_span(self, span: "Span") -> "Context":
         """Return a shallow copy of the context with the given span."""
@@ -1,7 +1,9 @@
 import abc
 from collections import defaultdict
+from collections import deque
 from threading import Lock
 from threading import RLock
+from typing import Deque
 from typing import Dict
 from typing import Iterable
 from typing import List
@@ -26,6 +28,7 @@ from ddtrace.internal.sampling import is_single_span_sampled
 from ddtrace.internal.service import ServiceStatusError
 from ddtrace.internal.telemetry.constants import TELEMETRY_LOG_LEVEL
 from ddtrace.internal.telemetry.constants import TELEMETRY_NAMESPACE_TAG_TRACER
+from ddtrace.internal.telemetry.metrics import CountMetricHandle
 from ddtrace.internal.writer import TraceWriter
 from ddtrace.sampler import BaseSampler
 
@@ -39,6 +42,11 @@ log = get_logger(__name__)
 
 
 class TraceProcessor(metaclass=abc.ABCMeta):
+    # Processors that set this are applied to batches of finished traces with
+    # ``process_traces`` in the writer thread, right before encoding, when the
+    # writer supports it. They then run after all the other processors.
+    batched = False
+
     def __init__(self) -> None:
         """Default post initializer which logs the representation of the
         TraceProcessor at the ``logging.DEBUG`` level.
@@ -54,6 +62,23 @@ class TraceProcessor(metaclass=abc.ABCMeta):
         """
         pass
 
+    def process_traces(self, traces: List[List[Span]]) -> List[List[Span]]:
+        """Processes a batch of finished traces.
+
+        Traces for which ``process_trace`` returns ``None`` are removed from
+        the batch.
+        """
+        processed = []
+        for trace in traces:
+            try:
+                result = self.process_trace(trace)
+            except Exception:
+                log.error("error applying processor %r", self, exc_info=True)
+                result = trace
+            if result is not None:
+                processed.append(result)
+        return processed
+
 
 class SpanProcessor(metaclass=abc.ABCMeta):
     """A Processor is used to process spans as they are created and finished by a tracer."""
@@ -171,6 +196,87 @@ class TraceSamplingProcessor(TraceProcessor):
         return None
 
 
+class TailSamplingProcessor(TraceProcessor):
+    """Processor that drops the sampled traces that are neither erroneous nor slow.
+
+    A trace is kept when one of its spans has an error, when it was kept
+    manually, or when the duration of its root span is above the given
+    percentile of the ``window_size`` most recent root span durations. The
+    spans of dropped traces that were kept by single span sampling rules are
+    still sent. Partially flushed traces are always kept, since the decision
+    could not apply to all their chunks.
+
+    Dropped traces are still accounted for in the stats computed by the
+    tracer, as those are computed from the spans as they finish.
+    """
+
+    batched = True
+    # All traces are kept until this many root span durations are known
+    MIN_SAMPLES = 100
+    # The latency threshold of traces processed one at a time is only
+    # computed again after this many new durations.
+    UPDATE_INTERVAL = 100
+
+    def __init__(self, latency_percentile: float, window_size: int) -> None:
+        if not 0 <= latency_percentile <= 100:
+            raise ValueError("Tail sampling latency percentile must be between 0 and 100")
+        if window_size <= 0:
+            raise ValueError("Tail sampling window size must be positive")
+        self._latency_percentile = latency_percentile
+        self._durations: Deque[int] = deque(maxlen=window_size)
+        self._threshold: Optional[int] = None
+        self._new_durations = 0
+        super(TailSamplingProcessor, self).__init__()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._latency_percentile}, {self._durations.maxlen})"
+
+    def _add_duration(self, trace: List[Span]) -> None:
+        duration = trace[0].duration_ns
+        if duration is not None:
+            self._durations.append(duration)
+            self._new_durations += 1
+
+    def _update_threshold(self) -> None:
+        self._new_durations = 0
+        durations = sorted(self._durations)
+        if len(durations) < self.MIN_SAMPLES:
+            self._threshold = None
+            return
+        self._threshold = durations[min(int(len(durations) * self._latency_percentile / 100), len(durations) - 1)]
+
+    def _sample(self, trace: List[Span]) -> Optional[List[Span]]:
+        root = trace[0]
+        threshold = self._threshold
+        if threshold is None or (root.duration_ns or 0) >= threshold:
+            return trace
+        if root.get_metric("_dd.py.partial_flush") is not None:
+            return trace
+        priority = root.context.sampling_priority
+        if priority is not None and (priority <= 0 or priority >= USER_KEEP):
+            # Rejected traces are handled by the trace sampling processor
+            return trace
+        if any(span.error for span in trace):
+            return trace
+        return [span for span in trace if is_single_span_sampled(span)] or None
+
+    def process_trace(self, trace: List[Span]) -> Optional[List[Span]]:
+        if not trace:
+            return None
+        self._add_duration(trace)
+        if self._threshold is None or self._new_durations >= self.UPDATE_INTERVAL:
+            self._update_threshold()
+        return self._sample(trace)
+
+    def process_traces(self, traces: List[List[Span]]) -> List[List[Span]]:
+        traces = [trace for trace in traces if trace]
+        for trace in traces:
+            self._add_duration(trace)
+        # The threshold accounts for all the traces of the batch
+        self._update_threshold()
+        return [kept for kept in map(self._sample, traces) if kept is not None]
+
+
 class TopLevelSpanProcessor(SpanProcessor):
     """Processor marks spans as top level
 
@@ -195,8 +301,10 @@ class TopLevelSpanProcessor(SpanProcessor):
 class TraceTagsProcessor(TraceProcessor):
     """Processor that applies trace-level tags to the trace."""
 
-    def _set_git_metadata(self, chunk_root):
-        repository_url, commit_sha, main_package = gitmetadata.get_git_tags()
+    batched = True
+
+    def _set_git_metadata(self, chunk_root, git_tags=None):
+        repository_url, commit_sha, main_package = git_tags or gitmetadata.get_git_tags()
         if repository_url:
             chunk_root.set_tag_str("_dd.git.repository_url", repository_url)
         if commit_sha:
@@ -204,7 +312,7 @@ class TraceTagsProcessor(TraceProcessor):
         if main_package:
             chunk_root.set_tag_str("_dd.python_main_package", main_package)
 
-    def process_trace(self, trace: List[Span]) -> Optional[List[Span]]:
+    def process_trace(self, trace: List[Span], git_tags=None) -> Optional[List[Span]]:
         if not trace:
             return trace
 
@@ -214,7 +322,7 @@ class TraceTagsProcessor(TraceProcessor):
             return trace
 
         ctx._update_tags(chunk_root)
-        self._set_git_metadata(chunk_root)
+        self._set_git_metadata(chunk_root, git_tags)
         chunk_root.set_tag_str("language", "python")
         # for 128 bit trace ids
         if chunk_root.trace_id > MAX_UINT_64BITS:
@@ -226,6 +334,16 @@ class TraceTagsProcessor(TraceProcessor):
             del chunk_root._meta[LAST_DD_PARENT_ID_KEY]
         return trace
 
+    def process_traces(self, traces: List[List[Span]]) -> List[List[Span]]:
+        # The git metadata is the same for all the traces of the batch
+        git_tags = gitmetadata.get_git_tags()
+        for trace in traces:
+            try:
+                self.process_trace(trace, git_tags)
+            except Exception:
+                log.error("error applying processor %r", self, exc_info=True)
+        return traces
+
 
 class _Trace:
     def __init__(self, spans=None, num_finished=0):
@@ -233,6 +351,14 @@ class _Trace:
         self.num_finished = num_finished
 
 
+class _TraceShard:
+    """A subset of the traces of a SpanAggregator, with its own lock."""
+
+    def __init__(self):
+        self.traces: DefaultDict[int, _Trace] = defaultdict(lambda: _Trace())
+        self.lock: Union[RLock, Lock] = RLock() if config._span_aggregator_rlock else Lock()
+
+
 class SpanAggregator(SpanProcessor):
     """Processor that aggregates spans together by trace_id and writes the
     spans to the provided writer when:
@@ -241,6 +367,9 @@ class SpanAggregator(SpanProcessor):
           the trace_id have finished; or
         - A minimum threshold of spans (``partial_flush_min_spans``) have been
           finished in the collection and ``partial_flush_enabled`` is True.
+
+    Traces are spread over ``shards`` independent shards by trace_id, so that
+    threads working on different traces do not contend on the same lock.
     """
 
     def __init__(
@@ -249,20 +378,30 @@ class SpanAggregator(SpanProcessor):
         partial_flush_min_spans: int,
         trace_processors: Iterable[TraceProcessor],
         writer: TraceWriter,
+        shards: Optional[int] = None,
     ):
         self._partial_flush_enabled = partial_flush_enabled
         self._partial_flush_min_spans = partial_flush_min_spans
         self._trace_processors = trace_processors
         self._writer = writer
+        # Batched processors are left to the writer when it can apply them
+        # right before encoding, off the thread that finishes the trace.
+        set_batch_processors = getattr(writer, "_set_batch_processors", None)
+        self._writer_batches = (
+            set_batch_processors is not None
+            and set_batch_processors([tp for tp in trace_processors if getattr(tp, "batched", False)]) is True
+        )
 
-        self._traces: DefaultDict[int, _Trace] = defaultdict(lambda: _Trace())
-        self._lock: Union[RLock, Lock] = RLock() if config._span_aggregator_rlock else Lock()
-
-        # Tracks the number of spans created and tags each count with the api that was used
+        if shards is None:
+            shards = config._span_aggregator_shards
+        if shards <= 0:
+            raise ValueError("SpanAggregator shards must be positive")
+        self._shards: List[_TraceShard] = [_TraceShard() for _ in range(shards)]
+        # Telemetry handles counting the spans created and finished, by the api that was used
         # ex: otel api, opentracing api, datadog api
-        self._span_metrics: Dict[str, DefaultDict] = {
-            "spans_created": defaultdict(int),
-            "spans_finished": defaultdict(int),
+        self._span_count_handles: Dict[str, Dict[str, CountMetricHandle]] = {
+            "spans_created": {},
+            "spans_finished": {},
         }
         super(SpanAggregator, self).__init__()
 
@@ -275,78 +414,86 @@ class SpanAggregator(SpanProcessor):
             f"{self._writer})"
         )
 
+    def _shard(self, trace_id: int) -> _TraceShard:
+        return self._shards[trace_id % len(self._shards)]
+
     def on_span_start(self, span: Span) -> None:
-        with self._lock:
-            trace = self._traces[span.trace_id]
+        shard = self._shard(span.trace_id)
+        with shard.lock:
+            trace = shard.traces[span.trace_id]
             trace.spans.append(span)
-            self._span_metrics["spans_created"][span._span_api] += 1
-            self._queue_span_count_metrics("spans_created", "integration_name")
+        if config._telemetry_enabled:
+            self._span_count_handle("spans_created", span._span_api).add()
 
     def on_span_finish(self, span: Span) -> None:
-        with self._lock:
-            self._span_metrics["spans_finished"][span._span_api] += 1
-
+        if config._telemetry_enabled:
+            self._span_count_handle("spans_finished", span._span_api).add()
+        shard = self._shard(span.trace_id)
+        with shard.lock:
             # Calling finish on a span that we did not see the start for
             # DEV: This can occur if the SpanAggregator is recreated while there is a span in progress
             #      e.g. `tracer.configure()` is called after starting a span
-            if span.trace_id not in self._traces:
+            if span.trace_id not in shard.traces:
                 log_msg = "finished span not connected to a trace"
                 telemetry.telemetry_writer.add_log(TELEMETRY_LOG_LEVEL.ERROR, log_msg)
                 log.debug("%s: %s", log_msg, span)
                 return
 
-            trace = self._traces[span.trace_id]
+            trace = shard.traces[span.trace_id]
             trace.num_finished += 1
             should_partial_flush = self._partial_flush_enabled and trace.num_finished >= self._partial_flush_min_spans
-            if trace.num_finished == len(trace.spans) or should_partial_flush:
-                trace_spans = trace.spans
-                trace.spans = []
-                if trace.num_finished < len(trace_spans):
-                    finished = []
-                    for s in trace_spans:
-                        if s.finished:
-                            finished.append(s)
-                        else:
-                            trace.spans.append(s)
-                else:
-                    finished = trace_spans
-
-                num_finished = len(finished)
-                trace.num_finished -= num_finished
-                if trace.num_finished != 0:
-                    log_msg = "unexpected finished span count"
-                    telemetry.telemetry_writer.add_log(TELEMETRY_LOG_LEVEL.ERROR, log_msg)
-                    log.debug("%s (%s) for span %s", log_msg, num_finished, span)
-                    trace.num_finished = 0
-
-                # If we have removed all spans from this trace, then delete the trace from the traces dict
-                if len(trace.spans) == 0:
-                    del self._traces[span.trace_id]
-
-                # No spans to process, return early
-                if not finished:
+            if trace.num_finished != len(trace.spans) and not should_partial_flush:
+                log.debug("trace %d has %d spans, %d finished", span.trace_id, len(trace.spans), trace.num_finished)
+                return None
+
+            trace_spans = trace.spans
+            trace.spans = []
+            if trace.num_finished < len(trace_spans):
+                finished = []
+                for s in trace_spans:
+                    if s.finished:
+                        finished.append(s)
+                    else:
+                        trace.spans.append(s)
+            else:
+                finished = trace_spans
+
+            num_finished = len(finished)
+            trace.num_finished -= num_finished
+            if trace.num_finished != 0:
+                log_msg = "unexpected finished span count"
+                telemetry.telemetry_writer.add_log(TELEMETRY_LOG_LEVEL.ERROR, log_msg)
+                log.debug("%s (%s) for span %s", log_msg, num_finished, span)
+                trace.num_finished = 0
+
+            # If we have removed all spans from this trace, then delete the trace from the traces dict
+            if len(trace.spans) == 0:
+                del shard.traces[span.trace_id]
+
+        # The finished spans are no longer reachable from the shard, so they
+        # are processed and written without holding its lock.
+
+        # No spans to process, return early
+        if not finished:
+            return
+
+        # Set partial flush tag on the first span
+        if should_partial_flush:
+            log.debug("Partially flushing %d spans for trace %d", num_finished, span.trace_id)
+            finished[0].set_metric("_dd.py.partial_flush", num_finished)
+
+        spans: Optional[List[Span]] = finished
+        for tp in self._trace_processors:
+            if self._writer_batches and getattr(tp, "batched", False):
+                continue
+            try:
+                if spans is None:
                     return
+                spans = tp.process_trace(spans)
+            except Exception:
+                log.error("error applying processor %r", tp, exc_info=True)
 
-                # Set partial flush tag on the first span
-                if should_partial_flush:
-                    log.debug("Partially flushing %d spans for trace %d", num_finished, span.trace_id)
-                    finished[0].set_metric("_dd.py.partial_flush", num_finished)
-
-                spans: Optional[List[Span]] = finished
-                for tp in self._trace_processors:
-                    try:
-                        if spans is None:
-                            return
-                        spans = tp.process_trace(spans)
-                    except Exception:
-                        log.error("error applying processor %r", tp, exc_info=True)
-
-                self._queue_span_count_metrics("spans_finished", "integration_name")
-                self._writer.write(spans)
-                return
-
-            log.debug("trace %d has %d spans, %d finished", span.trace_id, len(trace.spans), trace.num_finished)
-            return None
+        self._writer.write(spans)
 
     def shutdown(self, timeout: Optional[float]) -> None:
         """
@@ -357,16 +504,11 @@ class SpanAggregator(SpanProcessor):
             before exiting or :obj:`None` to block until flushing has successfully completed (default: :obj:`None`)
         :type timeout: :obj:`int` | :obj:`float` | :obj:`None`
         """
-        # on_span_start queue span created counts in batches of 100. This ensures all remaining counts are sent
-        # before the tracer is shutdown.
-        self._queue_span_count_metrics("spans_created", "integration_name", 1)
-        # on_span_finish(...) queues span finish metrics in batches of 100.
-        # This ensures all remaining counts are sent before the tracer is shutdown.
-        self._queue_span_count_metrics("spans_finished", "integration_name", 1)
         # Log a warning if the tracer is shutdown before spans are finished
         unfinished_spans = [
             f"trace_id={s.trace_id} parent_id={s.parent_id} span_id={s.span_id} name={s.name} resource={s.resource} started={s.start} sampling_priority={s.context.sampling_priority}"  # noqa: E501
-            for t in self._traces.values()
+            for shard in self._shards
+            for t in shard.traces.values()
             for s in t.spans
             if not s.finished
         ]
@@ -383,13 +525,11 @@ class SpanAggregator(SpanProcessor):
             # It's possible the writer never got started in the first place :(
             pass
 
-    def _queue_span_count_metrics(self, metric_name: str, tag_name: str, min_count: int = 100) -> None:
-        """Queues a telemetry count metric for span created and span finished"""
-        # perf: telemetry_metrics_writer.add_count_metric(...) is an expensive operation.
-        # We should avoid calling this method on every invocation of span finish and span start.
-        if config._telemetry_enabled and sum(self._span_metrics[metric_name].values()) >= min_count:
-            for tag_value, count in self._span_metrics[metric_name].items():
-                telemetry.telemetry_writer.add_count_metric(
-                    TELEMETRY_NAMESPACE_TAG_TRACER, metric_name, count, tags=((tag_name, tag_value),)
-                )
-            self._span_metrics[metric_name] = defaultdict(int)
+    def _span_count_handle(self, metric_name: str, span_api: str) -> CountMetricHandle:
+        handles = self._span_count_handles[metric_name]
+        handle = handles.get(span_api)
+        if handle is None:
+            handle = handles[span_api] = telemetry.telemetry_writer.count_metric_handle(
+                TELEMETRY_NAMESPACE_TAG_TRACER, metric_name, tags=(("integration_name", span_api),)
+            )
+        return handle
@@ -58,6 +58,16 @@ from ddtrace.vendor.debtcollector import deprecate
 
 _NUMERIC_TAGS = (_ANALYTICS_SAMPLE_RATE_KEY,)
 
+# Tag keys with these prefixes are often built at runtime (e.g. from header
+# names), so they are interned to share a single copy across all the spans.
+_INTERNED_TAG_KEY_PREFIXES = ("component", "span.kind", "http.", "db.")
+
+
+def _intern_tag_key(key: str) -> str:
+    if type(key) is str and key.startswith(_INTERNED_TAG_KEY_PREFIXES):
+        return sys.intern(key)
+    return key
+
 
 class SpanEvent:
     __slots__ = ["name", "attributes", "time_unix_nano"]
@@ -181,7 +191,9 @@ class Span(object):
         self.error = 0
         self._metrics: _MetricDictType = {}
 
-        self._meta_struct: Dict[str, Dict[str, Any]] = {}
+        # Struct tags and events are rare, so their containers are only
+        # created when the first one is added.
+        self._meta_struct: Optional[Dict[str, Dict[str, Any]]] = None
 
         self.start_ns: int = time_ns() if start is None else int(start * 1e9)
         self.duration_ns: Optional[int] = None
@@ -203,7 +215,7 @@ class Span(object):
             for new_link in links:
                 self._set_link_or_append_pointer(new_link)
 
-        self._events: List[SpanEvent] = []
+        self._events: Optional[List[SpanEvent]] = None
         self._parent: Optional["Span"] = None
         self._ignored_exceptions: Optional[List[Type[Exception]]] = None
         self._local_root_value: Optional["Span"] = None  # None means this is the root span.
@@ -410,7 +422,7 @@ class Span(object):
             return
 
         try:
-            self._meta[key] = str(value)
+            self._meta[_intern_tag_key(key)] = str(value)
             if key in self._metrics:
                 del self._metrics[key]
         except Exception:
@@ -421,10 +433,14 @@ class Span(object):
         Set a tag key/value pair on the span meta_struct
         Currently it will only be exported with V4 encoding
         """
+        if self._meta_struct is None:
+            self._meta_struct = {}
         self._meta_struct[key] = value
 
     def get_struct_tag(self, key: str) -> Optional[Dict[str, Any]]:
         """Return the given struct or None if it doesn't exist."""
+        if self._meta_struct is None:
+            return None
         return self._meta_struct.get(key, None)
 
     def set_tag_str(self, key: _TagNameType, value: Text) -> None:
@@ -433,7 +449,7 @@ class Span(object):
         U+FFFD.
         """
         try:
-            self._meta[key] = ensure_text(value, errors="replace")
+            self._meta[_intern_tag_key(key)] = ensure_text(value, errors="replace")
         except Exception as e:
             if config._raise:
                 raise e
@@ -483,7 +499,7 @@ class Span(object):
 
         if key in self._meta:
             del self._meta[key]
-        self._metrics[key] = value
+        self._metrics[_intern_tag_key(key)] = value
 
     def set_metrics(self, metrics: _MetricDictType) -> None:
         """Set a dictionary of metrics on the given span. Keys must be
@@ -501,6 +517,8 @@ class Span(object):
         self, name: str, attributes: Optional[Dict[str, str]] = None, timestamp: Optional[int] = None
     ) -> None:
         """Add an event to the span."""
+        if self._events is None:
+            self._events = []
         self._events.append(SpanEvent(name, attributes, timestamp))
 
     def get_metrics(self) -> _MetricDictType:
@@ -569,7 +587,7 @@ class Span(object):
             ("tags", dict(sorted(self._meta.items()))),
             ("metrics", dict(sorted(self._metrics.items()))),
             ("links", ", ".join([str(link) for link in self._links])),
-            ("events", ", ".join([str(e) for e in self._events])),
+            ("events", ", ".join([str(e) for e in self._events or ()])),
         ]
         return " ".join(
             # use a large column width to keep pprint output on one line
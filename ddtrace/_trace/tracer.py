@@ -20,6 +20,7 @@ from ddtrace import config
 from ddtrace._trace.context import Context
 from ddtrace._trace.processor import SpanAggregator
 from ddtrace._trace.processor import SpanProcessor
+from ddtrace._trace.processor import TailSamplingProcessor
 from ddtrace._trace.processor import TopLevelSpanProcessor
 from ddtrace._trace.processor import TraceProcessor
 from ddtrace._trace.processor import TraceSamplingProcessor
@@ -125,6 +126,15 @@ def _default_span_processors_factory(
         TraceSamplingProcessor(compute_stats_enabled, trace_sampler, single_span_sampling_rules, apm_opt_out),
         TraceTagsProcessor(),
     ]
+    if config._trace_tail_sampling_enabled:
+        if compute_stats_enabled:
+            trace_processors.append(
+                TailSamplingProcessor(
+                    config._trace_tail_sampling_latency_percentile, config._trace_tail_sampling_window_size
+                )
+            )
+        else:
+            log.warning("Tail sampling requires trace stats to be computed by the tracer, it is disabled")
     trace_processors += trace_filters
 
     span_processors: List[SpanProcessor] = []
@@ -6,7 +6,7 @@ from typing import Text
 
 from ddtrace import tracer
 from ddtrace.internal.logger import get_logger
-from ddtrace.internal.utils.cache import LFUCache
+from ddtrace.internal.utils.cache import S3FIFOCache
 
 from ..._deduplications import deduplication
 from .._iast_request_context import get_iast_reporter
@@ -46,7 +46,7 @@ def _check_positions_contained(needle, container):
 
 class VulnerabilityBase(Operation):
     vulnerability_type = ""
-    _redacted_report_cache = LFUCache()
+    _redacted_report_cache = S3FIFOCache()
 
     @classmethod
     def _reset_cache_for_testing(cls):
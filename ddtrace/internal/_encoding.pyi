@@ -1,4 +1,5 @@
 from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Union
@@ -24,6 +25,7 @@ class BufferedEncoder(object):
     def __len__(self) -> int: ...
     def put(self, item: Any) -> None: ...
     def encode(self) -> Tuple[Optional[bytes], int]: ...
+    def encode_buffer(self) -> Tuple[Optional[memoryview], int]: ...
     @property
     def size(self) -> int: ...
 
@@ -36,7 +38,12 @@ class MsgpackEncoderBase(BufferedEncoder):
     def get_bytes(self) -> bytes: ...
     def _decode(self, data: Union[str, bytes]) -> Any: ...
 
-class MsgpackEncoderV04(MsgpackEncoderBase): ...
-class MsgpackEncoderV05(MsgpackEncoderBase): ...
+class MsgpackEncoderV04(MsgpackEncoderBase):
+    native_span_events: bool
+
+class MsgpackEncoderV05(MsgpackEncoderBase):
+    warm_strings: int
+    @property
+    def string_table_stats(self) -> Dict[str, int]: ...
 
 def packb(o: Any, **kwargs) -> bytes: ...
@@ -1,6 +1,7 @@
 from cpython cimport *
 from cpython.bytearray cimport PyByteArray_CheckExact
 from libc cimport stdint
+from libc.string cimport memcpy
 from libc.string cimport strlen
 
 from json import dumps as json_dumps
@@ -27,6 +28,7 @@ from .constants import MAX_UINT_64BITS
 
 DEF MSGPACK_ARRAY_LENGTH_PREFIX_SIZE = 5
 DEF MSGPACK_STRING_TABLE_LENGTH_PREFIX_SIZE = 6
+DEF MSGPACK_INITIAL_BUFFER_SIZE = 1024 * 1024
 
 
 cdef extern from "Python.h":
@@ -58,6 +60,8 @@ cdef extern from "pack.h":
 
 
 cdef long long ITEM_LIMIT = (2**32)-1
+# The number of payloads after which the warm strings of a string table are ranked again
+cdef int WARM_STRINGS_UPDATE_INTERVAL = 64
 
 
 cdef inline int PyBytesLike_CheckExact(object o):
@@ -159,6 +163,57 @@ cdef inline int pack_text(msgpack_packer *pk, object text) except? -1:
     raise TypeError("Unhandled text type: %r" % type(text))
 
 
+cdef class EncodedPayload(object):
+    """An encoded payload that owns the buffer it was encoded in.
+
+    The payload is exposed through the buffer protocol, so that it can be
+    sent without copying it out of the buffer. The buffer is freed as soon as
+    the last view of the payload is released.
+    """
+    cdef char *_buf
+    cdef Py_ssize_t _offset
+    cdef Py_ssize_t _length
+
+    def __dealloc__(self):
+        PyMem_Free(self._buf)
+        self._buf = NULL
+
+    def __len__(self):
+        return self._length
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        PyBuffer_FillInfo(buffer, self, self._buf + self._offset, self._length, 1, flags)
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        pass
+
+
+cdef EncodedPayload detach_buffer(msgpack_packer *pk, size_t offset, size_t keep, size_t buf_size):
+    """Hand the buffer of a packer, from ``offset``, off to a new payload.
+
+    The packer gets a new buffer of ``buf_size`` bytes, which starts with a
+    copy of the first ``keep`` bytes of the previous one.
+    """
+    cdef EncodedPayload payload
+    cdef char *buf
+
+    if buf_size < keep:
+        buf_size = keep
+    buf = <char*> PyMem_Malloc(buf_size)
+    if buf == NULL:
+        raise MemoryError("Unable to allocate internal buffer.")
+    memcpy(buf, pk.buf, keep)
+
+    payload = EncodedPayload.__new__(EncodedPayload)
+    payload._buf = pk.buf
+    payload._offset = offset
+    payload._length = pk.length - offset
+
+    pk.buf = buf
+    pk.buf_size = buf_size
+    return payload
+
+
 cdef class StringTable(object):
     cdef dict _table
     cdef stdint.uint32_t _next_id
@@ -230,6 +285,20 @@ cdef class MsgpackStringTable(StringTable):
     cdef stdint.uint32_t _sp_id
     cdef object _lock
     cdef size_t _reset_size
+    # Warm start: the most frequently used strings are indexed again right
+    # after every reset, so that they are not hashed and packed once per
+    # payload. They are packed once, at the start of the buffer, and are
+    # restored by resetting the buffer length to the end of the warm region.
+    cdef int _warm_size
+    cdef dict _warm_freq
+    cdef dict _warm_table
+    cdef list _warm_strings
+    cdef stdint.uint32_t _warm_next_id
+    cdef size_t _warm_length
+    cdef stdint.uint32_t *_warm_counts
+    cdef stdint.uint64_t _resets
+    cdef stdint.uint64_t _lookups
+    cdef stdint.uint64_t _warm_hits
 
     def __init__(self, max_size):
         self.pk.buf_size = min(max_size, 1 << 20)
@@ -246,9 +315,82 @@ cdef class MsgpackStringTable(StringTable):
         self.index(ORIGIN_KEY)
         self._reset_size = self.pk.length
 
+        self._warm_size = 0
+        self._warm_freq = {}
+        self._warm_table = None
+        self._warm_strings = []
+        self._warm_next_id = self._next_id
+        self._warm_length = self._reset_size
+        self._warm_counts = NULL
+        self._resets = 0
+        self._lookups = 0
+        self._warm_hits = 0
+
     def __dealloc__(self):
         PyMem_Free(self.pk.buf)
         self.pk.buf = NULL
+        PyMem_Free(self._warm_counts)
+        self._warm_counts = NULL
+
+    cdef stdint.uint32_t _index(self, object string) except? -1:
+        cdef stdint.uint32_t _id
+
+        _id = StringTable._index(self, string)
+        if self._warm_size > 0:
+            self._lookups += 1
+            if 1 < _id < self._warm_next_id:
+                self._warm_hits += 1
+                self._warm_counts[_id] += 1
+        return _id
+
+    cdef set_warm_size(self, int warm_size):
+        cdef stdint.uint32_t *counts
+
+        with self._lock:
+            if warm_size < 0:
+                raise ValueError("The number of warm strings cannot be negative")
+            # Warm strings take the ids that follow the empty string and the origin key
+            counts = <stdint.uint32_t *> PyMem_Calloc(warm_size + 2, sizeof(stdint.uint32_t))
+            if counts == NULL:
+                raise MemoryError("Unable to allocate warm string counters.")
+            # The current payload might reference the previous warm strings,
+            # so they are only dropped at the next reset.
+            PyMem_Free(self._warm_counts)
+            self._warm_counts = counts
+            self._warm_size = warm_size
+            self._warm_freq = {}
+            self._warm_strings = []
+            self._warm_table = None
+            self._warm_next_id = 2
+            self._resets = 0
+            self._lookups = 0
+            self._warm_hits = 0
+
+    cdef update_warm_strings(self):
+        cdef dict freq = self._warm_freq
+        cdef stdint.uint32_t _id
+
+        # Count the windows in which every string was used: the warm strings
+        # that were looked up during the window and the strings that were
+        # added to its last payload.
+        for _id, string in enumerate(self._warm_strings, 2):
+            if self._warm_counts[_id] > 0:
+                freq[string] = freq.get(string, 0) + 1
+            self._warm_counts[_id] = 0
+        for string, _id in self._table.items():
+            if _id >= self._warm_next_id:
+                freq[string] = freq.get(string, 0) + 1
+
+        ranked = sorted(freq, key=freq.get, reverse=True)
+        # Bound the bookkeeping by evicting the least frequently used strings.
+        if len(ranked) > 4 * self._warm_size:
+            self._warm_freq = freq = {k: freq[k] for k in ranked[: 2 * self._warm_size]}
+
+        # Strings seen in a single window are most likely unique values.
+        warm_strings = [k for k in ranked[: self._warm_size] if freq[k] > 1]
+        if self._warm_table is None or set(warm_strings) != set(self._warm_strings):
+            self._warm_strings = warm_strings
+            self._warm_table = None
 
     cdef insert(self, object string):
         cdef int ret
@@ -288,7 +430,8 @@ cdef class MsgpackStringTable(StringTable):
         #    return a 400 status code.
         self._table = {s: idx for s, idx in self._table.items() if idx < self._next_id}
 
-    cdef get_bytes(self):
+    cdef int _update_prefix(self):
+        """Update the table and root array size prefixes and return the start of the payload."""
         cdef int ret
         cdef stdint.uint32_t table_size
         cdef int offset
@@ -302,14 +445,21 @@ cdef class MsgpackStringTable(StringTable):
             self.pk.length = offset
             ret = msgpack_pack_array(&self.pk, table_size)
             if ret:
-                return None
+                return -1
             # Add root array size prefix
             self.pk.length = offset = offset - 1
             ret = msgpack_pack_array(&self.pk, 2)
             if ret:
-                return None
+                return -1
             self.pk.length = old_pos
+            return offset
 
+    cdef get_bytes(self):
+        cdef int offset
+        with self._lock:
+            offset = self._update_prefix()
+            if offset < 0:
+                return None
             return PyBytes_FromStringAndSize(self.pk.buf + offset, self.pk.length - offset)
 
     @property
@@ -331,6 +481,19 @@ cdef class MsgpackStringTable(StringTable):
                 raise RuntimeError("Failed to append raw bytes to msgpack string table")
 
     cdef reset(self):
+        if self._warm_size > 0:
+            if self._warm_table is None or self._resets % WARM_STRINGS_UPDATE_INTERVAL == 0:
+                self.update_warm_strings()
+            self._resets += 1
+            if self._warm_table is not None:
+                # The warm strings did not change: they are still packed at
+                # the start of the buffer, right after the origin key.
+                self._table = self._warm_table.copy()
+                self._next_id = self._warm_next_id
+                self.pk.length = self._warm_length
+                self._sp_len = 0
+                return
+
         StringTable.reset(self)
         assert self._next_id == 1
 
@@ -339,6 +502,26 @@ cdef class MsgpackStringTable(StringTable):
         self.pk.length = self._reset_size
         self._sp_len = 0
 
+        if self._warm_size > 0:
+            # Leave at least half of the table to the strings of the payload.
+            for i, string in enumerate(self._warm_strings):
+                if self.pk.length + len(string) > self.max_size // 2:
+                    self._warm_strings = self._warm_strings[:i]
+                    break
+                StringTable._index(self, string)
+            self._warm_table = self._table.copy()
+            self._warm_next_id = self._next_id
+            self._warm_length = self.pk.length
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                "lookups": self._lookups,
+                "warm_hits": self._warm_hits,
+                "warm_strings": len(self._warm_strings),
+            }
+
     cpdef flush(self):
         with self._lock:
             try:
@@ -346,6 +529,21 @@ cdef class MsgpackStringTable(StringTable):
             finally:
                 self.reset()
 
+    cpdef flush_buffer(self):
+        cdef int offset
+        cdef size_t keep
+        with self._lock:
+            try:
+                offset = self._update_prefix()
+                if offset < 0:
+                    return None
+                # The empty string, the origin key and the warm strings are
+                # kept at the start of the new buffer.
+                keep = self._warm_length if self._warm_size > 0 else self._reset_size
+                return detach_buffer(&self.pk, offset, keep, min(self.max_size, MSGPACK_INITIAL_BUFFER_SIZE))
+            finally:
+                self.reset()
+
 
 cdef class BufferedEncoder(object):
     content_type: str = None
@@ -367,6 +565,16 @@ cdef class BufferedEncoder(object):
     def encode(self):
         raise NotImplementedError()
 
+    def encode_buffer(self):
+        """Return a memoryview of the encoded payload and the number of traces in it.
+
+        Releasing the view frees the memory of the payload.
+        """
+        payload, count = self.encode()
+        if payload is None:
+            return None, 0
+        return memoryview(payload), count
+
 
 cdef class ListBufferedEncoder(BufferedEncoder):
     cdef list _buffer
@@ -421,7 +629,7 @@ cdef class MsgpackEncoderBase(BufferedEncoder):
     cdef stdint.uint32_t _count
 
     def __cinit__(self, size_t max_size, size_t max_item_size):
-        cdef int buf_size = 1024*1024
+        cdef int buf_size = MSGPACK_INITIAL_BUFFER_SIZE
         self.pk.buf = <char*> PyMem_Malloc(buf_size)
         if self.pk.buf == NULL:
             raise MemoryError("Unable to allocate internal buffer.")
@@ -456,6 +664,20 @@ cdef class MsgpackEncoderBase(BufferedEncoder):
 
             return self.flush()
 
+    def encode_buffer(self):
+        """Return a memoryview of the encoded payload and the number of traces in it.
+
+        The payload is not copied out of the encoder buffer: the encoder
+        switches to a new buffer instead. Releasing the view frees the memory
+        of the payload.
+        """
+        with self._lock:
+            if not self._count:
+                return None, 0
+
+            payload, count = self.flush_buffer()
+            return memoryview(payload), count
+
     cdef inline int _update_array_len(self):
         """Update traces array size prefix"""
         cdef int offset = MSGPACK_ARRAY_LENGTH_PREFIX_SIZE - array_prefix_size(self._count)
@@ -480,9 +702,10 @@ cdef class MsgpackEncoderBase(BufferedEncoder):
     cdef void * get_dd_origin_ref(self, str dd_origin):
         raise NotImplementedError()
 
-    cdef inline int _pack_trace(self, list trace) except? -1:
+    cdef inline int _pack_trace(self, list trace, size_t len_before) except? -1:
         cdef int ret
         cdef Py_ssize_t L
+        cdef Py_ssize_t n = 0
         cdef void * dd_origin = NULL
 
         L = len(trace)
@@ -506,6 +729,12 @@ cdef class MsgpackEncoderBase(BufferedEncoder):
             if ret != 0:
                 raise RuntimeError("couldn't pack span: {!r}".format(span))
 
+            # Stop as soon as the trace is known to be too large, so that the
+            # caller can split it without the cost of encoding all its spans.
+            n += 1
+            if self.pk.length - len_before > self.max_item_size:
+                raise BufferItemTooLarge(self.pk.length - len_before, n)
+
         return ret
 
     cpdef put(self, list trace):
@@ -516,7 +745,7 @@ cdef class MsgpackEncoderBase(BufferedEncoder):
             len_before = self.pk.length
             size_before = self.size
             try:
-                ret = self._pack_trace(trace)
+                ret = self._pack_trace(trace, len_before)
                 if ret:  # should not happen.
                     raise RuntimeError("internal error")
 
@@ -548,11 +777,18 @@ cdef class MsgpackEncoderBase(BufferedEncoder):
     cpdef flush(self):
         raise NotImplementedError()
 
+    cpdef flush_buffer(self):
+        raise NotImplementedError()
+
     cdef int pack_span(self, object span, void *dd_origin) except? -1:
         raise NotImplementedError()
 
 
 cdef class MsgpackEncoderV04(MsgpackEncoderBase):
+    # Whether span events are encoded as a top level span field, for agents
+    # that support it, instead of a JSON string in the meta tags.
+    cdef public bint native_span_events
+
     cpdef flush(self):
         with self._lock:
             try:
@@ -560,6 +796,13 @@ cdef class MsgpackEncoderV04(MsgpackEncoderBase):
             finally:
                 self._reset_buffer()
 
+    cpdef flush_buffer(self):
+        with self._lock:
+            try:
+                return detach_buffer(&self.pk, self._update_array_len(), 0, MSGPACK_INITIAL_BUFFER_SIZE), len(self)
+            finally:
+                self._reset_buffer()
+
     cdef void * get_dd_origin_ref(self, str dd_origin):
         return string_to_buff(dd_origin)
 
@@ -616,6 +859,96 @@ cdef class MsgpackEncoderV04(MsgpackEncoderBase):
                     return ret
         return 0
 
+    cdef inline int _pack_attribute_value(self, object value, bint allow_array) except? -1:
+        # Span event attribute values are encoded as maps with the type of
+        # the value: 0 for strings, 1 for booleans, 2 for integers, 3 for
+        # floats and 4 for arrays of any of these.
+        cdef int ret
+
+        ret = msgpack_pack_map(&self.pk, 2)
+        if ret != 0:
+            return ret
+        ret = pack_bytes(&self.pk, <char *> b"type", 4)
+        if ret != 0:
+            return ret
+
+        if isinstance(value, bool):
+            ret = msgpack_pack_long(&self.pk, 1)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"bool_value", 10)
+            if ret == 0:
+                ret = msgpack_pack_true(&self.pk) if value else msgpack_pack_false(&self.pk)
+        elif PyLong_Check(value):
+            ret = msgpack_pack_long(&self.pk, 2)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"int_value", 9)
+            if ret == 0:
+                ret = pack_number(&self.pk, value)
+        elif PyFloat_Check(value):
+            ret = msgpack_pack_long(&self.pk, 3)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"double_value", 12)
+            if ret == 0:
+                ret = pack_number(&self.pk, value)
+        elif allow_array and isinstance(value, (list, tuple)):
+            ret = msgpack_pack_long(&self.pk, 4)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"array_value", 11)
+            if ret == 0:
+                ret = msgpack_pack_map(&self.pk, 1)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"values", 6)
+            if ret == 0:
+                ret = msgpack_pack_array(&self.pk, len(value))
+            for item in value:
+                if ret != 0:
+                    break
+                ret = self._pack_attribute_value(item, False)
+        else:
+            ret = msgpack_pack_long(&self.pk, 0)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"string_value", 12)
+            if ret == 0:
+                ret = pack_text(&self.pk, value if PyUnicode_Check(value) else str(value))
+        return ret
+
+    cdef inline int _pack_span_events(self, list span_events) except? -1:
+        cdef int ret
+
+        ret = msgpack_pack_array(&self.pk, len(span_events))
+        if ret != 0:
+            return ret
+
+        for event in span_events:
+            attributes = event.attributes
+            ret = msgpack_pack_map(&self.pk, 3 if attributes else 2)
+            if ret != 0:
+                return ret
+
+            ret = pack_bytes(&self.pk, <char *> b"name", 4)
+            if ret == 0:
+                ret = pack_text(&self.pk, event.name)
+            if ret == 0:
+                ret = pack_bytes(&self.pk, <char *> b"time_unix_nano", 14)
+            if ret == 0:
+                ret = pack_number(&self.pk, event.time_unix_nano)
+            if ret != 0:
+                return ret
+
+            if attributes:
+                ret = pack_bytes(&self.pk, <char *> b"attributes", 10)
+                if ret == 0:
+                    ret = msgpack_pack_map(&self.pk, len(attributes))
+                if ret != 0:
+                    return ret
+                for k, v in attributes.items():
+                    ret = pack_text(&self.pk, k)
+                    if ret == 0:
+                        ret = self._pack_attribute_value(v, True)
+                    if ret != 0:
+                        return ret
+        return 0
+
     cdef inline int _pack_meta(self, object meta, char *dd_origin, str span_events) except? -1:
         cdef Py_ssize_t L
         cdef int ret
@@ -683,14 +1016,17 @@ cdef class MsgpackEncoderV04(MsgpackEncoderBase):
 
         has_error = <bint> (span.error != 0)
         has_span_type = <bint> (span.span_type is not None)
-        has_span_events = <bint> (len(span._events) > 0)
-        has_meta = <bint> (len(span._meta) > 0 or dd_origin is not NULL or has_span_events)
+        has_span_events = <bint> (span._events is not None and len(span._events) > 0)
+        has_native_span_events = <bint> (has_span_events and self.native_span_events)
+        has_json_span_events = <bint> (has_span_events and not self.native_span_events)
+        has_meta = <bint> (len(span._meta) > 0 or dd_origin is not NULL or has_json_span_events)
         has_metrics = <bint> (len(span._metrics) > 0)
         has_parent_id = <bint> (span.parent_id is not None)
         has_links = <bint> (len(span._links) > 0)
-        has_meta_struct = <bint> (len(span._meta_struct) > 0)
+        has_meta_struct = <bint> (span._meta_struct is not None and len(span._meta_struct) > 0)
 
         L = 7 + has_span_type + has_meta + has_metrics + has_error + has_parent_id + has_links + has_meta_struct
+        L += has_native_span_events
 
         ret = msgpack_pack_map(&self.pk, L)
 
@@ -776,13 +1112,21 @@ cdef class MsgpackEncoderV04(MsgpackEncoderBase):
                 if ret != 0:
                     return ret
 
+            if has_native_span_events:
+                ret = pack_bytes(&self.pk, <char *> b"span_events", 11)
+                if ret != 0:
+                    return ret
+                ret = self._pack_span_events(span._events)
+                if ret != 0:
+                    return ret
+
             if has_meta:
                 ret = pack_bytes(&self.pk, <char *> b"meta", 4)
                 if ret != 0:
                     return ret
 
                 span_events = ""
-                if has_span_events:
+                if has_json_span_events:
                     span_events = json_dumps([vars(event)()  for event in span._events])
                 ret = self._pack_meta(span._meta, <char *> dd_origin, span_events)
                 if ret != 0:
@@ -835,12 +1179,37 @@ cdef class MsgpackEncoderV05(MsgpackEncoderBase):
             finally:
                 self._reset_buffer()
 
+    cpdef flush_buffer(self):
+        with self._lock:
+            try:
+                self._st.append_raw(
+                    PyLong_FromLong(<long> self.get_buffer()),
+                    <Py_ssize_t> super(MsgpackEncoderV05, self).size,
+                )
+                return self._st.flush_buffer(), len(self)
+            finally:
+                self._reset_buffer()
+
     @property
     def size(self):
         """Return the size in bytes of the encoder buffer."""
         with self._lock:
             return self._st.size + super(MsgpackEncoderV05, self).size
 
+    @property
+    def warm_strings(self):
+        """The number of frequently used strings kept in the string table across payloads."""
+        return self._st._warm_size
+
+    @warm_strings.setter
+    def warm_strings(self, int value):
+        self._st.set_warm_size(value)
+
+    @property
+    def string_table_stats(self):
+        """Return the number of string lookups and how many of them hit a warm string."""
+        return self._st.stats
+
     cpdef put(self, list trace):
         with self._lock:
             try:
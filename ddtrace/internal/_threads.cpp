@@ -250,9 +250,12 @@ PeriodicThread_start(PeriodicThread* self, PyObject* args)
         self->_started->set();
 
         bool error = false;
-        auto interval = std::chrono::milliseconds((long long)(self->interval * 1000));
 
         while (!self->_stopping) {
+            // Read the interval on every iteration so that it can be changed
+            // while the thread is running.
+            auto interval = std::chrono::milliseconds((long long)(self->interval * 1000));
+
             {
                 AllowThreads _;
 
@@ -319,6 +322,23 @@ PeriodicThread_awake(PeriodicThread* self, PyObject* args)
     Py_RETURN_NONE;
 }
 
+// ----------------------------------------------------------------------------
+static PyObject*
+PeriodicThread_wake(PeriodicThread* self, PyObject* args)
+{
+    if (self->_thread == nullptr) {
+        PyErr_SetString(PyExc_RuntimeError, "Thread not started");
+        return NULL;
+    }
+
+    // Unlike awake, do not wait for the thread to serve the request, so that
+    // the caller is not blocked while the thread is running the target.
+    if (!self->_after_fork)
+        self->_request->set();
+
+    Py_RETURN_NONE;
+}
+
 // ----------------------------------------------------------------------------
 static PyObject*
 PeriodicThread_stop(PeriodicThread* self, PyObject* args)
@@ -455,6 +475,7 @@ PeriodicThread_dealloc(PeriodicThread* self)
 static PyMethodDef PeriodicThread_methods[] = {
     { "start", (PyCFunction)PeriodicThread_start, METH_NOARGS, "Start the thread" },
     { "awake", (PyCFunction)PeriodicThread_awake, METH_NOARGS, "Awake the thread" },
+    { "wake", (PyCFunction)PeriodicThread_wake, METH_NOARGS, "Awake the thread without waiting" },
     { "stop", (PyCFunction)PeriodicThread_stop, METH_NOARGS, "Stop the thread" },
     { "join", (PyCFunction)PeriodicThread_join, METH_VARARGS | METH_KEYWORDS, "Join the thread" },
     /* Private */
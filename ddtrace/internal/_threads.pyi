@@ -16,6 +16,7 @@ class PeriodicThread:
     def stop(self) -> None: ...
     def join(self, timeout: t.Optional[float] = None) -> None: ...
     def awake(self) -> None: ...
+    def wake(self) -> None: ...
     def _atexit(self) -> None: ...
     def _after_fork(self) -> None: ...
 
@@ -0,0 +1,170 @@
+"""
+A fork-aware pool of keep-alive HTTP connections shared by the components
+that upload data to the same intake (traces, stats, data streams, telemetry).
+"""
+from collections import defaultdict
+import threading
+import typing as t
+
+from ddtrace.internal import forksafe
+from ddtrace.internal.compat import get_connection_response
+from ddtrace.internal.compat import httplib
+from ddtrace.internal.constants import _HTTPLIB_NO_TRACE_REQUEST
+from ddtrace.internal.constants import DEFAULT_TIMEOUT
+from ddtrace.internal.logger import get_logger
+from ddtrace.internal.utils.http import ConnectionType
+from ddtrace.internal.utils.http import Response
+from ddtrace.internal.utils.http import get_connection
+
+
+log = get_logger(__name__)
+
+# Errors that are raised when sending a request over a keep-alive connection
+# that has been closed by the peer while idle.
+_STALE_CONNECTION_ERRORS = (httplib.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+DEFAULT_MAX_IDLE_CONNECTIONS = 4
+DEFAULT_MAX_IN_FLIGHT_PER_ENDPOINT = 2
+
+
+class ConnectionPool(object):
+    """A pool of keep-alive connections to a single intake URL.
+
+    Up to ``max_in_flight`` requests can be in flight for each endpoint at the
+    same time, so that a slow response for one endpoint does not stall the
+    others. Idle connections are kept for reuse up to ``max_idle``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_idle: int = DEFAULT_MAX_IDLE_CONNECTIONS,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT_PER_ENDPOINT,
+        endpoint_limits: t.Optional[t.Dict[str, int]] = None,
+    ) -> None:
+        if max_in_flight <= 0:
+            raise ValueError("Connection pool max in flight requests must be positive")
+        self.url = url
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_in_flight = max_in_flight
+        self._endpoint_limits = endpoint_limits or {}
+        self._metrics: t.Dict[str, int] = defaultdict(int)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._idle: t.List[ConnectionType] = []
+        self._slots: t.Dict[str, threading.BoundedSemaphore] = {}
+
+    def _after_fork(self) -> None:
+        # The sockets of the idle connections are shared with the parent
+        # process so they must not be used by the child.
+        self._reset()
+        self._metrics.clear()
+
+    def _slot(self, endpoint: str) -> threading.BoundedSemaphore:
+        try:
+            return self._slots[endpoint]
+        except KeyError:
+            with self._lock:
+                if endpoint not in self._slots:
+                    self._slots[endpoint] = threading.BoundedSemaphore(
+                        self._endpoint_limits.get(endpoint, self.max_in_flight)
+                    )
+                return self._slots[endpoint]
+
+    def _acquire(self) -> t.Tuple[ConnectionType, bool]:
+        with self._lock:
+            if self._idle:
+                self._metrics["reused"] += 1
+                return self._idle.pop(), True
+        self._metrics["created"] += 1
+        return get_connection(self.url, self.timeout), False
+
+    def _release(self, conn: ConnectionType) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        self._discard(conn)
+
+    def _discard(self, conn: ConnectionType) -> None:
+        self._metrics["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            log.debug("failed to close connection to %s", self.url, exc_info=True)
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        body: t.Optional[bytes] = None,
+        headers: t.Optional[t.Dict[str, str]] = None,
+        no_trace: bool = True,
+    ) -> Response:
+        """Send a request and return the response with its body read.
+
+        Blocks while the maximum number of requests for the endpoint are in
+        flight. Requests that fail because an idle connection went stale are
+        retried once on a new connection.
+        """
+        slot = self._slot(endpoint)
+        if not slot.acquire(blocking=False):
+            self._metrics["waited"] += 1
+            slot.acquire()
+        try:
+            while True:
+                conn, reused = self._acquire()
+                setattr(conn, _HTTPLIB_NO_TRACE_REQUEST, no_trace)
+                try:
+                    conn.request(method, endpoint, body, headers or {})
+                    response = Response.from_http_response(get_connection_response(conn))
+                except _STALE_CONNECTION_ERRORS:
+                    self._discard(conn)
+                    if not reused:
+                        raise
+                    log.debug("connection to %s went stale, retrying with a new one", self.url)
+                except Exception:
+                    self._discard(conn)
+                    raise
+                else:
+                    self._release(conn)
+                    return response
+        finally:
+            slot.release()
+
+    def close(self) -> None:
+        """Close all the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> t.Dict[str, int]:
+        """Return the connection reuse counters of the pool."""
+        return dict(self._metrics, idle=len(self._idle))
+
+
+_pools: t.Dict[t.Tuple[str, float], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(url: str, timeout: float = DEFAULT_TIMEOUT) -> ConnectionPool:
+    """Return the connection pool shared by all the clients of the given URL."""
+    key = (url, timeout)
+    try:
+        return _pools[key]
+    except KeyError:
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(url, timeout)
+            return _pools[key]
+
+
+@forksafe.register
+def _reset_pools() -> None:
+    for pool in _pools.values():
+        pool._after_fork()
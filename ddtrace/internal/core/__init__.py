@@ -101,7 +101,6 @@ like this::
 The names of these events follow the pattern ``context.[started|ended].<context_name>``.
 """
 
-from contextlib import AbstractContextManager
 import logging
 import sys
 import types
@@ -110,6 +109,7 @@ from typing import Any  # noqa:F401
 from typing import Dict  # noqa:F401
 from typing import List  # noqa:F401
 from typing import Optional  # noqa:F401
+from typing import Tuple  # noqa:F401
 from typing import Union  # noqa:F401
 
 from ddtrace.vendor.debtcollector import deprecate
@@ -120,6 +120,7 @@ from ._core import DDSketch  # noqa:F401
 from .event_hub import EventResultDict  # noqa:F401
 from .event_hub import dispatch
 from .event_hub import dispatch_with_results  # noqa:F401
+from .event_hub import event  # noqa:F401
 from .event_hub import has_listeners  # noqa:F401
 from .event_hub import on  # noqa:F401
 from .event_hub import reset as reset_listeners  # noqa:F401
@@ -142,6 +143,24 @@ SPAN_DEPRECATION_SUGGESTION = (
     "Please store contextual data on the ExecutionContext object using other kwargs and/or set_item()"
 )
 DEPRECATION_MEMO = set()
+_MISSING = object()
+
+# The handles of the started, start_span and ended events of each context identifier
+_CONTEXT_EVENTS: Dict[str, Tuple[event_hub.Event, event_hub.Event, event_hub.Event]] = {}
+
+
+def _context_events(identifier: str) -> Tuple[event_hub.Event, event_hub.Event, event_hub.Event]:
+    try:
+        return _CONTEXT_EVENTS[identifier]
+    except KeyError:
+        return _CONTEXT_EVENTS.setdefault(
+            identifier,
+            (
+                event_hub.event("context.started.%s" % identifier),
+                event_hub.event("context.started.start_span.%s" % identifier),
+                event_hub.event("context.ended.%s" % identifier),
+            ),
+        )
 
 
 def _deprecate_span_kwarg(span):
@@ -160,24 +179,51 @@ def _deprecate_span_kwarg(span):
         )
 
 
-class ExecutionContext(AbstractContextManager):
+class ExecutionContext(object):
+    __slots__ = (
+        "identifier",
+        "_data",
+        "_span",
+        "_suppress_exceptions",
+        "_parent",
+        "_inner_span",
+        "_token",
+        "_events",
+        "_has_children",
+        "_owners",
+    )
+
+    # Incremented whenever a key is added to or removed from a context that has children,
+    # which invalidates the owners of the keys looked up by these children
+    _owners_version = 0
+
     def __init__(
         self, identifier: str, parent: Optional["ExecutionContext"] = None, span: Optional["Span"] = None, **kwargs
     ) -> None:
         _deprecate_span_kwarg(span)
         self.identifier: str = identifier
-        self._data: Dict[str, Any] = {}
+        # DEV: kwargs is a new dict for each call, so it is used as the storage of the context
+        self._data: Dict[str, Any] = kwargs
         self._span: Optional["Span"] = span
-        self._suppress_exceptions: List[type] = []
-        self._data.update(kwargs)
+        self._suppress_exceptions: Optional[List[type]] = None
         self._parent: Optional["ExecutionContext"] = parent
         self._inner_span: Optional["Span"] = None
+        self._token: Optional[contextvars.Token["ExecutionContext"]] = None
+        self._events = _context_events(identifier)
+        self._has_children = False
+        # The ancestors that hold the keys looked up from this context, allocated on the first lookup
+        self._owners: Optional[Dict[str, Tuple["ExecutionContext", int]]] = None
+        if parent is not None:
+            parent._has_children = True
 
     def __enter__(self) -> "ExecutionContext":
         if self._span is None and "_CURRENT_CONTEXT" in globals():
-            self._token: contextvars.Token["ExecutionContext"] = _CURRENT_CONTEXT.set(self)
-        dispatch("context.started.%s" % self.identifier, (self,))
-        dispatch("context.started.start_span.%s" % self.identifier, (self,))
+            self._token = _CURRENT_CONTEXT.set(self)
+        started, start_span, _ = self._events
+        if started.listened:
+            dispatch(started, (self,))
+        if start_span.listened:
+            dispatch(start_span, (self,))
         return self
 
     def __repr__(self) -> str:
@@ -192,14 +238,18 @@ class ExecutionContext(AbstractContextManager):
         if self._parent is not None:
             raise ValueError("Cannot overwrite ExecutionContext parent")
         self._parent = value
+        value._has_children = True
+        self._owners = None
 
     def __exit__(
         self, exc_type: Optional[type], exc_value: Optional[BaseException], traceback: Optional[types.TracebackType]
     ) -> bool:
-        dispatch("context.ended.%s" % self.identifier, (self,))
+        ended = self._events[2]
+        if ended.listened:
+            dispatch(ended, (self,))
         if self._span is None:
             try:
-                if hasattr(self, "_token"):
+                if self._token is not None:
                     _CURRENT_CONTEXT.reset(self._token)
             except ValueError:
                 log.debug(
@@ -214,18 +264,38 @@ class ExecutionContext(AbstractContextManager):
         if id(self) in DEPRECATION_MEMO:
             DEPRECATION_MEMO.remove(id(self))
 
-        return (
-            True
-            if exc_type is None
-            else any(issubclass(exc_type, exc_type_) for exc_type_ in self._suppress_exceptions)
+        if exc_type is None:
+            return True
+        return self._suppress_exceptions is not None and any(
+            issubclass(exc_type, exc_type_) for exc_type_ in self._suppress_exceptions
         )
 
+    def _keys_changed(self) -> None:
+        if self._has_children:
+            ExecutionContext._owners_version += 1
+
     def get_item(self, data_key: str, default: Optional[Any] = None) -> Any:
         # NB mimic the behavior of `ddtrace.internal._context` by doing lazy inheritance
-        current: Optional[ExecutionContext] = self
+        data = self._data
+        if data_key in data:
+            return data[data_key]
+
+        # Keys like the pin are read many times per request from deeply nested contexts, so the
+        # ancestor holding them is remembered until a key is added or removed in an ancestor
+        owners = self._owners
+        version = ExecutionContext._owners_version
+        if owners is not None:
+            owner = owners.get(data_key)
+            if owner is not None and owner[1] == version:
+                return owner[0]._data.get(data_key, default)
+
+        current: Optional[ExecutionContext] = self._parent
         while current is not None:
             if data_key in current._data:
-                return current._data.get(data_key)
+                if owners is None:
+                    owners = self._owners = {}
+                owners[data_key] = (current, version)
+                return current._data[data_key]
             current = current.parent
         return default
 
@@ -242,7 +312,10 @@ class ExecutionContext(AbstractContextManager):
         return [self.get_item(key) for key in data_keys]
 
     def set_item(self, data_key: str, data_value: Optional[Any]) -> None:
-        self._data[data_key] = data_value
+        data = self._data
+        if self._has_children and data_key not in data:
+            ExecutionContext._owners_version += 1
+        data[data_key] = data_value
 
     def set_safe(self, data_key: str, data_value: Optional[Any]) -> None:
         if data_key in self._data:
@@ -259,11 +332,13 @@ class ExecutionContext(AbstractContextManager):
         while current is not None:
             if data_key in current._data:
                 del current._data[data_key]
+                current._keys_changed()
                 return
             current = current.parent
 
     def discard_local_item(self, data_key: str) -> None:
-        self._data.pop(data_key, None)
+        if self._data.pop(data_key, _MISSING) is not _MISSING:
+            self._keys_changed()
 
     def root(self):
         if self.identifier == ROOT_CONTEXT_ID:
@@ -283,7 +358,7 @@ class ExecutionContext(AbstractContextManager):
     def span(self, value: "Span") -> None:
         self._inner_span = value
         if "span_key" in self._data:
-            self._data[self._data["span_key"]] = value
+            self.set_item(self._data["span_key"], value)
 
 
 def __getattr__(name):
@@ -309,7 +384,11 @@ def context_with_data(identifier, parent=None, **kwargs):
 
 
 def add_suppress_exception(exc_type: type) -> None:
-    _CURRENT_CONTEXT.get()._suppress_exceptions.append(exc_type)
+    ctx = _CURRENT_CONTEXT.get()
+    if ctx._suppress_exceptions is None:
+        ctx._suppress_exceptions = [exc_type]
+    else:
+        ctx._suppress_exceptions.append(exc_type)
 
 
 def get_item(data_key: str, span: Optional["Span"] = None) -> Any:
@@ -1,6 +1,7 @@
 class DDSketch:
     def __init__(self): ...
     def add(self, value: float) -> None: ...
+    def merge(self, other: "DDSketch") -> None: ...
     def to_proto(self) -> bytes: ...
     @property
     def count(self) -> float: ...
@@ -3,15 +3,55 @@ import enum
 from typing import Any
 from typing import Callable
 from typing import Dict
-from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import Union
 
 from ddtrace import config
 
 
-_listeners: Dict[str, Dict[Any, Callable[..., Any]]] = {}
-_all_listeners: List[Callable[[str, Tuple[Any, ...]], None]] = []
+class Event(object):
+    """An interned event id, with the listeners registered for it.
+
+    The listeners are compiled into tuples whenever they change, so that
+    dispatching an event only has to check a single attribute when nobody
+    listens to it. Use :func:`event` to get the handle of an event id once,
+    and dispatch the handle rather than the id on hot paths.
+    """
+
+    __slots__ = ("id", "_callbacks", "hooks", "listened")
+
+    def __init__(self, event_id: str) -> None:
+        self.id = event_id
+        self._callbacks: Dict[Any, Callable[..., Any]] = {}
+        self.hooks: Tuple[Tuple[Any, Callable[..., Any]], ...] = ()
+        # Whether any listener, including the listeners of all events, needs to be called
+        self.listened = bool(_all_listeners)
+
+    def _compile(self) -> None:
+        self.hooks = tuple(self._callbacks.items())
+        self.listened = bool(self.hooks or _all_listeners)
+
+    def __repr__(self) -> str:
+        return "Event(%r)" % self.id
+
+
+_events: Dict[str, Event] = {}
+_all_listeners: Tuple[Callable[[str, Tuple[Any, ...]], None], ...] = ()
+
+
+def event(event_id: str) -> Event:
+    """Return the interned handle of the provided event_id"""
+    try:
+        return _events[event_id]
+    except KeyError:
+        # DEV: setdefault keeps a single handle per event id when threads race here
+        return _events.setdefault(event_id, Event(event_id))
+
+
+def _recompile_all() -> None:
+    for e in list(_events.values()):
+        e._compile()
 
 
 class ResultType(enum.Enum):
@@ -47,52 +87,55 @@ _MissingEventDict = EventResultDict()
 
 def has_listeners(event_id: str) -> bool:
     """Check if there are hooks registered for the provided event_id"""
-    global _listeners
-    return bool(_listeners.get(event_id))
+    e = _events.get(event_id)
+    return e is not None and bool(e.hooks)
 
 
 def on(event_id: str, callback: Callable[..., Any], name: Any = None) -> None:
     """Register a listener for the provided event_id"""
-    global _listeners
     if name is None:
         name = id(callback)
-    if event_id not in _listeners:
-        _listeners[event_id] = {}
-    _listeners[event_id][name] = callback
+    e = event(event_id)
+    e._callbacks[name] = callback
+    e._compile()
 
 
 def on_all(callback: Callable[..., Any]) -> None:
     """Register a listener for all events emitted"""
     global _all_listeners
     if callback not in _all_listeners:
-        _all_listeners.insert(0, callback)
+        _all_listeners = (callback,) + _all_listeners
+        _recompile_all()
 
 
 def reset(event_id: Optional[str] = None, callback: Optional[Callable[..., Any]] = None) -> None:
     """Remove all registered listeners. If an event_id is provided, only clear those
     event listeners. If a callback is provided, then only the listeners for that callback are removed.
     """
-    global _listeners
     global _all_listeners
 
     if callback:
         if not event_id:
-            _all_listeners = [cb for cb in _all_listeners if cb != callback]
-        elif event_id in _listeners:
-            _listeners[event_id] = {name: cb for name, cb in _listeners[event_id].items() if cb != callback}
+            _all_listeners = tuple(cb for cb in _all_listeners if cb != callback)
+            _recompile_all()
+        elif event_id in _events:
+            e = _events[event_id]
+            e._callbacks = {name: cb for name, cb in e._callbacks.items() if cb != callback}
+            e._compile()
     else:
         if not event_id:
-            _listeners.clear()
-            _all_listeners.clear()
-        elif event_id in _listeners:
-            del _listeners[event_id]
-
-
-def dispatch(event_id: str, args: Tuple[Any, ...] = ()) -> None:
-    """Call all hooks for the provided event_id with the provided args"""
-    global _all_listeners
-    global _listeners
-
+            _all_listeners = ()
+            # DEV: the handles are kept, since they may be held by the callers of dispatch
+            for e in list(_events.values()):
+                e._callbacks = {}
+            _recompile_all()
+        elif event_id in _events:
+            e = _events[event_id]
+            e._callbacks = {}
+            e._compile()
+
+
+def _dispatch_all(event_id: str, args: Tuple[Any, ...]) -> None:
     for hook in _all_listeners:
         try:
             hook(event_id, args)
@@ -100,10 +143,25 @@ def dispatch(event_id: str, args: Tuple[Any, ...] = ()) -> None:
             if config._raise:
                 raise
 
-    if event_id not in _listeners:
+
+def dispatch(event_id: Union[str, Event], args: Tuple[Any, ...] = ()) -> None:
+    """Call all hooks for the provided event_id with the provided args"""
+    if type(event_id) is Event:
+        e = event_id
+    else:
+        e = _events.get(event_id)  # type: ignore[arg-type]
+        if e is None:
+            if _all_listeners:
+                _dispatch_all(event_id, args)  # type: ignore[arg-type]
+            return
+
+    if not e.listened:
         return
 
-    for local_hook in _listeners[event_id].values():
+    if _all_listeners:
+        _dispatch_all(e.id, args)
+
+    for _, local_hook in e.hooks:
         try:
             local_hook(*args)
         except Exception:
@@ -111,30 +169,35 @@ def dispatch(event_id: str, args: Tuple[Any, ...] = ()) -> None:
                 raise
 
 
-def dispatch_with_results(event_id: str, args: Tuple[Any, ...] = ()) -> EventResultDict:
+def dispatch_with_results(event_id: Union[str, Event], args: Tuple[Any, ...] = ()) -> EventResultDict:
     """Call all hooks for the provided event_id with the provided args
     returning the results and exceptions from the called hooks
     """
-    global _listeners
-    global _all_listeners
+    if type(event_id) is Event:
+        e = event_id
+    else:
+        e = _events.get(event_id)  # type: ignore[arg-type]
+        if e is None:
+            if _all_listeners:
+                _dispatch_all(event_id, args)  # type: ignore[arg-type]
+            return _MissingEventDict
 
-    for hook in _all_listeners:
-        try:
-            hook(event_id, args)
-        except Exception:
-            if config._raise:
-                raise
+    if not e.listened:
+        return _MissingEventDict
+
+    if _all_listeners:
+        _dispatch_all(e.id, args)
 
-    if event_id not in _listeners:
+    if not e.hooks:
         return _MissingEventDict
 
     results = EventResultDict()
-    for name, hook in _listeners[event_id].items():
+    for name, hook in e.hooks:
         try:
             results[name] = EventResult(ResultType.RESULT_OK, hook(*args))
-        except Exception as e:
+        except Exception as exc:
             if config._raise:
                 raise
-            results[name] = EventResult(ResultType.RESULT_EXCEPTION, None, e)
+            results[name] = EventResult(ResultType.RESULT_EXCEPTION, None, exc)
 
     return results
@@ -21,11 +21,13 @@ from ddtrace.internal import compat
 from ddtrace.internal.atexit import register_on_exit_signal
 from ddtrace.internal.constants import DEFAULT_SERVICE_NAME
 from ddtrace.internal.core import DDSketch
+from ddtrace.internal.utils.http import Response
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
 
 from .._encoding import packb
 from ..agent import get_connection
 from ..compat import get_connection_response
+from ..connection_pool import get_connection_pool
 from ..forksafe import Lock
 from ..hostname import get_hostname
 from ..logger import get_logger
@@ -266,9 +268,13 @@ class DataStreamsProcessor(PeriodicService):
     def _flush_stats(self, payload):
         # type: (bytes) -> None
         try:
-            conn = get_connection(self._agent_url, self._timeout)
-            conn.request("POST", self._endpoint, payload, self._headers)
-            resp = get_connection_response(conn)
+            if config._agent_connection_pool_enabled:
+                pool = get_connection_pool(self._agent_url, self._timeout)
+                resp = pool.request("POST", self._endpoint, payload, self._headers)
+            else:
+                conn = get_connection(self._agent_url, self._timeout)
+                conn.request("POST", self._endpoint, payload, self._headers)
+                resp = Response.from_http_response(get_connection_response(conn))
         except Exception:
             log.debug("failed to submit pathway stats to the Datadog agent at %s", self._agent_endpoint, exc_info=True)
             raise
@@ -281,7 +287,7 @@ class DataStreamsProcessor(PeriodicService):
                     "failed to send data stream stats payload, %s (%s) (%s) response from Datadog agent at %s",
                     resp.status,
                     resp.reason,
-                    resp.read(),
+                    resp.body,
                     self._agent_endpoint,
                 )
             else:
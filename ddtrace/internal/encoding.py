@@ -1,11 +1,14 @@
 import json
+import threading
 from typing import TYPE_CHECKING
 from typing import Any  # noqa:F401
 from typing import Dict  # noqa:F401
 from typing import List  # noqa:F401
 from typing import Optional  # noqa:F401
 from typing import Tuple  # noqa:F401
+from typing import Type  # noqa:F401
 
+from ._encoding import BufferedEncoder  # noqa:F401
 from ._encoding import ListStringTable
 from ._encoding import MsgpackEncoderV04
 from ._encoding import MsgpackEncoderV05
@@ -13,7 +16,7 @@ from .compat import ensure_text
 from .logger import get_logger
 
 
-__all__ = ["MsgpackEncoderV04", "MsgpackEncoderV05", "ListStringTable", "MSGPACK_ENCODERS"]
+__all__ = ["MsgpackEncoderV04", "MsgpackEncoderV05", "ListStringTable", "MSGPACK_ENCODERS", "RingBufferedEncoder"]
 
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -157,3 +160,104 @@ MSGPACK_ENCODERS = {
     "v0.4": MsgpackEncoderV04,
     "v0.5": MsgpackEncoderV05,
 }
+
+
+class RingBufferedEncoder(object):
+    """
+    Buffered encoder that spreads traces over a ring of encoders of the same
+    type so that flushing never blocks writers.
+
+    Writers always put traces into the active encoder. On ``encode`` the ring
+    is rotated first, so that new traces go to the next encoder while the
+    previous one is serialized. The only lock shared with writers is the one
+    of the encoder being serialized, which is contended only by the writers
+    that picked it as the active encoder right before the rotation. Traces
+    put in an encoder after it has been serialized are sent the next time it
+    is rotated out.
+
+    Each encoder in the ring can hold up to ``max_size`` bytes.
+    """
+
+    def __init__(self, encoder_cls, max_size, max_item_size, n_buffers=2):
+        # type: (Type[BufferedEncoder], int, int, int) -> None
+        if n_buffers < 2:
+            raise ValueError("A ring buffered encoder needs at least 2 buffers")
+        self._buffers = [encoder_cls(max_size, max_item_size) for _ in range(n_buffers)]
+        self._index = 0
+        self._active = self._buffers[0]
+        # Only serializes concurrent flushes, writers never acquire it.
+        self._rotate_lock = threading.Lock()
+        self.content_type = encoder_cls.content_type
+
+    def __len__(self):
+        # type: () -> int
+        return sum(len(b) for b in self._buffers)
+
+    def __repr__(self):
+        # type: () -> str
+        return "%s(%r, n_buffers=%d)" % (self.__class__.__name__, self._active, len(self._buffers))
+
+    @property
+    def max_size(self):
+        # type: () -> int
+        return self._active.max_size
+
+    @property
+    def max_item_size(self):
+        # type: () -> int
+        return self._active.max_item_size
+
+    @property
+    def size(self):
+        # type: () -> int
+        """Return the size in bytes of the active encoder buffer."""
+        return self._active.size
+
+    @property
+    def native_span_events(self):
+        # type: () -> bool
+        return self._active.native_span_events
+
+    @native_span_events.setter
+    def native_span_events(self, value):
+        # type: (bool) -> None
+        for buffer in self._buffers:
+            buffer.native_span_events = value
+
+    @property
+    def warm_strings(self):
+        # type: () -> int
+        return self._active.warm_strings
+
+    @warm_strings.setter
+    def warm_strings(self, value):
+        # type: (int) -> None
+        for buffer in self._buffers:
+            buffer.warm_strings = value
+
+    def put(self, item):
+        # type: (Any) -> None
+        # DEV: reading the active encoder reference is atomic.
+        self._active.put(item)
+
+    def _rotate(self):
+        # type: () -> BufferedEncoder
+        """Make the next encoder in the ring active and return the previous one."""
+        standby = self._active
+        self._index = (self._index + 1) % len(self._buffers)
+        self._active = self._buffers[self._index]
+        return standby
+
+    def encode(self):
+        # type: () -> Tuple[Optional[bytes], int]
+        with self._rotate_lock:
+            return self._rotate().encode()
+
+    def encode_buffer(self):
+        # type: () -> Tuple[Optional[memoryview], int]
+        with self._rotate_lock:
+            return self._rotate().encode_buffer()
+
+    def _decode(self, data):
+        # type: (bytes) -> Any
+        return self._active._decode(data)
@@ -0,0 +1,119 @@
+"""
+Obfuscation and normalization of span resources for client-side stats.
+
+When stats are computed by the Datadog Agent, resources are obfuscated before
+spans are aggregated, so that queries that only differ by their literal values
+end up in the same stats bucket. Stats computed by the tracer are not
+obfuscated by the agent, so the same is done here to the resources of the
+aggregation keys. This is an approximation of the agent obfuscator that only
+aims at grouping the same resources together, not at reproducing its output.
+"""
+import json
+import re
+from typing import Any
+
+from ddtrace.ext import SpanTypes
+from ddtrace.internal.utils.cache import cached
+
+
+# Number of distinct (span type, resource) pairs whose normalized resource is kept
+RESOURCE_CACHE_SIZE = 4096
+
+# The agent keeps at most this many commands of a Redis pipeline
+_REDIS_MAX_COMMANDS = 3
+# Redis commands whose first argument is a sub-command
+_REDIS_COMPOUND_COMMANDS = frozenset(("CLIENT", "CLUSTER", "COMMAND", "CONFIG", "DEBUG", "SCRIPT"))
+
+_SQL_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_SQL_LITERAL = re.compile(
+    r"""
+    '(?:[^']|'')*'                                   # string literal, with '' escapes
+    | \$([A-Za-z_]\w*|)\$.*?\$\1\$                   # dollar-quoted string
+    | (?<![\w$.])0[xX][0-9a-fA-F]+\b                 # hexadecimal number
+    | (?<![\w$.])(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\b  # decimal number
+    | (?<![\w$.])(?:TRUE|FALSE|NULL)\b               # boolean and null literals
+    """,
+    re.DOTALL | re.IGNORECASE | re.VERBOSE,
+)
+_SQL_LITERAL_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_SQL_GROUP_LIST = re.compile(r"\(\s*\?\s*\)(?:\s*,\s*\(\s*\?\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def obfuscate_sql(query: str) -> str:
+    """Replace the literals of a SQL query with ``?`` and drop its comments.
+
+    Lists of literals, such as the values of an ``IN`` clause or the rows of
+    an ``INSERT``, are collapsed into a single ``?``.
+    """
+    query = _SQL_COMMENT.sub(" ", query)
+    query = _SQL_LITERAL.sub("?", query)
+    query = _SQL_LITERAL_LIST.sub("?", query)
+    query = _SQL_GROUP_LIST.sub("( ? )", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def quantize_redis(query: str) -> str:
+    """Keep only the command names of a Redis command or pipeline."""
+    commands = []
+    for line in query.split("\n"):
+        args = line.split()
+        if not args:
+            continue
+        if len(commands) == _REDIS_MAX_COMMANDS:
+            commands.append("...")
+            break
+        command = args[0].upper()
+        if command in _REDIS_COMPOUND_COMMANDS and len(args) > 1:
+            command += " " + args[1].upper()
+        commands.append(command)
+    return " ".join(commands)
+
+
+def _json_shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _json_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_json_shape(v) for v in value]
+    return "?"
+
+
+def obfuscate_mongodb(resource: str) -> str:
+    """Replace the values of the query of a MongoDB resource with ``?``.
+
+    MongoDB resources are made of a command, a collection and an optional
+    JSON query. Resources whose query is not valid JSON are left untouched.
+    """
+    parts = resource.split(" ", 2)
+    if len(parts) < 3:
+        return resource
+    try:
+        query = json.loads(parts[2])
+    except ValueError:
+        return resource
+    return "%s %s %s" % (parts[0], parts[1], json.dumps(_json_shape(query)))
+
+
+_OBFUSCATORS = {
+    SpanTypes.SQL: obfuscate_sql,
+    SpanTypes.CASSANDRA: obfuscate_sql,
+    SpanTypes.REDIS: quantize_redis,
+    SpanTypes.MONGODB: obfuscate_mongodb,
+}
+
+
+@cached(RESOURCE_CACHE_SIZE)
+def _normalize_resource(key):
+    span_type, resource = key
+    try:
+        return _OBFUSCATORS[span_type](resource)
+    except Exception:
+        # Never lose a stats point because of an unexpected resource
+        return resource
+
+
+def normalize_resource(span_type: str, resource: str) -> str:
+    """Return the resource that spans of the given type are aggregated by."""
+    if not resource or span_type not in _OBFUSCATORS:
+        return resource
+    return _normalize_resource((span_type, resource))
@@ -1,6 +1,7 @@
 # coding: utf-8
 from collections import defaultdict
 import os
+import threading
 import typing
 
 import ddtrace
@@ -9,18 +10,21 @@ from ddtrace._trace.processor import SpanProcessor
 from ddtrace._trace.span import _is_top_level
 from ddtrace.internal import compat
 from ddtrace.internal.core import DDSketch
+from ddtrace.internal.utils.http import Response
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
 
 from ...constants import SPAN_MEASURED_KEY
 from .._encoding import packb
 from ..agent import get_connection
 from ..compat import get_connection_response
+from ..connection_pool import get_connection_pool
 from ..forksafe import Lock
 from ..hostname import get_hostname
 from ..logger import get_logger
 from ..periodic import PeriodicService
 from ..runtime import container
 from ..writer import _human_size
+from .obfuscation import normalize_resource
 
 
 if typing.TYPE_CHECKING:  # pragma: no cover
@@ -74,13 +78,44 @@ class SpanAggrStats(object):
         self.ok_distribution = DDSketch()
         self.err_distribution = DDSketch()
 
+    def merge(self, other):
+        # type: (SpanAggrStats) -> None
+        """Add the statistics of another aggregation to this one."""
+        self.hits += other.hits
+        self.top_level_hits += other.top_level_hits
+        self.errors += other.errors
+        self.duration += other.duration
+        self.ok_distribution.merge(other.ok_distribution)
+        self.err_distribution.merge(other.err_distribution)
 
-def _span_aggr_key(span):
-    # type: (Span) -> SpanAggrKey
+
+def _new_buckets():
+    # type: () -> DefaultDict[int, DefaultDict[SpanAggrKey, SpanAggrStats]]
+    return defaultdict(lambda: defaultdict(SpanAggrStats))
+
+
+class _ThreadBuckets(object):
+    """The stats buckets of the spans finished by a single thread.
+
+    The lock is only contended when the buckets are collected for a flush.
+    """
+
+    __slots__ = ("buckets", "lock", "thread")
+
+    def __init__(self):
+        self.buckets = _new_buckets()
+        self.lock = Lock()
+        self.thread = threading.current_thread()
+
+
+def _span_aggr_key(span, obfuscate_resource=False):
+    # type: (Span, bool) -> SpanAggrKey
     """Return a hashable key that can be used to aggregate similar spans."""
     service = span.service or ""
     resource = span.resource or ""
     _type = span.span_type or ""
+    if obfuscate_resource:
+        resource = normalize_resource(_type, resource)
     status_code = span.get_tag("http.status_code") or 0
     synthetics = span.context.dd_origin == "synthetics"
     return span.name, service, resource, _type, int(status_code), synthetics
@@ -100,9 +135,11 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
         self._timeout = timeout
         # Have the bucket size match the interval in which flushes occur.
         self._bucket_size_ns = int(interval * 1e9)  # type: int
-        self._buckets = defaultdict(
-            lambda: defaultdict(SpanAggrStats)
-        )  # type: DefaultDict[int, DefaultDict[SpanAggrKey, SpanAggrStats]]
+        self._buckets = _new_buckets()  # type: DefaultDict[int, DefaultDict[SpanAggrKey, SpanAggrStats]]
+        # Spans are aggregated in per-thread buckets that are merged into
+        # self._buckets when they are flushed
+        self._local = threading.local()
+        self._thread_buckets = []  # type: List[_ThreadBuckets]
         self._headers = {
             "Datadog-Meta-Lang": "python",
             "Datadog-Meta-Tracer-Version": ddtrace.__version__,
@@ -114,6 +151,7 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
             self._hostname = get_hostname()
         self._lock = Lock()
         self._enabled = True
+        self._obfuscate_resources = config._trace_compute_stats_obfuscation_enabled
 
         self._flush_stats_with_backoff = fibonacci_backoff_with_jitter(
             attempts=retry_attempts,
@@ -135,13 +173,21 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
         if not is_top_level and not _is_measured(span):
             return
 
-        with self._lock:
-            # Align the span into the corresponding stats bucket
-            assert span.duration_ns is not None
-            span_end_ns = span.start_ns + span.duration_ns
-            bucket_time_ns = span_end_ns - (span_end_ns % self._bucket_size_ns)
-            aggr_key = _span_aggr_key(span)
-            stats = self._buckets[bucket_time_ns][aggr_key]
+        aggr_key = _span_aggr_key(span, self._obfuscate_resources)
+        # Align the span into the corresponding stats bucket
+        assert span.duration_ns is not None
+        span_end_ns = span.start_ns + span.duration_ns
+        bucket_time_ns = span_end_ns - (span_end_ns % self._bucket_size_ns)
+
+        try:
+            thread_buckets = self._local.buckets
+        except AttributeError:
+            thread_buckets = self._local.buckets = _ThreadBuckets()
+            with self._lock:
+                self._thread_buckets.append(thread_buckets)
+
+        with thread_buckets.lock:
+            stats = thread_buckets.buckets[bucket_time_ns][aggr_key]
 
             stats.hits += 1
             stats.duration += span.duration_ns
@@ -153,6 +199,24 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
             else:
                 stats.ok_distribution.add(span.duration_ns)
 
+    def _merge_thread_buckets(self):
+        # type: () -> None
+        """Move the stats of the per-thread buckets into the shared buckets."""
+        for thread_buckets in list(self._thread_buckets):
+            with thread_buckets.lock:
+                buckets, thread_buckets.buckets = thread_buckets.buckets, _new_buckets()
+            if not thread_buckets.thread.is_alive():
+                self._thread_buckets.remove(thread_buckets)
+
+            for bucket_time_ns, bucket in buckets.items():
+                merged_bucket = self._buckets[bucket_time_ns]
+                for aggr_key, stats in bucket.items():
+                    merged_stats = merged_bucket.get(aggr_key)
+                    if merged_stats is None:
+                        merged_bucket[aggr_key] = stats
+                    else:
+                        merged_stats.merge(stats)
+
     def _serialize_buckets(self):
         # type: () -> List[Dict]
         """Serialize and update the buckets.
@@ -201,9 +265,13 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
     def _flush_stats(self, payload):
         # type: (bytes) -> None
         try:
-            conn = get_connection(self._agent_url, self._timeout)
-            conn.request("PUT", self._endpoint, payload, self._headers)
-            resp = get_connection_response(conn)
+            if config._agent_connection_pool_enabled:
+                pool = get_connection_pool(self._agent_url, self._timeout)
+                resp = pool.request("PUT", self._endpoint, payload, self._headers)
+            else:
+                conn = get_connection(self._agent_url, self._timeout)
+                conn.request("PUT", self._endpoint, payload, self._headers)
+                resp = Response.from_http_response(get_connection_response(conn))
         except Exception:
             log.error("failed to submit span stats to the Datadog agent at %s", self._agent_endpoint, exc_info=True)
             raise
@@ -219,7 +287,7 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
                     "failed to send stats payload, %s (%s) (%s) response from Datadog agent at %s",
                     resp.status,
                     resp.reason,
-                    resp.read(),
+                    resp.body,
                     self._agent_endpoint,
                 )
             else:
@@ -229,6 +297,7 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
         # type: (...) -> None
 
         with self._lock:
+            self._merge_thread_buckets()
             serialized_stats = self._serialize_buckets()
 
         if not serialized_stats:
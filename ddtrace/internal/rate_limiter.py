@@ -178,6 +178,74 @@ class RateLimiter(object):
     __str__ = __repr__
 
 
+class ThreadLocalRateLimiter(RateLimiter):
+    """
+    A token bucket rate limiter that hands out tokens to threads in leases
+
+    Every thread takes up to ``lease_size`` tokens at once from the shared
+    bucket, and spends them without taking the lock. When the shared bucket is
+    empty, threads remember when its next token is due and deny requests
+    without taking the lock until then. Leased tokens expire after a time
+    window, so the rate limit is never exceeded, but tokens leased by threads
+    that stop making requests are lost, which can make the effective rate
+    slightly lower than the rate limit.
+    """
+
+    __slots__ = ("lease_size", "_local")
+
+    # The default lease size is this fraction of the rate limit
+    LEASE_FRACTION = 16
+
+    def __init__(self, rate_limit: int, time_window: float = 1e9, lease_size: Optional[int] = None):
+        """
+        Constructor for ThreadLocalRateLimiter
+
+        :param lease_size: The maximum number of tokens that a thread takes at once from the shared bucket.
+            default value is 1/16th of the rate limit.
+        :type lease_size: :obj:`int`
+        """
+        super(ThreadLocalRateLimiter, self).__init__(rate_limit, time_window)
+        self.lease_size = lease_size if lease_size is not None else max(rate_limit // self.LEASE_FRACTION, 1)
+        self._local = threading.local()
+
+    def _is_allowed(self, timestamp_ns: int) -> bool:
+        # Rate limit of 0 blocks everything
+        if self.rate_limit == 0:
+            return False
+
+        # Negative rate limit disables rate limiting
+        elif self.rate_limit < 0:
+            return True
+
+        local = self._local
+        try:
+            if local.tokens >= 1 and timestamp_ns < local.expires_ns:
+                local.tokens -= 1
+                return True
+            if timestamp_ns < local.retry_ns:
+                return False
+        except AttributeError:
+            # First request from this thread
+            pass
+
+        with self._lock:
+            self._replenish(timestamp_ns)
+
+            if self.tokens >= 1:
+                lease = min(self.lease_size, int(self.tokens))
+                self.tokens -= lease
+                local.tokens = lease - 1
+                local.expires_ns = timestamp_ns + self.time_window
+                local.retry_ns = 0
+                return True
+
+            # Wait for the next token to be added to the shared bucket
+            local.tokens = 0
+            local.expires_ns = 0
+            local.retry_ns = timestamp_ns + (1 - self.tokens) * self.time_window / self.rate_limit
+            return False
+
+
 class RateLimitExceeded(Exception):
     pass
 
@@ -6,6 +6,7 @@ from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Text
+from typing import Tuple  # noqa:F401
 
 
 # TypedDict was added to typing in python 3.8
@@ -26,7 +27,8 @@ from ddtrace.internal.constants import _REJECT_PRIORITY_INDEX
 from ddtrace.internal.constants import SAMPLING_DECISION_TRACE_TAG_KEY
 from ddtrace.internal.glob_matching import GlobMatcher
 from ddtrace.internal.logger import get_logger
-from ddtrace.sampling_rule import SamplingRule  # noqa:F401
+from ddtrace.internal.utils.cache import S3FIFOCache
+from ddtrace.sampling_rule import SamplingRule
 from ddtrace.settings import _config as config
 
 from .rate_limiter import RateLimiter
@@ -304,12 +306,114 @@ def _set_priority(span, priority):
     span.context.sampling_priority = priority
 
 
-def _get_highest_precedence_rule_matching(span, rules):
-    # type: (Span, List[SamplingRule]) -> Optional[SamplingRule]
-    if not rules:
-        return None
+# How a candidate rule of a SamplingRuleMatcher is checked against a span
+_RULE_MATCH = 0  # the rule matches every span with the same service, name and resource
+_RULE_TAGS = 1  # the rule matches if the tags of the span match
+_RULE_SPAN = 2  # the rule must be evaluated with SamplingRule.matches
+# Marker for patterns that cannot be compiled
+_UNCOMPILED = object()
+
+
+class SamplingRuleMatcher(object):
+    """Find the first rule of a list of sampling rules that matches a span.
+
+    The service, name and resource patterns of all the rules are compiled
+    once: patterns without wildcards are compared as plain strings, with the
+    rules indexed by exact service, and glob patterns are translated to
+    regular expressions. The rules that match each (service, name, resource)
+    combination are memoized, so that only their tag conditions, if any, are
+    checked against every span. Rules that use function or regular expression
+    patterns, or that override :meth:`SamplingRule.matches`, are evaluated
+    span by span as before.
+    """
+
+    def __init__(self, rules, cache_size=1024):
+        # type: (List[SamplingRule], int) -> None
+        self.rules = rules
+        self._num_rules = len(rules)
+        self._cache = S3FIFOCache(cache_size)
+        self._patterns = [self._compile_rule(rule) for rule in rules]
+        self._by_service = {}  # type: Dict[str, List[int]]
+        self._any_service = []  # type: List[int]
+        for i, patterns in enumerate(self._patterns):
+            if patterns is not None and isinstance(patterns[0], str):
+                self._by_service.setdefault(patterns[0], []).append(i)
+            else:
+                self._any_service.append(i)
+
+    def is_stale(self, rules):
+        # type: (List[SamplingRule]) -> bool
+        """Whether the matcher was compiled from a different list of rules."""
+        return rules is not self.rules or len(rules) != self._num_rules
+
+    @staticmethod
+    def _compile_pattern(pattern):
+        # type: (Any) -> Any
+        """Return None for patterns that match anything, a string for exact
+        patterns and a compiled regular expression for glob patterns.
+        """
+        if pattern is SamplingRule.NO_RULE:
+            return None
+        if type(pattern) is not GlobMatcher:
+            return _UNCOMPILED
+        glob = pattern.pattern
+        if "*" not in glob and "?" not in glob:
+            return glob
+        if not glob.strip("*"):
+            return None
+        return re.compile(
+            "".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in glob), re.DOTALL
+        ).fullmatch
+
+    @classmethod
+    def _compile_rule(cls, rule):
+        # type: (SamplingRule) -> Optional[Tuple[Any, Any, Any]]
+        if type(rule).matches is not SamplingRule.matches or type(rule).tags_match is not SamplingRule.tags_match:
+            return None
+        patterns = (
+            cls._compile_pattern(rule.service),
+            cls._compile_pattern(rule.name),
+            cls._compile_pattern(rule.resource),
+        )
+        if _UNCOMPILED in patterns:
+            return None
+        return patterns
+
+    def _candidates(self, key):
+        # type: (Tuple[Optional[str], str, Optional[str]]) -> Tuple[Tuple[SamplingRule, int], ...]
+        """Return the rules that can match spans with the given service, name
+        and resource, in order of precedence, with how to check them.
+        """
+        props = tuple(str(prop).lower() for prop in key)
+        candidates = []
+        for i in sorted(self._by_service.get(props[0], []) + self._any_service):
+            rule = self.rules[i]
+            patterns = self._patterns[i]
+            if patterns is None:
+                candidates.append((rule, _RULE_SPAN))
+                continue
+            for prop, pattern in zip(props, patterns):
+                if pattern is None:
+                    continue
+                if not (prop == pattern if isinstance(pattern, str) else pattern(prop)):
+                    break
+            else:
+                if rule._tag_value_matchers:
+                    candidates.append((rule, _RULE_TAGS))
+                else:
+                    # No rule after this one can ever be chosen
+                    candidates.append((rule, _RULE_MATCH))
+                    break
+        return tuple(candidates)
 
-    for rule in rules:
-        if rule.matches(span):
-            return rule
-    return None
+    def match(self, span):
+        # type: (Span) -> Optional[SamplingRule]
+        """Return the first rule that matches the span, if any."""
+        for rule, check in self._cache.get((span.service, span.name, span.resource), self._candidates):
+            if (
+                check == _RULE_MATCH
+                or (check == _RULE_TAGS and rule.tags_match(span))
+                or (check == _RULE_SPAN and rule.matches(span))
+            ):
+                return rule
+        return None
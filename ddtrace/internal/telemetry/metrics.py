@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import abc
+import threading
 import time
 from typing import Dict  # noqa:F401
 from typing import List  # noqa:F401
 from typing import Optional  # noqa:F401
 from typing import Tuple  # noqa:F401
 
+from ddtrace.internal import forksafe
+
 
 MetricTagType = Optional[Tuple[Tuple[str, str], ...]]
 
@@ -142,3 +145,55 @@ class DistributionMetric(Metric):
             "tags": ["{}:{}".format(k, v).lower() for k, v in self._tags] if self._tags else [],
         }
         return data
+
+
+class CountMetricHandle(object):
+    """
+    A count metric that is incremented from hot paths without locking.
+
+    Each thread adds to a counter of its own, and the counters are summed when
+    the telemetry writer flushes its metrics. Handles are obtained once per
+    (namespace, name, tags) with ``TelemetryWriter.count_metric_handle``.
+    """
+
+    __slots__ = ["namespace", "name", "tags", "_local", "_lock", "_counters", "_total_dead", "_total_flushed"]
+
+    def __init__(self, namespace, name, tags=None):
+        # type: (str, str, MetricTagType) -> None
+        self.namespace = namespace
+        self.name = name
+        self.tags = tags
+        self._local = threading.local()
+        self._lock = forksafe.Lock()
+        # The counter of each thread, only ever written to by that thread
+        self._counters = []  # type: List[Tuple[threading.Thread, List[float]]]
+        self._total_dead = 0.0
+        self._total_flushed = 0.0
+
+    def add(self, value=1.0):
+        # type: (float) -> None
+        """adds the value to the counter of the current thread"""
+        try:
+            self._local.counter[0] += value
+        except AttributeError:
+            counter = self._local.counter = [value]
+            with self._lock:
+                self._counters.append((threading.current_thread(), counter))
+
+    def collect(self):
+        # type: () -> float
+        """returns the sum of the values added since the last collection"""
+        with self._lock:
+            total = self._total_dead
+            counters = []
+            for thread, counter in self._counters:
+                # DEV: counters are only read, so that no concurrent addition is lost
+                total += counter[0]
+                if thread.is_alive():
+                    counters.append((thread, counter))
+                else:
+                    self._total_dead += counter[0]
+            self._counters = counters
+            value = total - self._total_flushed
+            self._total_flushed = total
+        return value
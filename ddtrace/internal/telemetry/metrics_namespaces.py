@@ -7,6 +7,8 @@ from typing import Type  # noqa:F401
 from ddtrace.internal import forksafe
 from ddtrace.internal.telemetry.constants import TELEMETRY_TYPE_DISTRIBUTION
 from ddtrace.internal.telemetry.constants import TELEMETRY_TYPE_GENERATE_METRICS
+from ddtrace.internal.telemetry.metrics import CountMetric
+from ddtrace.internal.telemetry.metrics import CountMetricHandle
 from ddtrace.internal.telemetry.metrics import DistributionMetric
 from ddtrace.internal.telemetry.metrics import Metric
 from ddtrace.internal.telemetry.metrics import MetricTagType  # noqa:F401
@@ -23,6 +25,7 @@ class MetricNamespace:
             TELEMETRY_TYPE_GENERATE_METRICS: defaultdict(dict),
             TELEMETRY_TYPE_DISTRIBUTION: defaultdict(dict),
         }  # type: Dict[str, Dict[str, Dict[int, Metric]]]
+        self._count_handles = {}  # type: Dict[int, CountMetricHandle]
 
     def flush(self):
         # type: () -> Dict
@@ -32,7 +35,35 @@ class MetricNamespace:
                 TELEMETRY_TYPE_GENERATE_METRICS: defaultdict(dict),
                 TELEMETRY_TYPE_DISTRIBUTION: defaultdict(dict),
             }
-            return namespace_metrics
+            count_handles = list(self._count_handles.items())
+
+        # The counts of the handles are aggregated with the queued count metrics
+        count_metrics = namespace_metrics[TELEMETRY_TYPE_GENERATE_METRICS]
+        for metric_id, handle in count_handles:
+            value = handle.collect()
+            if not value:
+                continue
+            existing_metric = count_metrics[handle.namespace].get(metric_id)
+            if existing_metric:
+                existing_metric.add_point(value)
+            else:
+                new_metric = CountMetric(handle.namespace, handle.name, tags=handle.tags, common=True)
+                new_metric.add_point(value)
+                count_metrics[handle.namespace][metric_id] = new_metric
+        return namespace_metrics
+
+    def count_metric_handle(self, namespace, name, tags=None):
+        # type: (str, str, MetricTagType) -> CountMetricHandle
+        """
+        Returns the handle of the count metric with the given namespace, name and tags, which
+        is flushed with the other metrics of the namespace.
+        """
+        metric_id = Metric.get_id(name, namespace, tags, CountMetric.metric_type)
+        handle = self._count_handles.get(metric_id)
+        if handle is None:
+            with self._lock:
+                handle = self._count_handles.setdefault(metric_id, CountMetricHandle(namespace, name, tags))
+        return handle
 
     def add_metric(self, metric_class, namespace, name, value=1.0, tags=None, interval=None):
         # type: (Type[Metric], str, str, float, MetricTagType, Optional[float]) -> None
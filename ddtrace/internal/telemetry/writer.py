@@ -20,12 +20,14 @@ from ...internal import forksafe
 from ..agent import get_connection
 from ..agent import get_trace_url
 from ..compat import get_connection_response
+from ..connection_pool import get_connection_pool
 from ..encoding import JSONEncoderV2
 from ..periodic import PeriodicService
 from ..runtime import container
 from ..runtime import get_runtime_id
 from ..service import ServiceStatus
 from ..utils.formats import asbool
+from ..utils.http import Response
 from ..utils.time import StopWatch
 from ..utils.version import _pep440_to_semver
 from . import modules
@@ -39,6 +41,7 @@ from .data import get_host_info
 from .data import get_python_config_vars
 from .data import update_imported_dependencies
 from .metrics import CountMetric
+from .metrics import CountMetricHandle  # noqa:F401
 from .metrics import DistributionMetric
 from .metrics import GaugeMetric
 from .metrics import MetricTagType  # noqa:F401
@@ -64,6 +67,7 @@ class _TelemetryConfig:
     INSTALL_TYPE = os.environ.get("DD_INSTRUMENTATION_INSTALL_TYPE", None)
     INSTALL_TIME = os.environ.get("DD_INSTRUMENTATION_INSTALL_TIME", None)
     FORCE_START = asbool(os.environ.get("_DD_INSTRUMENTATION_TELEMETRY_TESTS_FORCE_APP_STARTED", "false"))
+    CONNECTION_POOL_ENABLED = asbool(os.environ.get("DD_TRACE_AGENT_CONNECTION_POOL_ENABLED", "false"))
 
 
 class LogData(dict):
@@ -103,17 +107,20 @@ class _TelemetryClient:
     def url(self):
         return parse.urljoin(self._telemetry_url, self._endpoint)
 
-    def send_event(self, request: Dict) -> Optional[httplib.HTTPResponse]:
+    def send_event(self, request: Dict) -> Optional[Union[httplib.HTTPResponse, Response]]:
         """Sends a telemetry request to the trace agent"""
-        resp = None
+        resp = None  # type: Optional[Union[httplib.HTTPResponse, Response]]
         conn = None
         try:
             rb_json, _ = self._encoder.encode(request)
             headers = self.get_headers(request)
             with StopWatch() as sw:
-                conn = get_connection(self._telemetry_url)
-                conn.request("POST", self._endpoint, rb_json, headers)
-                resp = get_connection_response(conn)
+                if _TelemetryConfig.CONNECTION_POOL_ENABLED:
+                    resp = get_connection_pool(self._telemetry_url).request("POST", self._endpoint, rb_json, headers)
+                else:
+                    conn = get_connection(self._telemetry_url)
+                    conn.request("POST", self._endpoint, rb_json, headers)
+                    resp = get_connection_response(conn)
             if resp.status < 300:
                 log.debug("sent %d in %.5fs to %s. response: %s", len(rb_json), sw.elapsed(), self.url, resp.status)
             else:
@@ -558,6 +565,14 @@ class TelemetryWriter(PeriodicService):
                 tags,
             )
 
+    def count_metric_handle(self, namespace, name, tags=None):
+        # type: (str, str, MetricTagType) -> CountMetricHandle
+        """
+        Returns a handle to add to a count metric from hot paths, without the cost of
+        queuing a metric on each call. The counts are queued when the metrics are flushed.
+        """
+        return self._namespace.count_metric_handle(namespace, name, tags)
+
     def add_distribution_metric(self, namespace, name, value=1.0, tags=None):
         # type: (str,str, float, MetricTagType) -> None
         """
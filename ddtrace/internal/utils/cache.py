@@ -1,6 +1,11 @@
+from collections import OrderedDict
+from collections import deque
 from threading import RLock
 from typing import Any  # noqa:F401
 from typing import Callable  # noqa:F401
+from typing import Deque  # noqa:F401
+from typing import Dict  # noqa:F401
+from typing import List  # noqa:F401
 from typing import Optional  # noqa:F401
 from typing import Type  # noqa:F401
 from typing import TypeVar  # noqa:F401
@@ -9,29 +14,59 @@ from ddtrace.internal.compat import getfullargspec
 from ddtrace.internal.compat import is_not_void_function
 
 
-miss = object()
-
 T = TypeVar("T")
 F = Callable[[T], Any]
 M = Callable[[Any, T], Any]
 
 
-class LFUCache(dict):
-    """Simple LFU cache implementation.
+class S3FIFOCache(object):
+    """Bounded cache with the S3-FIFO eviction policy.
 
     This cache is designed for memoizing functions with a single hashable
-    argument. The eviction policy is LFU, i.e. the least frequently used values
-    are evicted when the cache is full. The amortized cost of shrinking the
-    cache when it grows beyond the requested size is O(log(size)).
+    argument. New keys are added to a small FIFO queue, and the keys that are
+    used again before they reach its head are moved to a main FIFO queue.
+    Keys that leave the main queue are reinserted at its tail as long as they
+    have been used since they were last inserted, which approximates an LFU
+    policy. Recently evicted keys are remembered in a ghost queue, so that
+    they go straight to the main queue when they come back. Every operation
+    takes constant amortized time and a single entry is evicted per miss.
+
+    Cache hits do not take any lock: they only bump the usage counter of the
+    entry, which is allowed to be approximate. The hit, miss and eviction
+    counts are exposed by :attr:`stats` for debugging.
     """
 
+    # Usage counters saturate at this value
+    MAX_FREQUENCY = 3
+
     def __init__(self, maxsize=256):
         # type: (int) -> None
         self.maxsize = maxsize
         self.lock = RLock()
-        self.count_lock = RLock()
-
-    def get(self, key, f):  # type: ignore[override]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._small_size = max(maxsize // 10, 1)
+        # The entries are [value, frequency] lists so that hits can update them in place
+        self._entries = {}  # type: Dict[Any, List[Any]]
+        self._small = deque()  # type: Deque[Any]
+        self._main = deque()  # type: Deque[Any]
+        self._ghost = OrderedDict()  # type: OrderedDict[Any, None]
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._entries)
+
+    def __contains__(self, key):
+        # type: (Any) -> bool
+        return key in self._entries
+
+    @property
+    def stats(self):
+        # type: () -> Dict[str, int]
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def get(self, key, f):
         # type: (T, F) -> Any
         """Get a value from the cache.
 
@@ -39,48 +74,88 @@ class LFUCache(dict):
         function ``f`` is called on the key to generate it. The return value is
         then stored in the cache and returned to the caller.
         """
-
-        _ = super(LFUCache, self).get(key, miss)
-        if _ is not miss:
-            with self.count_lock:
-                value, count = _
-                self[key] = (value, count + 1)
-            return value
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] < self.MAX_FREQUENCY:
+                entry[1] += 1
+            self.hits += 1
+            return entry[0]
 
         with self.lock:
-            _ = super(LFUCache, self).get(key, miss)
-            if _ is not miss:
-                with self.count_lock:
-                    value, count = _
-                    self[key] = (value, count + 1)
-                return value
-
-            # Cache miss: ensure that we have enough space in the cache
-            # by evicting half of the entries when we go over the threshold
-            while len(self) >= self.maxsize:
-                for h in sorted(self, key=lambda h: self[h][1])[: self.maxsize >> 1]:
-                    del self[h]
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
 
+            self.misses += 1
             value = f(key)
 
-            self[key] = (value, 1)
+            while len(self._entries) >= self.maxsize:
+                self._evict()
+
+            if key in self._ghost:
+                del self._ghost[key]
+                self._main.append(key)
+            else:
+                self._small.append(key)
+            self._entries[key] = [value, 0]
 
             return value
 
+    def _evict(self):
+        # type: () -> None
+        if len(self._small) >= self._small_size or not self._main:
+            while self._small:
+                key = self._small.popleft()
+                entry = self._entries[key]
+                if entry[1] > 0:
+                    # Used again since it was added: promote it to the main queue
+                    entry[1] = 0
+                    self._main.append(key)
+                    continue
+
+                del self._entries[key]
+                self._ghost[key] = None
+                if len(self._ghost) > self.maxsize:
+                    self._ghost.popitem(last=False)
+                self.evictions += 1
+                return
+
+        while self._main:
+            key = self._main.popleft()
+            entry = self._entries[key]
+            if entry[1] > 0:
+                entry[1] -= 1
+                self._main.append(key)
+                continue
+
+            del self._entries[key]
+            self.evictions += 1
+            return
+
+    def clear(self):
+        # type: () -> None
+        with self.lock:
+            self._entries.clear()
+            self._small.clear()
+            self._main.clear()
+            self._ghost.clear()
+
 
 def cached(maxsize=256):
     # type: (int) -> Callable[[F], F]
-    """Decorator for memoizing functions of a single argument (LFU policy)."""
+    """Decorator for memoizing functions of a single argument (S3-FIFO policy)."""
 
     def cached_wrapper(f):
         # type: (F) -> F
-        cache = LFUCache(maxsize)
+        cache = S3FIFOCache(maxsize)
 
         def cached_f(key):
             # type: (T) -> Any
             return cache.get(key, f)
 
         cached_f.invalidate = cache.clear  # type: ignore[attr-defined]
+        cached_f.cache = cache  # type: ignore[attr-defined]
 
         return cached_f
 
@@ -102,7 +177,7 @@ class CachedMethodDescriptor(object):
 
 def cachedmethod(maxsize=256):
     # type: (int) -> Callable[[M], CachedMethodDescriptor]
-    """Decorator for memoizing methods of a single argument (LFU policy)."""
+    """Decorator for memoizing methods of a single argument (S3-FIFO policy)."""
 
     def cached_wrapper(f):
         # type: (M) -> CachedMethodDescriptor
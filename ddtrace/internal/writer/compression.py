@@ -0,0 +1,49 @@
+"""Compression of trace payloads sent to the Datadog agent."""
+import gzip
+from typing import Dict  # noqa:F401
+from typing import Optional  # noqa:F401
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# The key of the agent ``/info`` response that lists the content encodings
+# accepted for trace payloads.
+AGENT_INFO_CONTENT_ENCODINGS_KEY = "content_encodings"
+
+
+def available_encodings():
+    # type: () -> list
+    """Return the encodings supported by the tracer, preferred first."""
+    encodings = [GZIP]
+    if zstandard is not None:
+        encodings.insert(0, ZSTD)
+    return encodings
+
+
+def negotiate(agent_info):
+    # type: (Optional[Dict]) -> Optional[str]
+    """Return the preferred encoding supported by both the tracer and the agent."""
+    if not agent_info:
+        return None
+    accepted = agent_info.get(AGENT_INFO_CONTENT_ENCODINGS_KEY) or []
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(payload, encoding):
+    # type: (bytes, str) -> bytes
+    if encoding == GZIP:
+        # DEV: favor speed over ratio, as for data streams payloads
+        return gzip.compress(payload, 1)
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=1).compress(payload)
+    raise ValueError("Unsupported content encoding: %s" % encoding)
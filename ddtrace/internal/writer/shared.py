@@ -0,0 +1,122 @@
+import mmap
+import multiprocessing
+import os
+import struct
+from typing import Optional  # noqa:F401
+from typing import Tuple  # noqa:F401
+
+from ..logger import get_logger
+
+
+log = get_logger(__name__)
+
+# The read and write positions are ever increasing byte counters. The
+# position in the data region is the counter modulo the capacity.
+_HEADER = struct.Struct("<QQ")
+# Every record is a size, a trace count and an endpoint length, followed by
+# the endpoint and the payload.
+_RECORD = struct.Struct("<IIH")
+
+
+class SharedPayloadRing(object):
+    """A FIFO of encoded payloads in anonymous shared memory.
+
+    The ring is created by the process that uploads the payloads, before it
+    forks the processes that produce them. Producers append payloads to the
+    ring with :meth:`put`, and the owner process drains it with :meth:`get`.
+    Records that do not fit at the end of the data region wrap around to its
+    start. When the ring is full, new payloads are rejected so that the owner
+    never reads a record that is being overwritten.
+    """
+
+    # How long to wait for the lock before giving up. A process that dies
+    # while holding the lock must not stall all the others forever.
+    LOCK_TIMEOUT = 0.5
+
+    def __init__(self, capacity):
+        # type: (int) -> None
+        if capacity <= _RECORD.size:
+            raise ValueError("Shared payload ring capacity must be larger than %d bytes" % _RECORD.size)
+        self.capacity = capacity
+        self.pid = os.getpid()
+        self._lock = multiprocessing.Lock()
+        self._mmap = mmap.mmap(-1, _HEADER.size + capacity, flags=mmap.MAP_SHARED)
+
+    @property
+    def is_owner(self):
+        # type: () -> bool
+        """Whether the current process is the one that drains the ring."""
+        return os.getpid() == self.pid
+
+    def _positions(self):
+        # type: () -> Tuple[int, int]
+        return _HEADER.unpack_from(self._mmap, 0)
+
+    def _copy_in(self, position, data):
+        # type: (int, bytes) -> None
+        start = position % self.capacity
+        head = min(len(data), self.capacity - start)
+        offset = _HEADER.size + start
+        self._mmap[offset : offset + head] = data[:head]
+        if head < len(data):
+            self._mmap[_HEADER.size : _HEADER.size + len(data) - head] = data[head:]
+
+    def _copy_out(self, position, size):
+        # type: (int, int) -> bytes
+        start = position % self.capacity
+        head = min(size, self.capacity - start)
+        offset = _HEADER.size + start
+        data = self._mmap[offset : offset + head]
+        if head < size:
+            data += self._mmap[_HEADER.size : _HEADER.size + size - head]
+        return data
+
+    def put(self, payload, count, endpoint):
+        # type: (bytes, int, str) -> bool
+        """Append an encoded payload to the ring.
+
+        Return whether the payload was stored.
+        """
+        endpoint_bytes = endpoint.encode("utf-8")
+        size = _RECORD.size + len(endpoint_bytes) + len(payload)
+        if size > self.capacity:
+            return False
+        if not self._lock.acquire(timeout=self.LOCK_TIMEOUT):
+            log.debug("timed out waiting for the shared payload ring lock")
+            return False
+        try:
+            read, write = self._positions()
+            if write - read + size > self.capacity:
+                return False
+            self._copy_in(write, _RECORD.pack(len(payload), count, len(endpoint_bytes)) + endpoint_bytes + payload)
+            _HEADER.pack_into(self._mmap, 0, read, write + size)
+        finally:
+            self._lock.release()
+        return True
+
+    def get(self):
+        # type: () -> Optional[Tuple[bytes, int, str]]
+        """Remove the oldest payload from the ring and return it, if any."""
+        if not self._lock.acquire(timeout=self.LOCK_TIMEOUT):
+            log.debug("timed out waiting for the shared payload ring lock")
+            return None
+        try:
+            read, write = self._positions()
+            if read == write:
+                return None
+            size, count, endpoint_size = _RECORD.unpack(self._copy_out(read, _RECORD.size))
+            data = self._copy_out(read + _RECORD.size, endpoint_size + size)
+            _HEADER.pack_into(self._mmap, 0, read + _RECORD.size + endpoint_size + size, write)
+        finally:
+            self._lock.release()
+        return data[endpoint_size:], count, data[:endpoint_size].decode("utf-8")
+
+    def __len__(self):
+        # type: () -> int
+        """Return the number of bytes used in the ring."""
+        read, write = self._positions()
+        return write - read
+
+    def close(self):
+        # type: () -> None
+        self._mmap.close()
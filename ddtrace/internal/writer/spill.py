@@ -0,0 +1,122 @@
+from collections import deque
+import mmap
+import os
+import tempfile
+import threading
+from typing import Deque  # noqa:F401
+from typing import NamedTuple
+from typing import Optional  # noqa:F401
+from typing import Tuple  # noqa:F401
+
+from ..logger import get_logger
+
+
+log = get_logger(__name__)
+
+
+class _Record(NamedTuple):
+    offset: int
+    size: int
+    count: int
+    endpoint: str
+
+
+class SpillQueue(object):
+    """A size-capped FIFO of encoded payloads backed by a memory-mapped file.
+
+    Payloads that could not be sent are appended to a ring file, so that they
+    do not add to the process heap while the agent is unreachable. When a new
+    payload does not fit, the oldest payloads are evicted first. Every process
+    uses its own file, so a queue inherited from the parent process after a
+    fork must not be used by the child.
+    """
+
+    def __init__(self, directory, max_size):
+        # type: (str, int) -> None
+        if max_size <= 0:
+            raise ValueError("Spill queue max size must be positive")
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._records = deque()  # type: Deque[_Record]
+        self._write_offset = 0
+        self._pid = os.getpid()
+
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="ddtrace-spill-%d-" % self._pid, dir=directory)
+        try:
+            os.ftruncate(fd, max_size)
+            self._mmap = mmap.mmap(fd, max_size)  # type: Optional[mmap.mmap]
+        finally:
+            os.close(fd)
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._records)
+
+    @property
+    def count(self):
+        # type: () -> int
+        """Return the number of traces in the queue."""
+        return sum(r.count for r in self._records)
+
+    def _overlaps(self, record, start, end):
+        # type: (_Record, int, int) -> bool
+        return record.offset < end and start < record.offset + record.size
+
+    def put(self, payload, count, endpoint):
+        # type: (bytes, int, str) -> Tuple[bool, int]
+        """Append an encoded payload to the queue.
+
+        Return whether the payload was stored and the number of traces that
+        were evicted to make room for it.
+        """
+        size = len(payload)
+        if size > self.max_size:
+            return False, 0
+
+        evicted = 0
+        with self._lock:
+            if self._mmap is None:
+                return False, 0
+            start = self._write_offset if self._write_offset + size <= self.max_size else 0
+            end = start + size
+            while self._records and any(self._overlaps(r, start, end) for r in self._records):
+                evicted += self._records.popleft().count
+            self._mmap[start:end] = payload
+            self._records.append(_Record(start, size, count, endpoint))
+            self._write_offset = end
+        return True, evicted
+
+    def peek(self):
+        # type: () -> Optional[Tuple[bytes, int, str]]
+        """Return a copy of the oldest payload in the queue, if any."""
+        with self._lock:
+            if not self._records or self._mmap is None:
+                return None
+            record = self._records[0]
+            return self._mmap[record.offset : record.offset + record.size], record.count, record.endpoint
+
+    def pop(self):
+        # type: () -> None
+        """Remove the oldest payload from the queue."""
+        with self._lock:
+            if self._records:
+                self._records.popleft()
+            if not self._records:
+                self._write_offset = 0
+
+    def close(self):
+        # type: () -> None
+        """Release the memory map and remove the backing file."""
+        with self._lock:
+            self._records.clear()
+            if self._mmap is None:
+                return
+            self._mmap.close()
+            self._mmap = None
+            # DEV: the file belongs to the process that created it
+            if os.getpid() == self._pid:
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    log.debug("failed to remove spill file %s", self.path, exc_info=True)
@@ -1,12 +1,14 @@
 import abc
 import binascii
 from collections import defaultdict
+from collections import deque
 import logging
 import os
 import sys
 import threading
 from typing import TYPE_CHECKING
 from typing import Callable
+from typing import Deque  # noqa:F401
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -22,12 +24,15 @@ from ...constants import KEEP_SPANS_RATE_KEY
 from ...internal.utils.formats import parse_tags_str
 from ...internal.utils.http import Response
 from ...internal.utils.time import StopWatch
+from .. import agent
 from .. import compat
+from .. import forksafe
 from .. import periodic
 from .. import service
 from .._encoding import BufferFull
 from .._encoding import BufferItemTooLarge
 from ..agent import get_connection
+from ..connection_pool import get_connection_pool
 from ..constants import _HTTPLIB_NO_TRACE_REQUEST
 from ..encoding import JSONEncoderV2
 from ..logger import get_logger
@@ -35,6 +40,12 @@ from ..runtime import container
 from ..serverless import in_azure_function
 from ..serverless import in_gcp_function
 from ..sma import SimpleMovingAverage
+from ..uwsgi import check_uwsgi
+from ..uwsgi import uWSGIConfigError
+from ..uwsgi import uWSGIMasterProcess
+from . import compression
+from .shared import SharedPayloadRing
+from .spill import SpillQueue
 from .writer_client import WRITER_CLIENTS
 from .writer_client import AgentWriterClientV4
 from .writer_client import WriterClientBase
@@ -45,6 +56,7 @@ if TYPE_CHECKING:  # pragma: no cover
     from typing import Tuple  # noqa:F401
 
     from ddtrace import Span  # noqa:F401
+    from ddtrace._trace.processor import TraceProcessor  # noqa:F401
 
     from .agent import ConnectionType  # noqa:F401
 
@@ -53,6 +65,9 @@ log = get_logger(__name__)
 
 LOG_ERR_INTERVAL = 60
 
+# The agent info field set by agents that accept span events as a span field
+AGENT_INFO_SPAN_EVENTS_KEY = "span_events"
+
 
 class NoEncodableSpansError(Exception):
     pass
@@ -95,6 +110,15 @@ class TraceWriter(metaclass=abc.ABCMeta):
     def flush_queue(self) -> None:
         pass
 
+    def _set_batch_processors(self, processors):
+        # type: (List[TraceProcessor]) -> bool
+        """Apply the given processors to batches of traces right before encoding them.
+
+        Return whether the writer supports it, otherwise the processors have
+        to be applied to each trace when it is written.
+        """
+        return False
+
 
 class LogWriter(TraceWriter):
     def __init__(
@@ -151,11 +175,19 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
         reuse_connections: Optional[bool] = None,
         headers: Optional[Dict[str, str]] = None,
         report_metrics: bool = True,
+        pipelined: Optional[bool] = None,
+        pipeline_max_traces: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        adaptive_flush: bool = False,
+        shared_ring: Optional[SharedPayloadRing] = None,
+        zero_copy: Optional[bool] = None,
     ) -> None:
         if processing_interval is None:
             processing_interval = config._trace_writer_interval_seconds
         if timeout is None:
             timeout = config._agent_timeout_seconds
+        if pipeline_max_traces is not None and pipeline_max_traces <= 0:
+            raise ValueError("Writer pipeline max traces must be positive")
         super(HTTPWriter, self).__init__(interval=processing_interval)
         self.intake_url = intake_url
         self._buffer_size = buffer_size
@@ -184,6 +216,47 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
         self._reuse_connections = (
             config._trace_writer_connection_reuse if reuse_connections is None else reuse_connections
         )
+        self._connection_pool = config._agent_connection_pool_enabled
+        # Content encoding used to compress the payloads, if any
+        self._content_encoding = None  # type: Optional[str]
+
+        # In adaptive mode the writer is woken up as soon as the encoded
+        # traces reach the target payload size, and the flush interval is
+        # stretched, up to a limit, when traffic is too light to reach it.
+        self._adaptive_flush = adaptive_flush
+        self._base_interval = processing_interval
+        self._target_payload_size = config._trace_writer_target_payload_size
+        self._max_interval = max(config._trace_writer_max_interval_seconds, processing_interval)
+        self._flush_requested = False
+        self._last_flush = compat.monotonic()
+
+        # In pipelined mode finished traces are handed off to the periodic
+        # thread, which encodes them right before flushing. This keeps the
+        # encoding cost off the application threads. Appending to and popping
+        # from a deque are atomic operations, so no extra lock is needed.
+        self._pipelined = config._trace_writer_pipelined_encoding if pipelined is None else pipelined
+        self._pipeline_max_traces = pipeline_max_traces or config._trace_writer_pipeline_max_traces
+        self._pending_traces = deque()  # type: Deque[List[Span]]
+        self._batch_processors = []  # type: List[TraceProcessor]
+
+        # Payloads that cannot be sent because the intake is unreachable are
+        # spilled to disk and replayed in order once it is reachable again.
+        self._spill_dir = spill_dir
+        self._spill = None  # type: Optional[SpillQueue]
+        if spill_dir:
+            try:
+                self._spill = SpillQueue(spill_dir, config._trace_writer_spill_max_size)
+            except Exception:
+                log.warning("failed to create trace spill file in %s, spilling is disabled", spill_dir, exc_info=True)
+
+        # With a shared ring, the processes forked from the one that created
+        # it hand their encoded payloads off to it instead of uploading them,
+        # and the creating process drains the ring and uploads them all.
+        self._shared_ring = shared_ring
+
+        # In zero copy mode the payloads are sent straight from the encoder
+        # buffers, which are released as soon as the payloads are sent.
+        self._zero_copy = config._trace_writer_zero_copy_enabled if zero_copy is None else zero_copy
 
     def _intake_endpoint(self, client=None):
         return "{}/{}".format(self._intake_url(client), client.ENDPOINT if client else self._endpoint)
@@ -210,7 +283,7 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
     def _set_drop_rate(self) -> None:
         accepted = self._metrics["accepted_traces"]
         sent = self._metrics["sent_traces"]
-        encoded = sum([len(client.encoder) for client in self._clients])
+        encoded = sum([len(client.encoder) for client in self._clients]) + len(self._pending_traces)
         # The number of dropped traces is the number of accepted traces minus the number of traces in the encoder
         # This calculation is a best effort. Due to race conditions it may result in a slight underestimate.
         dropped = max(accepted - sent - encoded, 0)  # dropped spans should never be negative
@@ -229,6 +302,9 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
                 self._conn = None
 
     def _put(self, data: bytes, headers: Dict[str, str], client: WriterClientBase, no_trace: bool) -> Response:
+        if self._connection_pool:
+            return self._put_with_pool(data, headers, client, no_trace)
+
         sw = StopWatch()
         sw.start()
         with self._conn_lck:
@@ -263,9 +339,27 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
                 if not self._reuse_connections:
                     self._reset_connection()
 
+    def _put_with_pool(
+        self, data: bytes, headers: Dict[str, str], client: WriterClientBase, no_trace: bool
+    ) -> Response:
+        # DEV: the shared pool allows several payloads to be in flight, so a
+        # slow response does not hold the connection lock for other flushes.
+        pool = get_connection_pool(self._intake_url(client), self._timeout)
+        with StopWatch() as sw:
+            log.debug("Sending request: %s %s %s", self.HTTP_METHOD, client.ENDPOINT, headers)
+            response = pool.request(self.HTTP_METHOD, client.ENDPOINT, data, headers, no_trace=no_trace)
+        log.debug("Got response: %s %s", response.status, response.reason)
+        log_level = logging.WARNING if sw.elapsed() >= self.interval else logging.DEBUG
+        log.log(
+            log_level, "sent %s in %.5fs to %s", _human_size(len(data)), sw.elapsed(), self._intake_endpoint(client)
+        )
+        return response
+
     def _get_finalized_headers(self, count: int, client: WriterClientBase) -> dict:
         headers = self._headers.copy()
         headers.update({"Content-Type": client.encoder.content_type})  # type: ignore[attr-defined]
+        if self._content_encoding is not None:
+            headers["Content-Encoding"] = self._content_encoding
         if hasattr(client, "_headers"):
             headers.update(client._headers)
         return headers
@@ -305,16 +399,15 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
         return response
 
     def write(self, spans=None):
+        if self._pipelined and not self._sync_mode and spans is not None:
+            self._enqueue(spans)
+            return
         for client in self._clients:
             self._write_with_client(client, spans=spans)
         if self._sync_mode:
             self.flush_queue()
 
-    def _write_with_client(self, client, spans=None):
-        # type: (WriterClientBase, Optional[List[Span]]) -> None
-        if spans is None:
-            return
-
+    def _start_on_first_write(self) -> None:
         if self._sync_mode is False:
             # Start the HTTPWriter on first write.
             try:
@@ -324,13 +417,84 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
             except service.ServiceStatusError:
                 pass
 
+    def _enqueue(self, spans):
+        # type: (List[Span]) -> None
+        """Hand a finished trace off to the periodic thread for encoding."""
+        self._start_on_first_write()
+
         self._metrics_dist("writer.accepted.traces")
         self._metrics["accepted_traces"] += 1
         self._set_keep_rate(spans)
 
+        if len(self._pending_traces) >= self._pipeline_max_traces:
+            log.warning(
+                "trace hand-off queue (%d traces) is full, dropping (writer status: %s)",
+                self._pipeline_max_traces,
+                self.status.value,
+            )
+            self._metrics_dist("buffer.dropped.traces", len(self._clients), tags=["reason:full"])
+            return
+
+        self._pending_traces.append(spans)
+
+    def _set_batch_processors(self, processors):
+        # type: (List[TraceProcessor]) -> bool
+        # DEV: only pipelined writers process traces in their own thread
+        if not self._pipelined or self._sync_mode:
+            return False
+        self._batch_processors = processors
+        return True
+
+    def _process_batch(self, traces):
+        # type: (List[List[Span]]) -> List[List[Span]]
+        for tp in self._batch_processors:
+            try:
+                traces = tp.process_traces(traces)
+            except Exception:
+                log.error("error applying processor %r", tp, exc_info=True)
+        return traces
+
+    def _drain_pending_traces(self) -> None:
+        """Encode all the traces that have been handed off by the application threads."""
+        pending = self._pending_traces
+        batch = []
+        while pending:
+            try:
+                batch.append(pending.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return
+        if self._batch_processors:
+            n_traces = len(batch)
+            batch = self._process_batch(batch)
+            # Traces dropped by the processors are not dropped by the writer
+            self._metrics["accepted_traces"] -= n_traces - len(batch)
+        for spans in batch:
+            for client in self._clients:
+                self._encode_with_client(client, spans)
+
+    def _write_with_client(self, client, spans=None):
+        # type: (WriterClientBase, Optional[List[Span]]) -> None
+        if spans is None:
+            return
+
+        self._start_on_first_write()
+
+        self._metrics_dist("writer.accepted.traces")
+        self._metrics["accepted_traces"] += 1
+        self._set_keep_rate(spans)
+
+        self._encode_with_client(client, spans)
+
+    def _encode_with_client(self, client, spans):
+        # type: (WriterClientBase, List[Span]) -> None
         try:
             client.encoder.put(spans)
         except BufferItemTooLarge as e:
+            if len(spans) > 1:
+                self._encode_chunks_with_client(client, spans, *e.args)
+                return
             payload_size = e.args[0]
             log.warning(
                 "trace (%db) larger than payload buffer item limit (%db), dropping",
@@ -356,9 +520,72 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
         else:
             self._metrics_dist("buffer.accepted.traces", 1)
             self._metrics_dist("buffer.accepted.spans", len(spans))
+            if self._adaptive_flush and not self._flush_requested and client.encoder.size >= self._target_payload_size:
+                self._request_flush()
+
+    def _encode_chunks_with_client(self, client, spans, payload_size, n_encoded=None):
+        # type: (WriterClientBase, List[Span], int, Optional[int]) -> None
+        """Split a trace that is too large for a payload item into chunks that fit.
+
+        ``payload_size`` is the size of the first ``n_encoded`` spans of the
+        trace, at which the encoder gave up. The chunks are tagged like the
+        partial flushes of the span aggregator, and chunks that are still too
+        large are split again.
+        """
+        if n_encoded is None:
+            n_encoded = len(spans)
+        # Leave some room for spans larger than the ones encoded so far
+        chunk_size = max(int(n_encoded * 0.8 * client.encoder.max_item_size / payload_size), 1)
+        log.debug(
+            "trace (%d spans) larger than payload buffer item limit, splitting it in chunks of %d spans",
+            len(spans),
+            chunk_size,
+        )
+        self._metrics_dist("buffer.split.traces", 1)
+        for i in range(0, len(spans), chunk_size):
+            chunk = spans[i : i + chunk_size]
+            chunk[0].set_metric("_dd.py.partial_flush", len(chunk))
+            self._encode_with_client(client, chunk)
+
+    def _request_flush(self) -> None:
+        """Wake the periodic thread up to flush without waiting for the interval to elapse."""
+        self._flush_requested = True
+        worker = self._worker
+        if worker is not None:
+            try:
+                worker.wake()
+            except RuntimeError:
+                # The thread has not been started yet
+                pass
+
+    def _adapt_interval(self) -> None:
+        """Choose the next flush interval so that payloads get close to the target size."""
+        now = compat.monotonic()
+        elapsed, self._last_flush = now - self._last_flush, now
+        size = sum(client.encoder.size for client in self._clients)
+        max_size = sum(client.encoder.max_size for client in self._clients)
+        self._flush_requested = False
+
+        if size >= self._target_payload_size:
+            interval = self._base_interval
+        elif size:
+            interval = min(max(elapsed * self._target_payload_size / size, self._base_interval), self._max_interval)
+        else:
+            interval = self._max_interval
+        if interval != self.interval:
+            self.interval = interval
+
+        self._metrics_dist("writer.flush.interval", elapsed)
+        if max_size:
+            self._metrics_dist("writer.buffer.fill_ratio", size / max_size)
 
     def flush_queue(self, raise_exc: bool = False):
         try:
+            self._drain_pending_traces()
+            if self._spill is not None:
+                self._replay_spilled()
+            if self._shared_ring is not None and self._shared_ring.is_owner:
+                self._drain_shared_ring(raise_exc=raise_exc)
             for client in self._clients:
                 self._flush_queue_with_client(client, raise_exc=raise_exc)
         finally:
@@ -367,7 +594,10 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
     def _flush_queue_with_client(self, client: WriterClientBase, raise_exc: bool = False) -> None:
         n_traces = len(client.encoder)
         try:
-            encoded, n_traces = client.encoder.encode()
+            if self._zero_copy:
+                encoded, n_traces = client.encoder.encode_buffer()
+            else:
+                encoded, n_traces = client.encoder.encode()
             if encoded is None:
                 return
         except Exception:
@@ -376,10 +606,35 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
             self._metrics_dist("encoder.dropped.traces", n_traces)
             return
 
+        try:
+            if self._shared_ring is not None and not self._shared_ring.is_owner:
+                self._hand_off_payload(encoded, n_traces, client)
+                return
+            self._send_encoded(encoded, n_traces, client, raise_exc=raise_exc)
+        finally:
+            if self._zero_copy:
+                # Free the encoder buffer the payload was sent from
+                encoded.release()
+
+    def _send_encoded(self, encoded: bytes, n_traces: int, client: WriterClientBase, raise_exc: bool = False) -> None:
+        if self._content_encoding is not None:
+            try:
+                size = len(encoded)
+                encoded = compression.compress(encoded, self._content_encoding)
+                self._metrics_dist("http.compressed.bytes", size - len(encoded))
+            except Exception:
+                log.error("failed to compress trace payload with %s", self._content_encoding, exc_info=True)
+                self._metrics_dist("encoder.dropped.traces", n_traces)
+                return
+
         try:
             self._send_payload_with_backoff(encoded, n_traces, client)
         except Exception:
             self._metrics_dist("http.errors", tags=["type:err"])
+            if self._spill_payload(encoded, n_traces, client):
+                if raise_exc:
+                    raise
+                return
             self._metrics_dist("http.dropped.bytes", len(encoded))
             self._metrics_dist("http.dropped.traces", n_traces)
             if raise_exc:
@@ -395,7 +650,89 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
             self._metrics_dist("http.sent.bytes", len(encoded))
             self._metrics_dist("http.sent.traces", n_traces)
 
+    def _spill_payload(self, payload: bytes, count: int, client: WriterClientBase) -> bool:
+        """Store a payload that could not be sent to replay it later."""
+        if self._spill is None:
+            return False
+        stored, evicted = self._spill.put(payload, count, client.ENDPOINT)
+        if evicted:
+            log.warning("trace spill file %s is full, dropping %d oldest traces", self._spill.path, evicted)
+            self._metrics_dist("spill.dropped.traces", evicted, tags=["reason:full"])
+        if not stored:
+            return False
+        log.debug("failed to send %d traces to intake at %s, spilled to disk", count, self._intake_endpoint(client))
+        self._metrics_dist("spill.accepted.traces", count)
+        self._metrics_dist("spill.accepted.bytes", len(payload))
+        return True
+
+    def _replay_spilled(self) -> None:
+        """Send the spilled payloads, oldest first, until the intake fails again."""
+        spill = self._spill
+        if spill is None:
+            return
+        clients = {client.ENDPOINT: client for client in self._clients}
+        while True:
+            item = spill.peek()
+            if item is None:
+                return
+            payload, count, endpoint = item
+            client = clients.get(endpoint)
+            if client is None:
+                # The payload was encoded for an endpoint that is no longer used
+                spill.pop()
+                self._metrics_dist("spill.dropped.traces", count, tags=["reason:incompatible"])
+                continue
+            try:
+                self._send_payload(payload, count, client)
+            except Exception:
+                log.debug("intake at %s is still unreachable, keeping spilled traces", self._intake_endpoint(client))
+                return
+            spill.pop()
+            self._metrics_dist("spill.replayed.traces", count)
+
+    def _hand_off_payload(self, payload: bytes, count: int, client: WriterClientBase) -> None:
+        """Hand an encoded payload off to the process that owns the shared ring."""
+        if self._shared_ring is None:
+            return
+        if not self._shared_ring.put(payload, count, client.ENDPOINT):
+            log.warning("shared trace payload ring is full, dropping %d traces", count)
+            self._metrics_dist("shared.dropped.traces", count, tags=["reason:full"])
+            return
+        self._metrics["sent_traces"] += count
+        self._metrics_dist("shared.accepted.traces", count)
+        self._metrics_dist("shared.accepted.bytes", len(payload))
+
+    def _drain_shared_ring(self, raise_exc: bool = False) -> None:
+        """Upload the payloads that have been handed off by the forked processes."""
+        ring = self._shared_ring
+        if ring is None:
+            return
+        clients = {client.ENDPOINT: client for client in self._clients}
+        while True:
+            item = ring.get()
+            if item is None:
+                return
+            payload, count, endpoint = item
+            client = clients.get(endpoint)
+            if client is None:
+                # The payload was encoded for an endpoint that is no longer used
+                self._metrics_dist("shared.dropped.traces", count, tags=["reason:incompatible"])
+                continue
+            self._send_encoded(payload, count, client, raise_exc=raise_exc)
+
+    def _start_shared_sender(self) -> None:
+        """Start uploading the payloads of the forked processes from this one."""
+        if self._shared_ring is None or not self._shared_ring.is_owner:
+            return
+        try:
+            if self.status != service.ServiceStatus.RUNNING:
+                self.start()
+        except service.ServiceStatusError:
+            pass
+
     def periodic(self):
+        if self._adaptive_flush:
+            self._adapt_interval()
         self.flush_queue(raise_exc=False)
 
     def _stop_service(
@@ -411,6 +748,11 @@ class HTTPWriter(periodic.PeriodicService, TraceWriter):
             self.periodic()
         finally:
             self._reset_connection()
+            if self._spill is not None:
+                if len(self._spill):
+                    log.warning("dropping %d spilled traces that could not be sent before shutdown", self._spill.count)
+                    self._metrics_dist("spill.dropped.traces", self._spill.count, tags=["reason:shutdown"])
+                self._spill.close()
 
 
 class AgentResponse(object):
@@ -446,11 +788,32 @@ class AgentWriter(HTTPWriter):
         reuse_connections: Optional[bool] = None,
         headers: Optional[Dict[str, str]] = None,
         response_callback: Optional[Callable[[AgentResponse], None]] = None,
+        pipelined: Optional[bool] = None,
+        pipeline_max_traces: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        compression_enabled: Optional[bool] = None,
+        adaptive_flush: Optional[bool] = None,
+        native_span_events: Optional[bool] = None,
+        shared_sender: Optional[bool] = None,
+        shared_ring: Optional[SharedPayloadRing] = None,
+        zero_copy: Optional[bool] = None,
     ) -> None:
         if processing_interval is None:
             processing_interval = config._trace_writer_interval_seconds
         if timeout is None:
             timeout = config._agent_timeout_seconds
+        if compression_enabled is None:
+            compression_enabled = config._trace_writer_compression_enabled
+        if native_span_events is None:
+            native_span_events = config._trace_native_span_events
+        if adaptive_flush is None:
+            adaptive_flush = config._trace_writer_adaptive_flush_enabled
+        if spill_dir is None:
+            spill_dir = config._trace_writer_spill_dir
+        if shared_sender is None:
+            shared_sender = config._trace_writer_shared_sender_enabled
+        if shared_sender and shared_ring is None:
+            shared_ring = self._create_shared_ring()
         if buffer_size is not None and buffer_size <= 0:
             raise ValueError("Writer buffer size must be positive")
         if max_payload_size is not None and max_payload_size <= 0:
@@ -514,13 +877,31 @@ class AgentWriter(HTTPWriter):
             reuse_connections=reuse_connections,
             headers=_headers,
             report_metrics=report_metrics,
+            pipelined=pipelined,
+            pipeline_max_traces=pipeline_max_traces,
+            spill_dir=spill_dir,
+            adaptive_flush=adaptive_flush,
+            shared_ring=shared_ring,
+            zero_copy=zero_copy,
+        )
+        self._shared_sender = shared_sender
+        self._compression_enabled = compression_enabled
+        self._native_span_events = native_span_events
+        # The features supported by the agent are negotiated on the first
+        # flush, from the writer thread. Processes that hand their payloads
+        # off to a shared sender do not connect to the agent.
+        self._agent_negotiated = not (compression_enabled or native_span_events) or (
+            shared_ring is not None and not shared_ring.is_owner
         )
+        self._agent_native_span_events = False
+        if shared_ring is not None and shared_ring.is_owner:
+            self._register_shared_sender()
 
     def recreate(self):
         # type: () -> HTTPWriter
         return self.__class__(
             agent_url=self.agent_url,
-            processing_interval=self._interval,
+            processing_interval=self._base_interval,
             buffer_size=self._buffer_size,
             max_payload_size=self._max_payload_size,
             timeout=self._timeout,
@@ -529,8 +910,39 @@ class AgentWriter(HTTPWriter):
             api_version=self._api_version,
             headers=self._headers,
             report_metrics=self._report_metrics,
+            pipelined=self._pipelined,
+            pipeline_max_traces=self._pipeline_max_traces,
+            spill_dir=self._spill_dir,
+            compression_enabled=self._compression_enabled,
+            native_span_events=self._native_span_events,
+            adaptive_flush=self._adaptive_flush,
+            shared_sender=self._shared_sender,
+            shared_ring=self._shared_ring,
+            zero_copy=self._zero_copy,
         )
 
+    @staticmethod
+    def _create_shared_ring() -> Optional[SharedPayloadRing]:
+        try:
+            return SharedPayloadRing(config._trace_writer_shared_sender_buffer_size)
+        except Exception:
+            log.warning("failed to create the shared trace payload ring, the shared sender is disabled", exc_info=True)
+            return None
+
+    def _register_shared_sender(self) -> None:
+        # The sender has to be running in this process before the workers
+        # are forked, since nothing is traced here to start it on first write.
+        try:
+            check_uwsgi()
+        except uWSGIMasterProcess:
+            # uWSGI forks the workers without running the fork hooks
+            self._start_shared_sender()
+        except uWSGIConfigError:
+            log.warning("uWSGI is not configured to run threads, the shared trace sender is disabled", exc_info=True)
+            self._shared_ring = None
+            return
+        forksafe.register_before_fork(self._start_shared_sender)
+
     @property
     def agent_url(self):
         return self.intake_url
@@ -542,6 +954,7 @@ class AgentWriter(HTTPWriter):
     def _downgrade(self, response, client):
         if client.ENDPOINT == "v0.5/traces":
             self._clients = [AgentWriterClientV4(self._buffer_size, self._max_payload_size)]
+            self._set_native_span_events()
             # Since we have to change the encoding in this case, the payload
             # would need to be converted to the downgraded encoding before
             # sending it, but we chuck it away instead.
@@ -561,9 +974,51 @@ class AgentWriter(HTTPWriter):
                 self.intake_url,
             )
 
+    def _negotiate_with_agent(self) -> None:
+        try:
+            info = agent.info(self.agent_url)
+        except Exception:
+            # Try again on the next flush
+            log.debug("failed to get agent info to negotiate trace payload features", exc_info=True)
+            return
+        self._agent_negotiated = True
+
+        if self._compression_enabled:
+            self._content_encoding = compression.negotiate(info)
+            if self._content_encoding is None:
+                log.debug("the agent at %s does not accept compressed trace payloads", self.agent_url)
+            else:
+                log.debug("compressing trace payloads with %s", self._content_encoding)
+
+        if self._native_span_events:
+            self._agent_native_span_events = bool(info and info.get(AGENT_INFO_SPAN_EVENTS_KEY))
+            if self._agent_native_span_events:
+                log.debug("encoding span events natively in v0.4 trace payloads")
+            self._set_native_span_events()
+
+    def _set_native_span_events(self) -> None:
+        # DEV: only the v0.4 encoder supports native span events, the
+        #      others keep encoding them as JSON in the span tags.
+        for client in self._clients:
+            if isinstance(client, AgentWriterClientV4):
+                client.encoder.native_span_events = self._agent_native_span_events
+
+    def flush_queue(self, raise_exc: bool = False):
+        if not self._agent_negotiated:
+            self._negotiate_with_agent()
+        super(AgentWriter, self).flush_queue(raise_exc=raise_exc)
+
     def _send_payload(self, payload, count, client) -> Response:
         response = super(AgentWriter, self)._send_payload(payload, count, client)
-        if response.status in [404, 415]:
+        if response.status == 415 and self._content_encoding is not None:
+            log.warning(
+                "Calling endpoint '%s' with %s content encoding but received %s; disabling trace payload compression.",
+                client.ENDPOINT,
+                self._content_encoding,
+                response.status,
+            )
+            self._content_encoding = None
+        elif response.status in [404, 415]:
             self._downgrade(response, client)
         elif response.status < 400:
             if self._response_cb:
@@ -576,6 +1031,11 @@ class AgentWriter(HTTPWriter):
                     )
         return response
 
+    def on_shutdown(self):
+        if self._shared_ring is not None and self._shared_ring.is_owner:
+            forksafe.unregister_before_fork(self._start_shared_sender)
+        super(AgentWriter, self).on_shutdown()
+
     def start(self):
         super(AgentWriter, self).start()
         try:
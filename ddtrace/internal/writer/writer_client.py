@@ -1,5 +1,23 @@
+from ddtrace.settings import _config as config
+
 from .._encoding import BufferedEncoder
 from ..encoding import MSGPACK_ENCODERS
+from ..encoding import RingBufferedEncoder
+
+
+def _msgpack_encoder(api_version, buffer_size, max_payload_size):
+    encoder_cls = MSGPACK_ENCODERS[api_version]
+    n_buffers = config._trace_writer_encoder_buffers
+    if n_buffers > 1:
+        encoder = RingBufferedEncoder(encoder_cls, buffer_size, max_payload_size, n_buffers)
+    else:
+        encoder = encoder_cls(
+            max_size=buffer_size,
+            max_item_size=max_payload_size,
+        )
+    if api_version == "v0.5":
+        encoder.warm_strings = config._trace_writer_string_table_warm_size
+    return encoder
 
 
 class WriterClientBase(object):
@@ -18,24 +36,14 @@ class AgentWriterClientV5(WriterClientBase):
     ENDPOINT = "v0.5/traces"
 
     def __init__(self, buffer_size, max_payload_size):
-        super(AgentWriterClientV5, self).__init__(
-            MSGPACK_ENCODERS["v0.5"](
-                max_size=buffer_size,
-                max_item_size=max_payload_size,
-            )
-        )
+        super(AgentWriterClientV5, self).__init__(_msgpack_encoder("v0.5", buffer_size, max_payload_size))
 
 
 class AgentWriterClientV4(WriterClientBase):
     ENDPOINT = "v0.4/traces"
 
     def __init__(self, buffer_size, max_payload_size):
-        super(AgentWriterClientV4, self).__init__(
-            MSGPACK_ENCODERS["v0.4"](
-                max_size=buffer_size,
-                max_item_size=max_payload_size,
-            )
-        )
+        super(AgentWriterClientV4, self).__init__(_msgpack_encoder("v0.4", buffer_size, max_payload_size))
 
 
 WRITER_CLIENTS = {
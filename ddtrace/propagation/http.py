@@ -964,21 +964,91 @@ _PROP_STYLES = {
 }
 
 
+# The headers read by the extractor of every propagation style, with lowercase
+# names, so that the incoming headers can be matched in a single pass
+_EXTRACT_HEADER_STYLES = {
+    name: style
+    for style, possible_headers in (
+        (
+            PROPAGATION_STYLE_DATADOG,
+            (
+                POSSIBLE_HTTP_HEADER_TRACE_IDS,
+                POSSIBLE_HTTP_HEADER_PARENT_IDS,
+                POSSIBLE_HTTP_HEADER_SAMPLING_PRIORITIES,
+                POSSIBLE_HTTP_HEADER_ORIGIN,
+                _POSSIBLE_HTTP_HEADER_TAGS,
+            ),
+        ),
+        (
+            PROPAGATION_STYLE_B3_MULTI,
+            (
+                _POSSIBLE_HTTP_HEADER_B3_TRACE_IDS,
+                _POSSIBLE_HTTP_HEADER_B3_SPAN_IDS,
+                _POSSIBLE_HTTP_HEADER_B3_SAMPLEDS,
+                _POSSIBLE_HTTP_HEADER_B3_FLAGS,
+            ),
+        ),
+        (PROPAGATION_STYLE_B3_SINGLE, (_POSSIBLE_HTTP_HEADER_B3_SINGLE_HEADER,)),
+        (_PROPAGATION_STYLE_W3C_TRACECONTEXT, (_POSSIBLE_HTTP_HEADER_TRACEPARENT, _POSSIBLE_HTTP_HEADER_TRACESTATE)),
+        (_PROPAGATION_STYLE_BAGGAGE, (frozenset([_HTTP_HEADER_BAGGAGE]),)),
+    )
+    for names in possible_headers
+    for name in names
+}  # type: Dict[str, str]
+
+
+def _normalize_extract_headers(headers, ot_baggage=False):
+    # type: (Dict[str, str], bool) -> Tuple[Dict[str, str], FrozenSet[str]]
+    """Return the headers read by the extractors, with lowercase names, and the
+    propagation styles that they belong to.
+
+    ``ot-baggage-*`` headers are only kept when ``ot_baggage`` is set.
+    """
+    lowered_headers = {name.lower(): v for name, v in headers.items()}
+    normalized_headers = {name: v for name, v in lowered_headers.items() if name in _EXTRACT_HEADER_STYLES}
+    styles = frozenset(_EXTRACT_HEADER_STYLES[name] for name in normalized_headers)
+    if ot_baggage:
+        for name, v in lowered_headers.items():
+            if name.startswith(_HTTP_BAGGAGE_PREFIX):
+                normalized_headers[name] = v
+    return normalized_headers, styles
+
+
+def _injected_headers_key(span_context):
+    # type: (Context) -> Tuple[Any, ...]
+    """Return the state that the propagation headers injected for a context are rendered from.
+
+    The ``_meta`` items cover the origin, the propagation tags and the W3C headers of the context.
+    """
+    return (
+        span_context.trace_id,
+        span_context.span_id,
+        span_context._is_remote,
+        span_context.sampling_priority,
+        tuple(span_context._meta.items()),
+        tuple(config._propagation_style_inject),
+        config._x_datadog_tags_enabled,
+        config._x_datadog_tags_max_length,
+        asm_config._appsec_standalone_enabled,
+    )
+
+
 class HTTPPropagator(object):
     """A HTTP Propagator using HTTP headers as carrier. Injects and Extracts headers
     according to the propagation style set by ddtrace configurations.
     """
 
     @staticmethod
-    def _extract_configured_contexts_avail(normalized_headers):
+    def _extract_configured_contexts_avail(normalized_headers, styles_w_headers):
         contexts = []
         styles_w_ctx = []
         for prop_style in config._propagation_style_extract:
+            # baggage is handled separately, and the other styles can only
+            # extract a context from their own headers
+            if prop_style == _PROPAGATION_STYLE_BAGGAGE or prop_style not in styles_w_headers:
+                continue
             propagator = _PROP_STYLES[prop_style]
             context = propagator._extract(normalized_headers)
-            # baggage is handled separately
-            if prop_style == _PROPAGATION_STYLE_BAGGAGE:
-                continue
             if context:
                 contexts.append(context)
                 styles_w_ctx.append(prop_style)
@@ -989,8 +1059,7 @@ class HTTPPropagator(object):
         primary_context = contexts[0]
         links = []
 
-        for context in contexts[1:]:
-            style_w_ctx = styles_w_ctx[contexts.index(context)]
+        for context, style_w_ctx in zip(contexts[1:], styles_w_ctx[1:]):
             # encoding expects at least trace_id and span_id
             if context.span_id and context.trace_id and context.trace_id != primary_context.trace_id:
                 links.append(
@@ -1094,14 +1163,26 @@ class HTTPPropagator(object):
 
             _inject_llmobs_parent_id(span_context)
 
+        # The headers of the propagation styles only depend on the state of the context, which
+        # rarely changes between the downstream calls made on behalf of the same span
+        injected_headers = span_context._injected_headers
+        if injected_headers is not None and injected_headers[0] == _injected_headers_key(span_context):
+            headers.update(injected_headers[1])
+            return
+
+        rendered_headers = {}  # type: Dict[str, str]
         if PROPAGATION_STYLE_DATADOG in config._propagation_style_inject:
-            _DatadogMultiHeader._inject(span_context, headers)
+            _DatadogMultiHeader._inject(span_context, rendered_headers)
         if PROPAGATION_STYLE_B3_MULTI in config._propagation_style_inject:
-            _B3MultiHeader._inject(span_context, headers)
+            _B3MultiHeader._inject(span_context, rendered_headers)
         if PROPAGATION_STYLE_B3_SINGLE in config._propagation_style_inject:
-            _B3SingleHeader._inject(span_context, headers)
+            _B3SingleHeader._inject(span_context, rendered_headers)
         if _PROPAGATION_STYLE_W3C_TRACECONTEXT in config._propagation_style_inject:
-            _TraceContext._inject(span_context, headers)
+            _TraceContext._inject(span_context, rendered_headers)
+        headers.update(rendered_headers)
+        # DEV: the key is computed once the headers are rendered, since rendering can
+        # add tags to the context, e.g. the higher order bits of the trace id
+        span_context._injected_headers = (_injected_headers_key(span_context), rendered_headers)
 
     @staticmethod
     def extract(headers):
@@ -1129,7 +1210,15 @@ class HTTPPropagator(object):
         if not headers:
             return Context()
         try:
-            normalized_headers = {name.lower(): v for name, v in headers.items()}
+            normalized_headers, styles_w_headers = _normalize_extract_headers(
+                headers, ot_baggage=config._propagation_http_baggage_enabled is True
+            )
+            if not normalized_headers:
+                # No tracing headers at all, which is the case of most public ingress requests
+                if config._propagation_extract_first and config._propagation_style_extract:
+                    return _PROP_STYLES[config._propagation_style_extract[0]]._extract(normalized_headers)
+                return Context()
+
             context = Context()
             # tracer configured to extract first only
             if config._propagation_extract_first:
@@ -1143,7 +1232,9 @@ class HTTPPropagator(object):
 
             # loop through all extract propagation styles
             else:
-                contexts, styles_w_ctx = HTTPPropagator._extract_configured_contexts_avail(normalized_headers)
+                contexts, styles_w_ctx = HTTPPropagator._extract_configured_contexts_avail(
+                    normalized_headers, styles_w_headers
+                )
 
                 if contexts:
                     context = HTTPPropagator._resolve_contexts(contexts, styles_w_ctx, normalized_headers)
@@ -20,7 +20,8 @@ from .internal.constants import DEFAULT_SAMPLING_RATE_LIMIT
 from .internal.constants import MAX_UINT_64BITS as _MAX_UINT_64BITS
 from .internal.logger import get_logger
 from .internal.rate_limiter import RateLimiter
-from .internal.sampling import _get_highest_precedence_rule_matching
+from .internal.rate_limiter import ThreadLocalRateLimiter
+from .internal.sampling import SamplingRuleMatcher
 from .internal.sampling import _set_sampling_tags
 from .sampling_rule import SamplingRule
 from .settings import _config as ddconfig
@@ -203,7 +204,7 @@ class DatadogSampler(RateByServiceSampler):
     per second.
     """
 
-    __slots__ = ("limiter", "rules", "default_sample_rate", "_rate_limit_always_on")
+    __slots__ = ("limiter", "_rules", "_rule_matcher", "default_sample_rate", "_rate_limit_always_on")
 
     NO_RATE_LIMIT = -1
     # deprecate and remove the DEFAULT_RATE_LIMIT field from DatadogSampler
@@ -246,22 +247,26 @@ class DatadogSampler(RateByServiceSampler):
                 rules = self._parse_rules_from_str(env_sampling_rules)
             else:
                 rules = []
-            self.rules = rules
         else:
-            self.rules = []
             # Validate that rules is a list of SampleRules
+            valid_rules = []
             for rule in rules:
                 if isinstance(rule, SamplingRule):
-                    self.rules.append(rule)
+                    valid_rules.append(rule)
                 elif config._raise:
                     raise TypeError("Rule {!r} must be a sub-class of type ddtrace.sampler.SamplingRules".format(rule))
+            rules = valid_rules
 
         # DEV: sampling rule must come last
         if effective_sample_rate is not None:
-            self.rules.append(SamplingRule(sample_rate=effective_sample_rate))
+            rules.append(SamplingRule(sample_rate=effective_sample_rate))
+        self.rules = rules
 
         # Configure rate limiter
-        self.limiter = RateLimiter(rate_limit, rate_limit_window)
+        if ddconfig._trace_rate_limit_per_thread_enabled:
+            self.limiter = ThreadLocalRateLimiter(rate_limit, rate_limit_window)  # type: RateLimiter
+        else:
+            self.limiter = RateLimiter(rate_limit, rate_limit_window)
 
         log.debug("initialized %r", self)
 
@@ -273,6 +278,17 @@ class DatadogSampler(RateByServiceSampler):
 
     __repr__ = __str__
 
+    @property
+    def rules(self):
+        # type: () -> List[SamplingRule]
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules):
+        # type: (List[SamplingRule]) -> None
+        self._rules = rules
+        self._rule_matcher = SamplingRuleMatcher(rules)
+
     @staticmethod
     def _parse_rules_from_str(rules):
         # type: (str) -> List[SamplingRule]
@@ -315,7 +331,11 @@ class DatadogSampler(RateByServiceSampler):
     def sample(self, span):
         span.context._update_tags(span)
 
-        matched_rule = _get_highest_precedence_rule_matching(span, self.rules)
+        matcher = self._rule_matcher
+        if matcher.is_stale(self._rules):
+            # The rules were changed in place
+            matcher = self._rule_matcher = SamplingRuleMatcher(self._rules)
+        matched_rule = matcher.match(span)
 
         sampler = self._default_sampler  # type: BaseSampler
         sample_rate = self.sample_rate
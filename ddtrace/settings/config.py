@@ -412,6 +412,7 @@ class Config(object):
                 rate_limit,
             )
         self._trace_rate_limit = _get_config("DD_TRACE_RATE_LIMIT", DEFAULT_SAMPLING_RATE_LIMIT, int)
+        self._trace_rate_limit_per_thread_enabled = _get_config("DD_TRACE_RATE_LIMIT_PER_THREAD_ENABLED", False, asbool)
         self._partial_flush_enabled = _get_config("DD_TRACE_PARTIAL_FLUSH_ENABLED", True, asbool)
         self._partial_flush_min_spans = _get_config("DD_TRACE_PARTIAL_FLUSH_MIN_SPANS", 300, int)
 
@@ -440,6 +441,24 @@ class Config(object):
             "DD_TRACE_WRITER_REUSE_CONNECTIONS", DEFAULT_REUSE_CONNECTIONS, asbool
         )
         self._trace_writer_log_err_payload = _get_config("_DD_TRACE_WRITER_LOG_ERROR_PAYLOADS", False, asbool)
+        self._trace_writer_pipelined_encoding = _get_config("DD_TRACE_WRITER_PIPELINED_ENCODING", False, asbool)
+        self._trace_writer_pipeline_max_traces = _get_config("DD_TRACE_WRITER_PIPELINE_MAX_TRACES", 10000, int)
+        self._trace_writer_encoder_buffers = _get_config("DD_TRACE_WRITER_ENCODER_BUFFERS", 1, int)
+        self._trace_writer_spill_dir = _get_config("DD_TRACE_WRITER_SPILL_DIR")
+        self._trace_writer_compression_enabled = _get_config("DD_TRACE_WRITER_COMPRESSION_ENABLED", False, asbool)
+        self._trace_native_span_events = _get_config("DD_TRACE_NATIVE_SPAN_EVENTS", False, asbool)
+        self._trace_writer_string_table_warm_size = _get_config("DD_TRACE_WRITER_STRING_TABLE_WARM_SIZE", 0, int)
+        self._trace_writer_zero_copy_enabled = _get_config("DD_TRACE_WRITER_ZERO_COPY_ENABLED", False, asbool)
+        self._trace_writer_adaptive_flush_enabled = _get_config("DD_TRACE_WRITER_ADAPTIVE_FLUSH_ENABLED", False, asbool)
+        self._trace_writer_target_payload_size = _get_config(
+            "DD_TRACE_WRITER_TARGET_PAYLOAD_SIZE_BYTES", DEFAULT_MAX_PAYLOAD_SIZE // 8, int
+        )
+        self._trace_writer_max_interval_seconds = _get_config("DD_TRACE_WRITER_MAX_INTERVAL_SECONDS", 5.0, float)
+        self._trace_writer_spill_max_size = _get_config("DD_TRACE_WRITER_SPILL_MAX_SIZE_BYTES", 64 << 20, int)
+        self._trace_writer_shared_sender_enabled = _get_config("DD_TRACE_WRITER_SHARED_SENDER_ENABLED", False, asbool)
+        self._trace_writer_shared_sender_buffer_size = _get_config(
+            "DD_TRACE_WRITER_SHARED_SENDER_BUFFER_SIZE_BYTES", 32 << 20, int
+        )
 
         self._trace_agent_hostname = _get_config(["DD_AGENT_HOST", "DD_TRACE_AGENT_HOSTNAME"])
         self._trace_agent_port = _get_config(["DD_AGENT_PORT", "DD_TRACE_AGENT_PORT"])
@@ -449,6 +468,7 @@ class Config(object):
         self._stats_agent_port = _get_config("DD_DOGSTATSD_PORT")
         self._stats_agent_url = _get_config("DD_DOGSTATSD_URL")
         self._agent_timeout_seconds = _get_config("DD_TRACE_AGENT_TIMEOUT_SECONDS", DEFAULT_TIMEOUT, float)
+        self._agent_connection_pool_enabled = _get_config("DD_TRACE_AGENT_CONNECTION_POOL_ENABLED", False, asbool)
 
         self._span_traceback_max_size = _get_config("DD_TRACE_SPAN_TRACEBACK_MAX_SIZE", 30, int)
 
@@ -549,10 +569,20 @@ class Config(object):
         # Raise certain errors only if in testing raise mode to prevent crashing in production with non-critical errors
         self._raise = _get_config("DD_TESTING_RAISE", False, asbool)
 
-        trace_compute_stats_default = in_gcp_function() or in_azure_function()
+        self._trace_tail_sampling_enabled = _get_config("DD_TRACE_TAIL_SAMPLING_ENABLED", False, asbool)
+        self._trace_tail_sampling_latency_percentile = _get_config(
+            "DD_TRACE_TAIL_SAMPLING_LATENCY_PERCENTILE", 99.0, float
+        )
+        self._trace_tail_sampling_window_size = _get_config("DD_TRACE_TAIL_SAMPLING_WINDOW_SIZE", 1000, int)
+        # Tail sampling drops traces after the sampling decision, so stats
+        # have to be computed by the tracer to account for them.
+        trace_compute_stats_default = in_gcp_function() or in_azure_function() or self._trace_tail_sampling_enabled
         self._trace_compute_stats = _get_config(
             ["DD_TRACE_COMPUTE_STATS", "DD_TRACE_STATS_COMPUTATION_ENABLED"], trace_compute_stats_default, asbool
         )
+        self._trace_compute_stats_obfuscation_enabled = _get_config(
+            "DD_TRACE_STATS_COMPUTATION_OBFUSCATION_ENABLED", True, asbool
+        )
         self._data_streams_enabled = _get_config("DD_DATA_STREAMS_ENABLED", False, asbool)
 
         legacy_client_tag_enabled = _get_config("DD_HTTP_CLIENT_TAG_QUERY_STRING")
@@ -604,6 +634,7 @@ class Config(object):
                 "revert to using threading.Lock, please contact Datadog support.",
                 removal_version="3.0.0",
             )
+        self._span_aggregator_shards = _get_config("DD_TRACE_SPAN_AGGREGATOR_SHARDS", 1, int)
 
         self._trace_methods = _get_config("DD_TRACE_METHODS")
 
@@ -30,6 +30,22 @@ impl DDSketchPy {
         }
     }
 
+    /// Add all the values of another sketch to this sketch.
+    ///
+    /// The bins of both sketches use the same index mapping, so every bin of
+    /// the other sketch is added to the matching bin of this one with its count.
+    fn merge(&mut self, other: PyRef<DDSketchPy>) -> PyResult<()> {
+        for (value, count) in other.ddsketch.ordered_bins() {
+            if count == 0.0 {
+                continue;
+            }
+            if let Err(e) = self.ddsketch.add_with_count(value, count) {
+                return Err(PyValueError::new_err(e.to_string()));
+            }
+        }
+        Ok(())
+    }
+
     fn to_proto<'p>(&self, py: Python<'p>) -> Bound<'p, PyBytes> {
         let res = self.ddsketch.clone().encode_to_vec();
         PyBytes::new_bound(py, &res)
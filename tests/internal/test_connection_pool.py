@@ -0,0 +1,104 @@
+import http.server
+import socketserver
+import threading
+import time
+
+import pytest
+
+from ddtrace.internal.connection_pool import ConnectionPool
+from ddtrace.internal.connection_pool import get_connection_pool
+
+
+class _KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)
+        body = b"OK"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    httpd = _ThreadingHTTPServer(("localhost", 0), _KeepAliveHandler)
+    t = threading.Thread(target=httpd.serve_forever)
+    t.daemon = True
+    t.start()
+    try:
+        yield "http://localhost:%d" % httpd.server_address[1]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_connection_pool_reuses_connections(server):
+    pool = ConnectionPool(server, timeout=2.0)
+    for _ in range(3):
+        resp = pool.request("PUT", "v0.4/traces", b"payload", {})
+        assert resp.status == 200
+        assert resp.body == b"OK"
+
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 2
+    assert stats["idle"] == 1
+
+
+def test_connection_pool_endpoint_concurrency_limit(server, monkeypatch):
+    monkeypatch.setattr(_KeepAliveHandler, "delay", 0.2)
+    pool = ConnectionPool(server, timeout=2.0, max_in_flight=2, endpoint_limits={"v0.6/stats": 1})
+
+    threads = [threading.Thread(target=pool.request, args=("PUT", "v0.4/traces", b"", {})) for _ in range(2)]
+    threads += [threading.Thread(target=pool.request, args=("PUT", "v0.6/stats", b"", {})) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats()
+    # Both trace payloads are in flight at the same time, the second stats
+    # payload has to wait for the first one.
+    assert stats["waited"] == 1
+    assert stats["created"] == 3
+
+
+def test_connection_pool_retries_stale_connection(server):
+    pool = ConnectionPool(server, timeout=2.0)
+    pool.request("PUT", "v0.4/traces", b"", {})
+    # Simulate the agent closing the idle connection
+    pool._idle[0].sock.close()
+    pool._idle[0].sock = None
+
+    assert pool.request("PUT", "v0.4/traces", b"", {}).status == 200
+
+
+def test_connection_pool_after_fork(server):
+    pool = ConnectionPool(server, timeout=2.0)
+    pool.request("PUT", "v0.4/traces", b"", {})
+    assert pool.stats()["idle"] == 1
+
+    pool._after_fork()
+
+    assert pool.stats() == {"idle": 0}
+
+
+def test_get_connection_pool_is_shared():
+    assert get_connection_pool("http://localhost:8126", 2.0) is get_connection_pool("http://localhost:8126", 2.0)
+    assert get_connection_pool("http://localhost:8126", 2.0) is not get_connection_pool("unix:///tmp/apm.sock", 2.0)
+
+
+def test_connection_pool_invalid_limit():
+    with pytest.raises(ValueError):
+        ConnectionPool("http://localhost:8126", max_in_flight=0)
@@ -119,6 +119,36 @@ class TestContextEventsApi(unittest.TestCase):
 
         assert listener.args == (dynamic_value,)
 
+    def test_core_dispatch_event_handle(self):
+        event = core.event("my.cool.event")
+        assert core.event("my.cool.event") is event
+        assert not event.listened
+
+        # Listeners registered after the handle was resolved are called when dispatching the handle
+        handler = mock.Mock()
+        core.on("my.cool.event", handler)
+        assert event.listened
+        core.dispatch(event, (1, 2))
+        handler.assert_called_once_with(1, 2)
+        assert core.dispatch_with_results(event, (3,))[id(handler)].response_type == core.event_hub.ResultType.RESULT_OK
+
+        core.reset_listeners("my.cool.event")
+        assert core.event("my.cool.event") is event
+        assert not event.listened
+        core.dispatch(event, (4,))
+        assert handler.call_count == 2
+
+    def test_core_context_resolves_events_once(self):
+        handler = mock.Mock()
+        with core.context_with_data("my.cool.context"):
+            pass
+        # The events of the context are dispatched through the handles resolved for its identifier
+        core.on("context.started.my.cool.context", handler)
+        with core.context_with_data("my.cool.context") as ctx:
+            pass
+        handler.assert_called_once_with(ctx)
+        assert ctx._events == core._context_events("my.cool.context")
+
     def test_core_dispatch_multiple_args(self):
         class Listener:
             results: int = 0
@@ -397,6 +427,33 @@ class TestContextEventsApi(unittest.TestCase):
         assert results[thread_nested_context_id]["_id"] == thread_nested_context_id
         assert results[thread_nested_context_id]["parent"] == thread_context_id
 
+    def test_core_context_get_item_cached_owner(self):
+        with core.context_with_data("outer", pin="outer_pin") as outer:
+            with core.context_with_data("middle") as middle:
+                with core.context_with_data("inner") as inner:
+                    assert inner.get_item("pin") == "outer_pin"
+                    # Value updates of the owner are seen through the cached lookup
+                    outer.set_item("pin", "new_pin")
+                    assert inner.get_item("pin") == "new_pin"
+                    # Keys added to a closer ancestor shadow the cached owner
+                    middle.set_item("pin", "middle_pin")
+                    assert inner.get_item("pin") == "middle_pin"
+                    middle.discard_local_item("pin")
+                    assert inner.get_item("pin") == "new_pin"
+                    inner.discard_item("pin")
+                    assert inner.get_item("pin") is None
+                    assert "pin" not in outer._data
+
+    def test_core_context_lazy_storage(self):
+        context = core.ExecutionContext("foo")
+        assert context._owners is None
+        assert context._suppress_exceptions is None
+        assert not hasattr(context, "__dict__")
+        with context:
+            core.add_suppress_exception(KeyError)
+            raise KeyError("suppressed")
+        assert context._suppress_exceptions == [KeyError]
+
     def test_core_context_with_data_inheritance(self):
         data_key = "my.cool.data"
         original_data_value = "ban.ana"
@@ -96,6 +96,44 @@ def test_periodic_join_stop_no_start():
         t.stop()
 
 
+def test_periodic_wake_does_not_wait():
+    started = Event()
+    release = Event()
+
+    def _run_periodic():
+        started.set()
+        release.wait()
+
+    t = periodic.PeriodicThread(60, _run_periodic)
+    t.start()
+    t.wake()
+    assert started.wait(timeout=5)
+
+    # The thread is busy running the target, waking it up again must not block
+    t.wake()
+    release.set()
+    t.stop()
+    t.join()
+
+
+def test_periodic_interval_change():
+    queue = []
+
+    t = periodic.PeriodicThread(60, lambda: queue.append(None))
+    t.start()
+    t.wake()
+    sleep(0.1)
+    assert len(queue) == 1
+
+    # The new interval is used for the next wait
+    t.interval = 0.01
+    t.wake()
+    sleep(0.5)
+    t.stop()
+    t.join()
+    assert len(queue) > 3
+
+
 def test_awakeable_periodic_service():
     queue = []
 
@@ -1,3 +1,4 @@
+import threading
 from time import sleep
 
 from mock.mock import ANY
@@ -201,6 +202,35 @@ def test_send_tracers_count_metric(telemetry_writer, test_agent_session, mock_ti
     _assert_metric(test_agent_session, expected_series)
 
 
+def test_send_tracers_count_metric_handle(telemetry_writer, test_agent_session, mock_time):
+    handle = telemetry_writer.count_metric_handle(TELEMETRY_NAMESPACE_TAG_TRACER, "test-metric", (("a", "b"),))
+    assert telemetry_writer.count_metric_handle(TELEMETRY_NAMESPACE_TAG_TRACER, "test-metric", (("a", "b"),)) is handle
+
+    handle.add()
+    handle.add(2)
+    # Each thread adds to its own counter, which are summed at flush
+    threads = [threading.Thread(target=handle.add) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # The counts of the handle are aggregated with the count metrics queued the usual way
+    telemetry_writer.add_count_metric(TELEMETRY_NAMESPACE_TAG_TRACER, "test-metric", 1, (("a", "b"),))
+
+    expected_series = [
+        {
+            "common": True,
+            "metric": "test-metric",
+            "points": [[1642544540, 6.0]],
+            "tags": ["a:b"],
+            "type": "count",
+        },
+    ]
+    _assert_metric(test_agent_session, expected_series)
+    # Counts are only flushed once
+    assert handle.collect() == 0
+
+
 def test_send_appsec_rate_metric(telemetry_writer, test_agent_session, mock_time):
     telemetry_writer.add_rate_metric(
         TELEMETRY_NAMESPACE_TAG_APPSEC,
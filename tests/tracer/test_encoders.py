@@ -32,6 +32,7 @@ from ddtrace.internal.encoding import JSONEncoder
 from ddtrace.internal.encoding import JSONEncoderV2
 from ddtrace.internal.encoding import MsgpackEncoderV04
 from ddtrace.internal.encoding import MsgpackEncoderV05
+from ddtrace.internal.encoding import RingBufferedEncoder
 from ddtrace.internal.encoding import _EncoderBase
 from tests.utils import DummyTracer
 
@@ -724,6 +725,46 @@ def test_custom_msgpack_encode_v05():
     ]
 
 
+def test_custom_msgpack_encode_v05_warm_strings():
+    encoder = MsgpackEncoderV05(2 << 20, 2 << 20)
+    encoder.warm_strings = 5
+    assert encoder.warm_strings == 5
+
+    for i in range(200):
+        trace = [
+            Span(name="v05-test", service="foo", resource="GET"),
+            Span(name="v05-test", service="foo", resource="POST"),
+        ]
+        trace[0].set_tag_str("unique", "value-%d" % i)
+        encoder.put(trace)
+
+        num_bytes = encoder.size
+        encoded, num_traces = encoder.flush()
+        assert num_traces == 1
+        assert num_bytes == len(encoded)
+        ((root, child),) = decode(encoded)[0]
+        assert root[:3] == (b"foo", b"v05-test", b"GET")
+        assert root[9] == {b"unique": ("value-%d" % i).encode()}
+        assert child[:3] == (b"foo", b"v05-test", b"POST")
+
+    # The strings used by every payload are kept in the table, unlike the
+    # unique tag values.
+    st, _ = decode(encoded, reconstruct=False)
+    assert set(st[2:7]) == {b"foo", b"v05-test", b"GET", b"POST", b"unique"}
+    assert st[7:] == [b"value-199"]
+
+    stats = encoder.string_table_stats
+    assert stats["warm_strings"] == 5
+    assert 0 < stats["warm_hits"] < stats["lookups"]
+
+    encoder.warm_strings = 0
+    encoder.put([Span(name="v05-test", service="foo", resource="GET")])
+    encoder.flush()
+    encoder.put([Span(name="v05-test", service="bar", resource="GET")])
+    st, _ = decode(encoder.flush()[0], reconstruct=False)
+    assert st == [b"", _ORIGIN_KEY, b"bar", b"v05-test", b"GET"]
+
+
 def string_table_test(t, origin_key=False):
     assert len(t) == 1 + origin_key
 
@@ -885,3 +926,83 @@ def test_v03_trace_api_deprecation():
             warns[0].message.args[0] == "DD_TRACE_API_VERSION=v0.3 is deprecated and will be "
             "removed in version '3.0.0': Traces will be submitted to the v0.4/traces agent endpoint instead."
         ), warns[0].message
+
+
+@allencodings
+def test_ring_buffered_encoder(encoding):
+    encoder = RingBufferedEncoder(MSGPACK_ENCODERS[encoding], 1 << 20, 1 << 20)
+    assert encoder.content_type == MSGPACK_ENCODERS[encoding].content_type
+
+    traces = [gen_trace(nspans=5, ntags=2, nmetrics=2) for _ in range(4)]
+    for trace in traces[:2]:
+        encoder.put(trace)
+    assert len(encoder) == 2
+
+    # Rotating moves writers to the next buffer, so encoding only returns the
+    # traces written before the flush.
+    payload, n_traces = encoder.encode()
+    assert n_traces == 2
+    for trace in traces[2:]:
+        encoder.put(trace)
+    assert len(encoder) == 2
+
+    ref_encoder = MSGPACK_ENCODERS[encoding](1 << 20, 1 << 20)
+    for trace in traces[:2]:
+        ref_encoder.put(trace)
+    assert payload == ref_encoder.encode()[0]
+
+    payload, n_traces = encoder.encode()
+    assert n_traces == 2
+    assert len(encoder) == 0
+    assert encoder.encode() == (None, 0)
+
+
+@allencodings
+def test_encode_buffer(encoding):
+    encoder = MSGPACK_ENCODERS[encoding](1 << 20, 1 << 20)
+    ref_encoder = MSGPACK_ENCODERS[encoding](1 << 20, 1 << 20)
+    assert encoder.encode_buffer() == (None, 0)
+
+    for _ in range(3):
+        traces = [gen_trace(nspans=5, ntags=2, nmetrics=2) for _ in range(2)]
+        for trace in traces:
+            encoder.put(trace)
+            ref_encoder.put(trace)
+
+        view, n_traces = encoder.encode_buffer()
+        assert n_traces == 2
+        assert len(encoder) == 0
+        assert view.readonly
+        assert view == ref_encoder.encode()[0]
+
+        # Releasing the view frees the payload
+        view.release()
+        with pytest.raises(ValueError):
+            bytes(view)
+
+
+def test_ring_buffered_encoder_needs_two_buffers():
+    with pytest.raises(ValueError):
+        RingBufferedEncoder(MsgpackEncoderV04, 1 << 20, 1 << 20, n_buffers=1)
+
+
+def test_ring_buffered_encoder_concurrent_put_and_flush():
+    encoder = RingBufferedEncoder(MsgpackEncoderV04, 1 << 20, 1 << 20, n_buffers=3)
+    n_threads, n_traces = 4, 50
+    encoded = []
+
+    def _put():
+        for _ in range(n_traces):
+            encoder.put(gen_trace(nspans=2, ntags=1, nmetrics=1))
+
+    threads = [threading.Thread(target=_put) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        encoded.append(encoder.encode()[1])
+    for t in threads:
+        t.join()
+    for _ in range(3):
+        encoded.append(encoder.encode()[1])
+
+    assert sum(encoded) == n_threads * n_traces
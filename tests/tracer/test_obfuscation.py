@@ -0,0 +1,73 @@
+import pytest
+
+from ddtrace._trace.span import Span
+from ddtrace.ext import SpanTypes
+from ddtrace.internal.processor.obfuscation import normalize_resource
+from ddtrace.internal.processor.obfuscation import obfuscate_mongodb
+from ddtrace.internal.processor.obfuscation import obfuscate_sql
+from ddtrace.internal.processor.obfuscation import quantize_redis
+from ddtrace.internal.processor.stats import _span_aggr_key
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE name = 'O''Brien'", "SELECT * FROM users WHERE name = ?"),
+        ("SELECT a.b1, 3.5e10 FROM t2 WHERE x IN (1, 2, 3)", "SELECT a.b1, ? FROM t2 WHERE x IN (?)"),
+        ("SELECT * FROM t -- trailing comment\nWHERE y = 0x1F", "SELECT * FROM t WHERE y = ?"),
+        ("/* app=foo */ UPDATE t SET flag = true, s = $$abc$$", "UPDATE t SET flag = ?, s = ?"),
+        ("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, NULL)", "INSERT INTO t (a, b) VALUES ( ? )"),
+        ("SELECT * FROM t WHERE a = %s AND b = :b", "SELECT * FROM t WHERE a = %s AND b = :b"),
+    ],
+)
+def test_obfuscate_sql(query, expected):
+    assert obfuscate_sql(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("GET key1", "GET"),
+        ("set key value", "SET"),
+        ("CLIENT KILL 127.0.0.1:6379", "CLIENT KILL"),
+        ("SET a 1\nGET a\nDEL a", "SET GET DEL"),
+        ("SET a 1\nGET a\nDEL a\nGET b", "SET GET DEL ..."),
+    ],
+)
+def test_quantize_redis(query, expected):
+    assert quantize_redis(query) == expected
+
+
+@pytest.mark.parametrize(
+    "resource,expected",
+    [
+        ("find users", "find users"),
+        ('find users {"age": {"$lt": 30}}', 'find users {"age": {"$lt": "?"}}'),
+        ('find users {"$or": [{"a": 1}, {"b": "x"}]}', 'find users {"$or": [{"a": "?"}, {"b": "?"}]}'),
+        ("find users {not json", "find users {not json"),
+    ],
+)
+def test_obfuscate_mongodb(resource, expected):
+    assert obfuscate_mongodb(resource) == expected
+
+
+def test_normalize_resource():
+    assert normalize_resource(SpanTypes.SQL, "SELECT 1") == "SELECT ?"
+    assert normalize_resource(SpanTypes.CASSANDRA, "SELECT * FROM t WHERE k = 'v'") == "SELECT * FROM t WHERE k = ?"
+    assert normalize_resource(SpanTypes.REDIS, "GET key") == "GET"
+    # Other resources are not changed
+    assert normalize_resource(SpanTypes.WEB, "GET /users/1") == "GET /users/1"
+    assert normalize_resource("", "SELECT 1") == "SELECT 1"
+
+
+def test_span_aggr_key_obfuscation():
+    spans = [
+        Span("postgres.query", service="db", resource="SELECT * FROM t WHERE id = %d" % i, span_type=SpanTypes.SQL)
+        for i in range(10)
+    ]
+
+    assert len({_span_aggr_key(span) for span in spans}) == 10
+    assert {_span_aggr_key(span, obfuscate_resource=True) for span in spans} == {
+        ("postgres.query", "db", "SELECT * FROM t WHERE id = ?", SpanTypes.SQL, 0, False)
+    }
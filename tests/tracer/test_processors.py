@@ -1,3 +1,4 @@
+import threading
 from typing import Any  # noqa:F401
 
 import mock
@@ -7,6 +8,7 @@ from ddtrace import Tracer
 from ddtrace._trace.context import Context
 from ddtrace._trace.processor import SpanAggregator
 from ddtrace._trace.processor import SpanProcessor
+from ddtrace._trace.processor import TailSamplingProcessor
 from ddtrace._trace.processor import TraceProcessor
 from ddtrace._trace.processor import TraceSamplingProcessor
 from ddtrace._trace.processor import TraceTagsProcessor
@@ -23,8 +25,11 @@ from ddtrace.constants import USER_REJECT
 from ddtrace.ext import SpanTypes
 from ddtrace.internal.constants import HIGHER_ORDER_TRACE_ID_BITS
 from ddtrace.internal.processor.endpoint_call_counter import EndpointCallCounterProcessor
+from ddtrace.internal.processor.stats import SpanStatsProcessorV06
 from ddtrace.internal.sampling import SamplingMechanism
 from ddtrace.internal.sampling import SpanSamplingRule
+from ddtrace.internal.telemetry.metrics import CountMetricHandle
+from ddtrace.internal.writer import AgentWriter
 from ddtrace.sampler import DatadogSampler
 from tests.utils import DummyTracer
 from tests.utils import DummyWriter
@@ -336,39 +341,173 @@ def test_trace_128bit_processor(trace_id):
 
 
 def test_span_creation_metrics():
-    """Test that telemetry metrics are queued in batches of 100 and the remainder is sent on shutdown"""
+    """Test that the spans created and finished are counted by telemetry handles, by span api"""
     writer = DummyWriter()
     aggr = SpanAggregator(partial_flush_enabled=False, partial_flush_min_spans=0, trace_processors=[], writer=writer)
 
     with override_global_config(dict(_telemetry_enabled=True)):
-        with mock.patch("ddtrace.internal.telemetry.telemetry_writer.add_count_metric") as mock_tm:
+        with mock.patch(
+            "ddtrace.internal.telemetry.telemetry_writer.count_metric_handle", side_effect=CountMetricHandle
+        ) as mock_handle:
             for _ in range(300):
                 span = Span("span", on_finish=[aggr.on_span_finish])
                 aggr.on_span_start(span)
                 span.finish()
 
             span = Span("span", on_finish=[aggr.on_span_finish])
+            span._span_api = "otel"
             aggr.on_span_start(span)
-            span.finish()
 
-            mock_tm.assert_has_calls(
-                [
-                    mock.call("tracers", "spans_created", 100, tags=(("integration_name", "datadog"),)),
-                    mock.call("tracers", "spans_finished", 100, tags=(("integration_name", "datadog"),)),
-                    mock.call("tracers", "spans_created", 100, tags=(("integration_name", "datadog"),)),
-                    mock.call("tracers", "spans_finished", 100, tags=(("integration_name", "datadog"),)),
-                    mock.call("tracers", "spans_created", 100, tags=(("integration_name", "datadog"),)),
-                    mock.call("tracers", "spans_finished", 100, tags=(("integration_name", "datadog"),)),
-                ]
-            )
-            mock_tm.reset_mock()
-            aggr.shutdown(None)
-            mock_tm.assert_has_calls(
+            # Handles are only obtained once per metric and span api
+            mock_handle.assert_has_calls(
                 [
-                    mock.call("tracers", "spans_created", 1, tags=(("integration_name", "datadog"),)),
-                    mock.call("tracers", "spans_finished", 1, tags=(("integration_name", "datadog"),)),
+                    mock.call("tracers", "spans_created", tags=(("integration_name", "datadog"),)),
+                    mock.call("tracers", "spans_finished", tags=(("integration_name", "datadog"),)),
+                    mock.call("tracers", "spans_created", tags=(("integration_name", "otel"),)),
                 ]
             )
+            assert mock_handle.call_count == 3
+
+    assert aggr._span_count_handles["spans_created"]["datadog"].collect() == 300
+    assert aggr._span_count_handles["spans_finished"]["datadog"].collect() == 300
+    assert aggr._span_count_handles["spans_created"]["otel"].collect() == 1
+    assert aggr._span_count_handles["spans_created"]["datadog"].collect() == 0
+
+
+def test_aggregator_shards():
+    writer = DummyWriter()
+    aggr = SpanAggregator(
+        partial_flush_enabled=False, partial_flush_min_spans=0, trace_processors=[], writer=writer, shards=4
+    )
+
+    spans = [Span("span", trace_id=trace_id, on_finish=[aggr.on_span_finish]) for trace_id in range(8)]
+    for span in spans:
+        aggr.on_span_start(span)
+    # Traces are spread over the shards by trace id
+    assert [sorted(shard.traces) for shard in aggr._shards] == [[0, 4], [1, 5], [2, 6], [3, 7]]
+
+    for span in spans:
+        span.finish()
+    assert all(not shard.traces for shard in aggr._shards)
+    assert [s.trace_id for t in writer.pop_traces() for s in t] == list(range(8))
+
+
+class _BatchedProcessor(TraceProcessor):
+    batched = True
+
+    def __init__(self):
+        super(_BatchedProcessor, self).__init__()
+        self.batches = []
+
+    def process_trace(self, trace):
+        # Drop the traces of even trace ids
+        return None if trace[0].trace_id % 2 == 0 else trace
+
+    def process_traces(self, traces):
+        self.batches.append(len(traces))
+        return super(_BatchedProcessor, self).process_traces(traces)
+
+
+def test_aggregator_batched_processors_run_in_writer():
+    writer = AgentWriter("http://localhost:9126", api_version="v0.4", pipelined=True)
+    sync_tp = mock.Mock(wraps=TraceTagsProcessor())
+    sync_tp.batched = False
+    batched_tp = _BatchedProcessor()
+    aggr = SpanAggregator(
+        partial_flush_enabled=False,
+        partial_flush_min_spans=0,
+        trace_processors=[batched_tp, sync_tp],
+        writer=writer,
+    )
+
+    with mock.patch.object(writer, "_start_on_first_write"):
+        for trace_id in range(1, 5):
+            span = Span("span", trace_id=trace_id, on_finish=[aggr.on_span_finish])
+            aggr.on_span_start(span)
+            span.finish()
+
+    # Only the synchronous processor ran on span finish
+    assert sync_tp.process_trace.call_count == 4
+    assert batched_tp.batches == []
+    assert len(writer._pending_traces) == 4
+
+    writer._drain_pending_traces()
+    assert batched_tp.batches == [4]
+    assert len(writer._encoder) == 2
+    assert writer._metrics["accepted_traces"] == 2
+
+
+def test_aggregator_batched_processors_without_writer_support():
+    writer = DummyWriter()
+    batched_tp = _BatchedProcessor()
+    aggr = SpanAggregator(
+        partial_flush_enabled=False, partial_flush_min_spans=0, trace_processors=[batched_tp], writer=writer
+    )
+
+    for trace_id in range(1, 5):
+        span = Span("span", trace_id=trace_id, on_finish=[aggr.on_span_finish])
+        aggr.on_span_start(span)
+        span.finish()
+
+    # The processor is applied to each trace when it finishes
+    assert batched_tp.batches == []
+    assert [t[0].trace_id for t in writer.pop_traces()] == [1, 3]
+
+
+def _finished_trace(trace_id, duration, error=0, nspans=2):
+    root = Span("root", trace_id=trace_id, span_id=1, start=0)
+    root.context.sampling_priority = AUTO_KEEP
+    trace = [root] + [Span("child", trace_id=trace_id, parent_id=1, start=0) for _ in range(nspans - 1)]
+    trace[-1].error = error
+    for span in trace:
+        span.duration_ns = duration
+    return trace
+
+
+def test_tail_sampling_processor():
+    tp = TailSamplingProcessor(latency_percentile=90, window_size=100)
+
+    # All traces are kept until enough durations are known
+    assert [tp.process_trace(_finished_trace(i, i)) is not None for i in range(99)] == [True] * 99
+
+    # Slow and erroneous traces are kept, the others are dropped
+    assert tp.process_trace(_finished_trace(99, 1000)) is not None
+    assert tp.process_trace(_finished_trace(100, 1)) is None
+    assert tp.process_trace(_finished_trace(101, 1, error=1)) is not None
+
+    manual_keep = _finished_trace(102, 1)
+    manual_keep[0].context.sampling_priority = USER_KEEP
+    assert tp.process_trace(manual_keep) is manual_keep
+
+    partial = _finished_trace(103, 1)
+    partial[0].set_metric("_dd.py.partial_flush", 2)
+    assert tp.process_trace(partial) is partial
+
+    # Spans kept by single span sampling rules are still sent
+    single_span = _finished_trace(104, 1)
+    single_span[1].set_metric(_SINGLE_SPAN_SAMPLING_MECHANISM, SamplingMechanism.SPAN_SAMPLING_RULE)
+    assert tp.process_trace(single_span) == [single_span[1]]
+
+
+def test_tail_sampling_processor_batch():
+    tp = TailSamplingProcessor(latency_percentile=50, window_size=1000)
+    traces = [_finished_trace(i, i) for i in range(200)] + [_finished_trace(200, 0, error=1)]
+
+    # The threshold accounts for all the traces of the batch
+    kept = tp.process_traces(traces)
+    assert [t[0].trace_id for t in kept] == list(range(99, 201))
+
+
+def test_tail_sampling_requires_stats_computation():
+    with override_global_config(dict(_trace_tail_sampling_enabled=True)):
+        tracer = Tracer()
+        tracer.configure(compute_stats_enabled=True)
+        aggr = tracer._deferred_processors[0]
+        assert any(isinstance(tp, TailSamplingProcessor) for tp in aggr._trace_processors)
+
+        tracer.configure(compute_stats_enabled=False)
+        aggr = tracer._deferred_processors[0]
+        assert not any(isinstance(tp, TailSamplingProcessor) for tp in aggr._trace_processors)
 
 
 def test_changing_tracer_sampler_changes_tracesamplingprocessor_sampler():
@@ -692,3 +831,36 @@ def test_tracer_reconfigured_with_active_span_does_not_crash():
         # Calling .finish() manually bypasses the code that catches the exception
         ddtrace.tracer.configure(partial_flush_enabled=True, partial_flush_min_spans=1)
         exploding_span.finish()
+
+
+def test_span_stats_processor_thread_buckets():
+    processor = SpanStatsProcessorV06("http://localhost:8126")
+    # Prevent the buckets from being flushed
+    processor.stop()
+
+    def finish_spans(n):
+        for _ in range(n):
+            span = Span("web.request", service="web", resource="GET /", start=0)
+            span.finish(finish_time=1)
+            processor.on_span_finish(span)
+
+    threads = [threading.Thread(target=finish_spans, args=(100,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    finish_spans(10)
+
+    assert len(processor._thread_buckets) == 5
+    assert not processor._buckets
+
+    processor._merge_thread_buckets()
+
+    # The buckets of the threads that have exited are dropped once merged
+    assert len(processor._thread_buckets) == 1
+    (bucket,) = processor._buckets.values()
+    (stats,) = bucket.values()
+    assert stats.hits == stats.top_level_hits == 410
+    assert stats.duration == 410 * 1e9
+    assert stats.ok_distribution.count == 410
+    assert stats.err_distribution.count == 0
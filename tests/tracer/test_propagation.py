@@ -15,6 +15,7 @@ from ddtrace.appsec._trace_utils import _asm_manual_keep
 from ddtrace.constants import AUTO_REJECT
 from ddtrace.constants import USER_KEEP
 from ddtrace.constants import USER_REJECT
+from ddtrace.internal._tagset import encode_tagset_values
 from ddtrace.internal.constants import _PROPAGATION_STYLE_BAGGAGE
 from ddtrace.internal.constants import _PROPAGATION_STYLE_NONE
 from ddtrace.internal.constants import _PROPAGATION_STYLE_W3C_TRACECONTEXT
@@ -38,6 +39,7 @@ from ddtrace.propagation.http import HTTP_HEADER_PARENT_ID
 from ddtrace.propagation.http import HTTP_HEADER_SAMPLING_PRIORITY
 from ddtrace.propagation.http import HTTP_HEADER_TRACE_ID
 from ddtrace.propagation.http import HTTPPropagator
+from ddtrace.propagation.http import _normalize_extract_headers
 from ddtrace.propagation.http import _TraceContext
 from tests.contrib.fastapi.conftest import client as fastapi_client  # noqa:F401
 from tests.contrib.fastapi.conftest import fastapi_application  # noqa:F401
@@ -276,6 +278,32 @@ def test_inject_tags_previous_error(tracer):  # noqa: F811
         assert _HTTP_HEADER_TAGS not in headers
 
 
+def test_inject_cached_headers():
+    ctx = Context(trace_id=1234, span_id=5678, sampling_priority=1, meta={"_dd.p.dm": "-1"}, is_remote=False)
+
+    with mock.patch("ddtrace.propagation.http.encode_tagset_values", wraps=encode_tagset_values) as encode:
+        headers = {}
+        HTTPPropagator.inject(ctx, headers)
+        for _ in range(10):
+            fanout_headers = {}
+            HTTPPropagator.inject(ctx, fanout_headers)
+            assert fanout_headers == headers
+        # The headers are only rendered once for the same context state
+        assert encode.call_count == 1
+
+        ctx.sampling_priority = 2
+        ctx.span_id = 91011
+        ctx._meta["_dd.p.test"] = "value"
+        headers = {}
+        HTTPPropagator.inject(ctx, headers)
+        assert encode.call_count == 2
+
+    assert headers[HTTP_HEADER_PARENT_ID] == "91011"
+    assert headers[HTTP_HEADER_SAMPLING_PRIORITY] == "2"
+    assert set(headers[_HTTP_HEADER_TAGS].split(",")) == {"_dd.p.dm=-1", "_dd.p.test=value"}
+    assert headers[_HTTP_HEADER_TRACEPARENT] == "00-000000000000000000000000000004d2-0000000000016383-01"
+
+
 def test_extract(tracer):  # noqa: F811
     headers = {
         "x-datadog-trace-id": "1234",
@@ -661,6 +689,42 @@ def test_extract_with_baggage_http_propagation(tracer):  # noqa: F811
                 assert child_span.context.get_baggage_item("key1") == "value1"
 
 
+def test_normalize_extract_headers():
+    headers = {
+        "Host": "example.com",
+        "User-Agent": "curl/8.0",
+        "X-Datadog-Trace-Id": "1234",
+        get_wsgi_header(HTTP_HEADER_PARENT_ID): "5678",
+        "TraceParent": "00-00000000000000000000000000000001-0000000000000002-01",
+        "OT-Baggage-Key1": "value1",
+    }
+
+    expected = {
+        "x-datadog-trace-id": "1234",
+        get_wsgi_header(HTTP_HEADER_PARENT_ID).lower(): "5678",
+        "traceparent": "00-00000000000000000000000000000001-0000000000000002-01",
+    }
+
+    normalized_headers, styles = _normalize_extract_headers(headers)
+    assert normalized_headers == expected
+    assert styles == {PROPAGATION_STYLE_DATADOG, _PROPAGATION_STYLE_W3C_TRACECONTEXT}
+
+    normalized_headers, styles = _normalize_extract_headers(headers, ot_baggage=True)
+    assert normalized_headers == dict(expected, **{"ot-baggage-key1": "value1"})
+    assert styles == {PROPAGATION_STYLE_DATADOG, _PROPAGATION_STYLE_W3C_TRACECONTEXT}
+
+
+def test_extract_no_tracing_headers():
+    headers = {"Host": "example.com", "User-Agent": "curl/8.0", "Accept": "*/*", "Cookie": "session=1"}
+
+    with mock.patch("ddtrace.propagation.http._DatadogMultiHeader._extract") as extract:
+        context = HTTPPropagator.extract(headers)
+
+    # No context is extracted from styles whose headers are missing
+    extract.assert_not_called()
+    assert context == Context()
+
+
 @pytest.mark.subprocess(
     env=dict(DD_TRACE_PROPAGATION_STYLE=PROPAGATION_STYLE_DATADOG),
 )
@@ -1,5 +1,7 @@
 from __future__ import division
 
+import threading
+
 import mock
 import pytest
 
@@ -7,6 +9,7 @@ from ddtrace.internal import compat
 from ddtrace.internal.rate_limiter import BudgetRateLimiterWithJitter
 from ddtrace.internal.rate_limiter import RateLimiter
 from ddtrace.internal.rate_limiter import RateLimitExceeded
+from ddtrace.internal.rate_limiter import ThreadLocalRateLimiter
 
 
 def nanoseconds(x, time_window):
@@ -51,10 +54,11 @@ def test_rate_limiter_rate_limit_negative(time_window):
             assert limiter.is_allowed() is True
 
 
+@pytest.mark.parametrize("limiter_cls", [RateLimiter, ThreadLocalRateLimiter])
 @pytest.mark.parametrize("rate_limit", [1, 10, 50, 100, 500, 1000])
 @pytest.mark.parametrize("time_window", [1e3, 1e6, 1e9])
-def test_rate_limiter_is_allowed(rate_limit, time_window):
-    limiter = RateLimiter(rate_limit=rate_limit, time_window=time_window)
+def test_rate_limiter_is_allowed(limiter_cls, rate_limit, time_window):
+    limiter = limiter_cls(rate_limit=rate_limit, time_window=time_window)
 
     def check_limit():
         # Up to the allowed limit is allowed
@@ -107,9 +111,10 @@ def test_rate_limiter_is_allowed_small_gaps(time_window):
             assert limiter.is_allowed() is True
 
 
+@pytest.mark.parametrize("limiter_cls", [RateLimiter, ThreadLocalRateLimiter])
 @pytest.mark.parametrize("time_window", [1e3, 1e6, 1e9])
-def test_rate_liimter_effective_rate_rates(time_window):
-    limiter = RateLimiter(rate_limit=100, time_window=time_window)
+def test_rate_liimter_effective_rate_rates(limiter_cls, time_window):
+    limiter = limiter_cls(rate_limit=100, time_window=time_window)
 
     # Static rate limit window
     starting_window_ns = compat.monotonic_ns()
@@ -208,6 +213,40 @@ def test_rate_limiter_3():
             assert decision is False
 
 
+@pytest.mark.parametrize("time_window", [1e3, 1e6, 1e9])
+def test_thread_local_rate_limiter_threads(time_window):
+    limiter = ThreadLocalRateLimiter(rate_limit=100, time_window=time_window, lease_size=10)
+    allowed = []
+
+    def is_allowed(n):
+        allowed.append(sum(limiter.is_allowed() for _ in range(n)))
+
+    def run_thread(n):
+        thread = threading.Thread(target=is_allowed, args=(n,))
+        thread.start()
+        thread.join()
+
+    now_ns = compat.monotonic_ns()
+    with mock.patch("ddtrace.internal.rate_limiter.compat.monotonic_ns", return_value=now_ns):
+        # Every thread takes a lease of 10 tokens
+        for _ in range(5):
+            run_thread(1)
+        assert allowed == [1] * 5
+        assert limiter.tokens == 50
+
+        # The remaining tokens are shared by the next threads
+        run_thread(1000)
+        run_thread(1000)
+        assert allowed[5:] == [50, 0]
+        assert limiter.tokens == 0
+
+    # The leases of the first threads have expired in the next window, so
+    # the rate limit is not exceeded
+    with mock.patch("ddtrace.internal.rate_limiter.compat.monotonic_ns", return_value=now_ns + time_window):
+        run_thread(1000)
+        assert allowed[7:] == [100]
+
+
 @pytest.mark.parametrize("rate_limit", list(range(10)))
 def test_rate_limiter_with_jitter_expected_calls(rate_limit):
     limiter = BudgetRateLimiterWithJitter(limit_rate=rate_limit)
@@ -19,6 +19,7 @@ from ddtrace.constants import USER_REJECT
 from ddtrace.internal.rate_limiter import RateLimiter
 from ddtrace.internal.sampling import SAMPLING_DECISION_TRACE_TAG_KEY
 from ddtrace.internal.sampling import SamplingMechanism
+from ddtrace.internal.sampling import SamplingRuleMatcher
 from ddtrace.internal.sampling import set_sampling_decision_maker
 from ddtrace.sampler import DatadogSampler
 from ddtrace.sampler import RateByServiceSampler
@@ -621,6 +622,47 @@ def test_sampling_rule_matches_exception():
         )
 
 
+def test_sampling_rule_matcher():
+    rules = [
+        SamplingRule(sample_rate=0.1, service="my-service", name="web.request", tags={"env": "prod"}),
+        SamplingRule(sample_rate=0.2, service="my-service", resource="GET /health*"),
+        SamplingRule(sample_rate=0.3, service="My-Serv?ce", name="*.request"),
+        SamplingRule(sample_rate=0.4, service=re.compile(r"^other-")),
+        SamplingRule(sample_rate=0.5, name="*"),
+        SamplingRule(sample_rate=0.6, service="my-service"),
+    ]
+    matcher = SamplingRuleMatcher(rules)
+
+    tracer = DummyTracer()
+    spans = []
+    for service in ["my-service", "MY-SERVICE", "my-servxce", "other-service", None]:
+        for name in ["web.request", "db.query", "web.request.other"]:
+            for resource in ["GET /health", "GET /healthz", "GET /users"]:
+                for tags in [{}, {"env": "prod"}, {"env": "staging"}]:
+                    span = tracer.trace(name, service=service, resource=resource)
+                    span.set_tags(tags)
+                    span.finish()
+                    spans.append(span)
+
+    for span in spans:
+        expected = next((rule for rule in rules if rule.matches(span)), None)
+        # Check twice so that the memoized candidates are used too
+        assert matcher.match(span) is expected, span
+        assert matcher.match(span) is expected, span
+
+
+def test_datadog_sampler_rules_changed_in_place():
+    sampler = DatadogSampler(rules=[SamplingRule(sample_rate=0, service="my-service")])
+    span = create_span(service="other-service")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) is None
+
+    sampler.rules.append(SamplingRule(sample_rate=1, service="other-service"))
+    span = create_span(service="other-service")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 1
+
+
 @pytest.mark.subprocess(
     parametrize={"DD_TRACE_128_BIT_TRACEID_GENERATION_ENABLED": ["true", "false"]},
 )
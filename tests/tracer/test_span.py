@@ -621,6 +621,34 @@ def test_span_unicode_set_tag():
     span.set_tag_str("😐", "😌")
 
 
+def test_span_lazy_containers():
+    span = Span("span")
+    assert span._meta_struct is None
+    assert span._events is None
+    assert span.get_struct_tag("key") is None
+
+    span.set_struct_tag("key", {"a": 1})
+    span._add_event("event")
+    assert span.get_struct_tag("key") == {"a": 1}
+    assert [e.name for e in span._events] == ["event"]
+
+
+def test_span_interned_tag_keys():
+    header = "x-custom"
+    key = "http.request.headers.%s" % header
+    s1 = Span("span")
+    s2 = Span("span")
+    s1.set_tag(key, "value")
+    s2.set_tag_str("http.request.headers.%s" % header, "value")
+
+    (k1,) = s1.get_tags()
+    (k2,) = s2.get_tags()
+    assert k1 is k2
+    # Other keys are stored as they are
+    s1.set_tag("custom.%s" % header, "value")
+    assert "custom.x-custom" in s1.get_tags()
+
+
 @pytest.mark.skipif(sys.version_info.major != 2, reason="This test only applies Python 2")
 @mock.patch("ddtrace._trace.span.log")
 def test_span_binary_unicode_set_tag(span_log):
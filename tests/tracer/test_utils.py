@@ -333,14 +333,23 @@ def cached_test_recipe(expensive, cheap, witness, cache_size):
     assert witness.call_count == 1 + cache_size
 
     MAX_FOO = "Foo%d" % (cache_size - 1)
+    MIN_FOO = "Foo%d" % (cache_size >> 1)
 
-    cheap("last drop")  # Forces least frequent elements out of the cache
+    cheap("last drop")  # Forces the oldest element that was used only once out of the cache
     assert witness.call_count == 2 + cache_size
-
-    cheap(MAX_FOO)  # Check MAX_FOO was dropped
-    assert witness.call_count == 3 + cache_size
-
+    assert cheap.cache.stats == {
+        "size": cache_size,
+        "hits": 1 + (cache_size >> 1),
+        "misses": 2 + cache_size,
+        "evictions": 1,
+    }
+
+    cheap("Foo0")  # Check that elements that were used again were retained
+    cheap(MAX_FOO)  # Check that the most recent elements were retained
     cheap("last drop")  # Check last drop was retained
+    assert witness.call_count == 2 + cache_size
+
+    cheap(MIN_FOO)  # Check MIN_FOO was dropped
     assert witness.call_count == 3 + cache_size
 
 
@@ -1,5 +1,7 @@
 import contextlib
+import gzip
 import http.server
+import json
 import os
 import socket
 import socketserver
@@ -16,6 +18,7 @@ import ddtrace
 from ddtrace import config
 from ddtrace._trace.span import Span
 from ddtrace.constants import KEEP_SPANS_RATE_KEY
+from ddtrace.internal import forksafe
 from ddtrace.internal.ci_visibility.writer import CIVisibilityWriter
 from ddtrace.internal.compat import get_connection_response
 from ddtrace.internal.compat import httplib
@@ -26,6 +29,9 @@ from ddtrace.internal.writer import AgentWriter
 from ddtrace.internal.writer import LogWriter
 from ddtrace.internal.writer import Response
 from ddtrace.internal.writer import _human_size
+from ddtrace.internal.writer import compression
+from ddtrace.internal.writer.shared import SharedPayloadRing
+from ddtrace.internal.writer.spill import SpillQueue
 from tests.utils import AnyInt
 from tests.utils import BaseTestCase
 from tests.utils import override_env
@@ -94,16 +100,14 @@ class AgentWriterTests(BaseTestCase):
             for i in range(10):
                 writer.write([Span(name="name", trace_id=i, span_id=j + 1, parent_id=j or None) for j in range(5)])
 
-            massive_trace = []
-            for i in range(10):
-                span = Span("mmon", "mmon" + str(i), "mmon" + str(i))
-                for j in range(50):
-                    key = "opqr012|~" + str(i) + str(j)
-                    val = "stuv345!@#" + str(i) + str(j)
-                    span.set_tag_str(key, val)
-                massive_trace.append(span)
-
-            writer.write(massive_trace)
+            # A single span cannot be split across payloads
+            span = Span("mmon", "mmon", "mmon")
+            for j in range(1000):
+                key = "opqr012|~" + str(j)
+                val = "stuv345!@#" + str(j)
+                span.set_tag_str(key, val)
+
+            writer.write([span])
             writer.stop()
             writer.join()
 
@@ -264,7 +268,7 @@ class AgentWriterTests(BaseTestCase):
             writer = self.WRITER_CLASS("http://asdf:1234", dogstatsd=statsd, buffer_size=1000)
             for i in range(10):
                 writer.write([Span(name="name", trace_id=i, span_id=j + 1, parent_id=j or None) for j in range(5)])
-            writer.write([Span(name="a" * i, trace_id=i, span_id=j + 1, parent_id=j or None) for j in range(2**10)])
+            writer.write([Span(name="a" * 2**10, trace_id=i, span_id=1)])
             writer.stop()
             writer.join()
 
@@ -282,6 +286,24 @@ class AgentWriterTests(BaseTestCase):
             any_order=True,
         )
 
+    def test_split_trace_too_big(self):
+        statsd = mock.Mock()
+        with override_global_config(dict(_health_metrics_enabled=True)):
+            writer = self.WRITER_CLASS(
+                "http://asdf:1234", dogstatsd=statsd, buffer_size=32 << 10, max_payload_size=4 << 10, api_version="v0.4"
+            )
+            trace = [Span(name="a" * 100, trace_id=1, span_id=j + 1, parent_id=j or None) for j in range(100)]
+            writer.write(trace)
+            payload, n_traces = writer._clients[0].encoder.encode()
+
+        chunks = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        assert n_traces == len(chunks) > 1
+        assert [s["span_id"] for chunk in chunks for s in chunk] == list(range(1, 101))
+        for chunk in chunks:
+            assert chunk[0]["metrics"]["_dd.py.partial_flush"] == len(chunk)
+        statsd.distribution.assert_any_call("datadog.%s.buffer.split.traces" % writer.STATSD_NAMESPACE, 1, tags=None)
+        assert not [c for c in statsd.distribution.call_args_list if c.args[0].endswith("buffer.dropped.traces")]
+
     def test_drop_reason_buffer_full(self):
         statsd = mock.Mock()
         with override_global_config(dict(_health_metrics_enabled=True)):
@@ -433,6 +455,9 @@ class CIVisibilityWriterTests(AgentWriterTests):
     def test_metrics_trace_too_big(self):
         pytest.skip()
 
+    def test_split_trace_too_big(self):
+        pytest.skip()
+
     def test_keep_rate(self):
         pytest.skip()
 
@@ -861,6 +886,322 @@ def test_writer_reuse_connections_false(writer_class):
         assert writer._conn is conn
 
 
+def test_writer_connection_pool():
+    with override_global_config(dict(_agent_connection_pool_enabled=True)):
+        writer = AgentWriter("http://localhost:9126", api_version="v0.4")
+
+    pool = mock.Mock()
+    pool.request.return_value = Response(status=200, body=b"{}")
+    with mock.patch("ddtrace.internal.writer.writer.get_connection_pool", return_value=pool) as get_pool:
+        writer.write([Span(name="name", trace_id=1, span_id=1)])
+        writer.flush_queue()
+
+    get_pool.assert_called_once_with("http://localhost:9126", writer._timeout)
+    assert pool.request.call_args[0][:2] == ("PUT", "v0.4/traces")
+    # The writer does not hold a dedicated connection
+    assert writer._conn is None
+    writer.stop()
+
+
+def test_spill_queue_evicts_oldest(tmp_path):
+    spill = SpillQueue(str(tmp_path), 10)
+    assert spill.put(b"aaaa", 1, "v0.4/traces") == (True, 0)
+    assert spill.put(b"bbbb", 2, "v0.4/traces") == (True, 0)
+    # Wraps around and overwrites the oldest payload
+    assert spill.put(b"cccc", 3, "v0.4/traces") == (True, 1)
+    assert spill.put(b"x" * 11, 1, "v0.4/traces") == (False, 0)
+
+    assert len(spill) == 2
+    assert spill.count == 5
+    assert spill.peek() == (b"bbbb", 2, "v0.4/traces")
+    spill.pop()
+    assert spill.peek() == (b"cccc", 3, "v0.4/traces")
+    spill.pop()
+    assert spill.peek() is None
+
+    spill.close()
+    assert not os.path.exists(spill.path)
+
+
+def test_writer_spills_and_replays(tmp_path):
+    statsd = mock.Mock()
+    with override_global_config(dict(_health_metrics_enabled=True)):
+        writer = AgentWriter("http://localhost:9126", api_version="v0.4", spill_dir=str(tmp_path), dogstatsd=statsd)
+
+    with mock.patch.object(writer, "_send_payload", side_effect=ConnectionRefusedError):
+        for i in range(2):
+            writer._encoder.put([Span(name="name", trace_id=i, span_id=1)])
+            writer.flush_queue()
+    assert len(writer._spill) == 2
+
+    with mock.patch.object(writer, "_send_payload", return_value=Response(status=200)) as send:
+        writer.flush_queue()
+
+    assert len(writer._spill) == 0
+    assert [c[0][1] for c in send.call_args_list] == [1, 1]
+    statsd.distribution.assert_has_calls(
+        [mock.call("datadog.%s.spill.replayed.traces" % writer.STATSD_NAMESPACE, 1, tags=None)] * 2
+    )
+    assert writer.recreate()._spill_dir == str(tmp_path)
+    writer.on_shutdown()
+    assert not os.path.exists(writer._spill.path)
+
+
+def test_shared_payload_ring_wraps_around():
+    ring = SharedPayloadRing(64)
+    # Each record takes 10 bytes of header, plus the endpoint and the payload
+    assert ring.put(b"a" * 10, 1, "v0.4/traces")
+    assert ring.put(b"b" * 10, 2, "v0.4/traces")
+    # The ring is full, new payloads are rejected
+    assert not ring.put(b"c" * 10, 3, "v0.4/traces")
+    assert ring.get() == (b"a" * 10, 1, "v0.4/traces")
+    # The record wraps around the end of the ring
+    assert ring.put(b"c" * 10, 3, "v0.4/traces")
+    assert ring.get() == (b"b" * 10, 2, "v0.4/traces")
+    assert ring.get() == (b"c" * 10, 3, "v0.4/traces")
+    assert ring.get() is None
+    assert len(ring) == 0
+    assert not ring.put(b"x" * 64, 1, "v0.4/traces")
+    ring.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_writer_shared_sender():
+    with override_global_config(dict(_trace_writer_shared_sender_buffer_size=1 << 20)):
+        writer = AgentWriter("http://localhost:9126", api_version="v0.4", shared_sender=True)
+    assert writer._shared_ring.is_owner
+    # The sender would be started before forking, flush it by hand instead
+    forksafe.unregister_before_fork(writer._start_shared_sender)
+
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            child = writer.recreate()
+            assert not child._shared_ring.is_owner
+            with mock.patch.object(child, "_send_payload") as send:
+                for i in range(2):
+                    child._encoder.put([Span(name="name", trace_id=i, span_id=1)])
+                    child.flush_queue()
+            # Workers do not upload their payloads
+            send.assert_not_called()
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+    writer._encoder.put([Span(name="name", trace_id=3, span_id=1)])
+    with mock.patch.object(writer, "_send_payload", return_value=Response(status=200)) as send:
+        writer.flush_queue()
+    # The payloads of the worker are uploaded first, then the one of the master process
+    assert [c[0][1] for c in send.call_args_list] == [1, 1, 1]
+    assert all(len(msgpack.unpackb(c[0][0])) == 1 for c in send.call_args_list)
+    writer._shared_ring.close()
+
+
+@pytest.mark.parametrize(
+    "info,expected",
+    [
+        (None, None),
+        ({}, None),
+        ({"content_encodings": ["br"]}, None),
+        ({"content_encodings": ["gzip"]}, "gzip"),
+    ],
+)
+def test_compression_negotiate(info, expected):
+    assert compression.negotiate(info) == expected
+
+
+def test_writer_compression_negotiated_with_agent():
+    writer = AgentWriter("http://localhost:9126", api_version="v0.4", compression_enabled=True)
+    writer._encoder.put([Span(name="name", trace_id=1, span_id=1)])
+
+    with mock.patch("ddtrace.internal.agent.info", return_value={"content_encodings": ["gzip"]}) as info, mock.patch(
+        "ddtrace.internal.writer.compression.zstandard", None
+    ), mock.patch.object(writer, "_send_payload_with_backoff") as send:
+        writer.flush_queue()
+        writer.flush_queue()
+
+    info.assert_called_once_with("http://localhost:9126")
+    assert writer._content_encoding == "gzip"
+    payload, n_traces, client = send.call_args[0]
+    assert n_traces == 1
+    assert len(msgpack.unpackb(gzip.decompress(payload))) == 1
+    assert writer._get_finalized_headers(n_traces, client)["Content-Encoding"] == "gzip"
+
+    assert writer.recreate()._compression_enabled is True
+
+
+@pytest.mark.parametrize("agent_support", [True, False])
+def test_writer_native_span_events(agent_support):
+    writer = AgentWriter("http://localhost:9126", api_version="v0.4", native_span_events=True)
+    span = Span(name="name", trace_id=1, span_id=1)
+    span._add_event("event", {"key": "value", "count": 2, "flags": [True, False]}, 1)
+    span.finish()
+
+    info = {"span_events": True} if agent_support else {}
+    with mock.patch("ddtrace.internal.agent.info", return_value=info), mock.patch.object(
+        writer, "_send_payload_with_backoff"
+    ) as send:
+        writer._encoder.put([span])
+        writer.flush_queue()
+
+    (encoded_span,) = msgpack.unpackb(send.call_args[0][0])[0]
+    if agent_support:
+        assert "events" not in encoded_span["meta"]
+        assert encoded_span["span_events"] == [
+            {
+                "name": "event",
+                "time_unix_nano": 1,
+                "attributes": {
+                    "key": {"type": 0, "string_value": "value"},
+                    "count": {"type": 2, "int_value": 2},
+                    "flags": {
+                        "type": 4,
+                        "array_value": {"values": [{"type": 1, "bool_value": True}, {"type": 1, "bool_value": False}]},
+                    },
+                },
+            }
+        ]
+    else:
+        assert "span_events" not in encoded_span
+        assert json.loads(encoded_span["meta"]["events"])[0]["name"] == "event"
+    assert writer.recreate()._native_span_events is True
+
+
+def test_writer_compression_disabled_on_unsupported_media_type():
+    writer = AgentWriter("http://localhost:9126", api_version="v0.4")
+    writer._content_encoding = "gzip"
+    client = writer._clients[0]
+
+    with mock.patch.object(writer, "_put", return_value=Response(status=415)):
+        writer._send_payload(b"payload", 1, client)
+
+    assert writer._content_encoding is None
+    # The API version is not downgraded
+    assert writer._clients == [client]
+
+
+def test_writer_zero_copy():
+    writer = AgentWriter("http://localhost:9126", api_version="v0.4", zero_copy=True)
+    assert writer.recreate()._zero_copy is True
+
+    payloads = []
+    traces = []
+
+    def _send(payload, n_traces, client):
+        payloads.append(payload)
+        traces.extend(msgpack.unpackb(payload))
+        return Response(status=200)
+
+    with mock.patch.object(writer, "_send_payload_with_backoff", side_effect=_send):
+        writer._encoder.put([Span(name="name", trace_id=1, span_id=1)])
+        writer.flush_queue()
+
+    (payload,) = payloads
+    assert isinstance(payload, memoryview)
+    assert [[span["name"] for span in trace] for trace in traces] == [["name"]]
+    # The payload is released once it has been sent
+    with pytest.raises(ValueError):
+        bytes(payload)
+
+
+def test_writer_adaptive_flush_wakes_up_on_target_size():
+    with override_global_config(dict(_trace_writer_target_payload_size=1000)):
+        writer = AgentWriter("http://localhost:9126", api_version="v0.4", adaptive_flush=True)
+    writer._worker = mock.Mock()
+
+    with mock.patch.object(writer, "_start_on_first_write"):
+        while writer._encoder.size < 1000:
+            writer.write([Span(name="name", trace_id=1, span_id=1)])
+            assert not writer._flush_requested
+            writer._worker.wake.assert_not_called()
+        writer.write([Span(name="name", trace_id=1, span_id=1)])
+
+    assert writer._flush_requested
+    writer._worker.wake.assert_called_once_with()
+
+
+def test_writer_adaptive_flush_interval():
+    statsd = mock.Mock()
+    with override_global_config(
+        dict(
+            _health_metrics_enabled=True,
+            _trace_writer_target_payload_size=100000,
+            _trace_writer_max_interval_seconds=4.0,
+        )
+    ):
+        writer = AgentWriter(
+            "http://localhost:9126", api_version="v0.4", adaptive_flush=True, processing_interval=1.0, dogstatsd=statsd
+        )
+
+    # No traffic at all: flush as rarely as allowed
+    writer._adapt_interval()
+    assert writer.interval == 4.0
+
+    # Light traffic: stretch the interval to get closer to the target size
+    writer._encoder.put([Span(name="name", trace_id=1, span_id=1)])
+    with mock.patch("ddtrace.internal.compat.monotonic", return_value=writer._last_flush + 1.0):
+        writer._adapt_interval()
+    assert 1.0 < writer.interval <= 4.0
+
+    # Heavy traffic: go back to the base interval
+    with mock.patch.object(writer, "_target_payload_size", 1):
+        writer._adapt_interval()
+    assert writer.interval == 1.0
+    assert writer.recreate().interval == 1.0
+
+    statsd.distribution.assert_has_calls(
+        [mock.call("datadog.%s.writer.flush.interval" % writer.STATSD_NAMESPACE, mock.ANY, tags=None)]
+    )
+    statsd.distribution.assert_has_calls(
+        [mock.call("datadog.%s.writer.buffer.fill_ratio" % writer.STATSD_NAMESPACE, mock.ANY, tags=None)]
+    )
+
+
+def test_writer_pipelined_encodes_on_flush():
+    writer = AgentWriter("http://localhost:9126", pipelined=True, api_version="v0.4")
+    with mock.patch.object(writer, "_start_on_first_write"):
+        for i in range(5):
+            writer.write([Span(name="name", trace_id=i, span_id=j + 1, parent_id=j or None) for j in range(3)])
+
+    # Nothing is encoded on the application thread
+    assert len(writer._pending_traces) == 5
+    assert len(writer._encoder) == 0
+
+    with mock.patch.object(writer, "_send_payload_with_backoff") as send:
+        writer.flush_queue()
+
+    assert len(writer._pending_traces) == 0
+    assert send.call_count == 1
+    payload, n_traces, _ = send.call_args[0]
+    assert n_traces == 5
+    assert len(msgpack.unpackb(payload)) == 5
+
+
+def test_writer_pipelined_drops_when_full():
+    statsd = mock.Mock()
+    with override_global_config(dict(_health_metrics_enabled=True)):
+        writer = AgentWriter("http://localhost:9126", pipelined=True, pipeline_max_traces=2, dogstatsd=statsd)
+        with mock.patch.object(writer, "_start_on_first_write"):
+            for i in range(3):
+                writer.write([Span(name="name", trace_id=i, span_id=1)])
+
+    assert len(writer._pending_traces) == 2
+    statsd.distribution.assert_has_calls(
+        [mock.call("datadog.%s.buffer.dropped.traces" % writer.STATSD_NAMESPACE, 1, tags=["reason:full"])]
+    )
+
+
+def test_writer_pipelined_recreate():
+    writer = AgentWriter("http://localhost:9126", pipelined=True, pipeline_max_traces=42)
+    new_writer = writer.recreate()
+    assert new_writer._pipelined is True
+    assert new_writer._pipeline_max_traces == 42
+
+
 @pytest.mark.subprocess(env=dict(DD_TRACE_128_BIT_TRACEID_GENERATION_ENABLED="true"))
 def test_trace_with_128bit_trace_ids():
     """Ensure 128bit trace ids are correctly encoded"""